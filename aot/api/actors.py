@@ -0,0 +1,246 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+"""Per game actors.
+
+When enabled, each live game of the worker is owned by an actor: a task which plays the requests
+for the game one at a time from its mailbox. The game stays in memory between requests and its
+new events are saved to the cache in batches (write-behind): at the end of each turn, when no
+event was saved for :attr:`GameActors.flush_delay` seconds and when the actor stops.
+
+Actors stop when no request was made on their game for :attr:`GameActors.idle_timeout` seconds or
+when the worker shuts down.
+
+This mode expects all the requests of a game to be handled by the same worker: if another worker
+saves the game, the events not yet saved by the actor are lost.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import daiquiri
+
+from .cache import Cache
+from .utils import AotError, GameVersionConflictError, MustNotSaveGameError
+
+logger = daiquiri.getLogger(__name__)
+
+
+class GameActors:
+    """Registry of the actors of the games of this worker."""
+
+    def __init__(self, *, loop, flush_delay, idle_timeout, cache_factory=Cache):
+        self._loop = loop
+        self.flush_delay = flush_delay
+        self.idle_timeout = idle_timeout
+        self._cache_factory = cache_factory
+        self._actors = {}
+
+    def get(self, game_id):
+        """Get the actor of a game, start it if needed."""
+        actor = self._actors.get(game_id)
+        if actor is None:
+            cache = self._cache_factory(loop=self._loop)
+            cache.init(game_id=game_id)
+            actor = GameActor(game_id, cache, self)
+            self._actors[game_id] = actor
+        return actor
+
+    async def stop(self):
+        """Stop all the actors, their unsaved events are saved."""
+        await asyncio.gather(*(actor.stop() for actor in list(self._actors.values())))
+
+    def _remove(self, actor):
+        if self._actors.get(actor.game_id) is actor:
+            del self._actors[actor.game_id]
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def __len__(self):
+        return len(self._actors)
+
+
+class GameActor:
+    _STOP = object()
+    _IDLE = object()
+
+    def __init__(self, game_id, cache, actors):
+        self._game_id = game_id
+        self._cache = cache
+        self._actors = actors
+        self._loop = actors.loop
+        self._mailbox = asyncio.Queue()
+        self._log = None
+        # Log of a game left half modified by a request, kept until its new events are saved.
+        self._unsaved_log = None
+        # Time of the loop at which the unsaved events must be saved.
+        self._flush_time = None
+        self._task = self._loop.create_task(self._run())
+
+    async def call(self, process, *args):
+        """Run ``process(*args)`` once the requests submitted before it are processed."""
+        future = self._loop.create_future()
+        self._mailbox.put_nowait((process, args, future))
+        return await future
+
+    async def stop(self):
+        self._mailbox.put_nowait(self._STOP)
+        await self._task
+
+    @asynccontextmanager
+    async def load_game(self):
+        """Give access to the game and its event log. It must only be used by an actor's request."""
+        if self._log is None:
+            self._log = await self._load_log()
+            if self._log is None:
+                raise AotError("game_does_not_exist")
+
+        log = self._log
+        try:
+            yield log.game, log
+        except MustNotSaveGameError:
+            logger.info("Action asked not to save the game.", exc_info=True)
+        except Exception:
+            logger.exception("Uncaught error while playing, will reload the game")
+            # The game may have been left half modified by the request: we save the events played
+            # before it (only events of successful commands are logged) and reload the game. If
+            # they cannot be saved, they are replayed on the reloaded game to be saved later.
+            if not await self._flush(allow_snapshot=False):
+                self._unsaved_log = log
+            self._log = None
+            raise
+        else:
+            if log.must_snapshot:
+                await self._flush()
+            elif log.new_events and self._flush_time is None:
+                self._flush_time = self._loop.time() + self._actors.flush_delay
+
+    async def _load_log(self):
+        log = await self._cache.load_game()
+        unsaved_log, self._unsaved_log = self._unsaved_log, None
+        if unsaved_log is None:
+            return log
+
+        if log is None or log.version != unsaved_log.version:
+            logger.error(
+                f"Game n°{self._game_id} was saved outside of its actor, "
+                f"{len(unsaved_log.new_events)} events are lost."
+            )
+        else:
+            log.replay_unsaved_events(unsaved_log.new_events)
+        return log
+
+    async def _run(self):
+        while True:
+            message = await self._next_message()
+            if message is self._IDLE:
+                await self._flush()
+                if not self._mailbox.empty():
+                    # Requests were made while the game was saved: the actor is not idle anymore.
+                    continue
+
+                # Nothing is awaited from here: the next requests go to a new actor.
+                self._actors._remove(self)
+                return
+            elif message is self._STOP:
+                await self._flush()
+                self._actors._remove(self)
+                self._reject_pending_requests()
+                return
+
+            await self._process(*message)
+
+    async def _next_message(self):
+        """Wait for the next message, saving the game when it is time to."""
+        while True:
+            try:
+                return await asyncio.wait_for(self._mailbox.get(), self._get_timeout())
+            except asyncio.TimeoutError:
+                if self._flush_time is not None:
+                    await self._flush()
+                elif self._mailbox.empty():
+                    # No request was made for a while, we don't need to keep the game in memory.
+                    return self._IDLE
+
+    async def _process(self, process, args, future):
+        try:
+            result = await process(*args)
+        except Exception as e:
+            if not future.cancelled():
+                future.set_exception(e)
+        else:
+            if not future.cancelled():
+                future.set_result(result)
+
+    def _reject_pending_requests(self):
+        while not self._mailbox.empty():
+            message = self._mailbox.get_nowait()
+            if message is not self._STOP and not message[2].cancelled():
+                message[2].set_exception(AotError("game_stopped"))
+
+    def _get_timeout(self):
+        if self._flush_time is None:
+            return self._actors.idle_timeout
+        return max(0, self._flush_time - self._loop.time())
+
+    async def _flush(self, allow_snapshot=True):
+        """Save the new events of the game.
+
+        Returns:
+            bool: ``False`` if the events could not be saved and must be saved later.
+        """
+        self._flush_time = None
+        if self._log is None and self._unsaved_log is not None:
+            try:
+                self._log = await self._load_log()
+            except Exception:
+                logger.exception(f"Failed to reload game n°{self._game_id}, will retry.")
+                self._flush_time = self._loop.time() + self._actors.flush_delay
+                return False
+
+        log = self._log
+        if log is None or not log.new_events:
+            return True
+
+        in_snapshot = allow_snapshot and log.must_snapshot
+        try:
+            if in_snapshot:
+                version = await self._cache.save_game_if_unchanged(log.game, log.version)
+            else:
+                version = await self._cache.append_game_events(log.new_events, log.version)
+        except GameVersionConflictError:
+            logger.error(
+                f"Game n°{self._game_id} was saved outside of its actor, "
+                f"{len(log.new_events)} events are lost."
+            )
+            self._log = None
+        except Exception:
+            logger.exception(f"Failed to save game n°{self._game_id}, will retry.")
+            self._flush_time = self._loop.time() + self._actors.flush_delay
+            return False
+        else:
+            log.mark_saved(version, in_snapshot=in_snapshot)
+
+        return True
+
+    @property
+    def game_id(self):
+        return self._game_id
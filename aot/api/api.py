@@ -24,8 +24,16 @@ from contextlib import asynccontextmanager
 import daiquiri
 
 from ..utils import make_immutable
+from .events import LOGGED_REQUEST_TYPES, EventTypes
 from .serializers import get_global_game_message, get_private_player_messages_by_ids, to_json
-from .utils import AotError, AotErrorToDisplay, MustNotSaveGameError, RequestTypes, WsResponse
+from .utils import (
+    AotError,
+    AotErrorToDisplay,
+    GameVersionConflictError,
+    MustNotSaveGameError,
+    RequestTypes,
+    WsResponse,
+)
 from .views import (
     create_game,
     create_lobby,
@@ -36,6 +44,8 @@ from .views import (
     play_trump,
     reconnect_to_game,
     reconnect_to_lobby,
+    resume_game,
+    resume_game_from_updates,
     update_slot,
     view_possible_actions,
     view_possible_squares,
@@ -45,6 +55,8 @@ from .views import (
 class Api:
     # Class variables.
     INDEX_FIRST_PLAYER = 0
+    #: Number of times a request is played if the game is saved by another request meanwhile.
+    MAX_PLAY_ATTEMPTS = 3
     MIN_ELAPSED_TIME_TO_CONSIDER = 8
     _clients_pending_disconnection = {}
     _clients_pending_reconnection = {}
@@ -67,16 +79,23 @@ class Api:
         }
     )
 
-    def __init__(self, *, default_id, loop, ai_delay, cache):
+    def __init__(self, *, default_id, loop, ai_delay, cache, game_actors=None, game_updates=None):
         self._loop = loop
         self._game_id = None
         self._id = default_id
         self._pending_ai = set()
+        self._ai_timers = {}
         self._cache = cache
+        self._game_actors = game_actors
+        self._game_updates = game_updates
         self._ai_delay = ai_delay
+        # Version of the game the player has, if it was sent one.
+        self._game_version = None
+        self._receives_game_patches = False
         self._utility_request_types_to_views = {
             RequestTypes.TEST: self._test,
             RequestTypes.INFO: self._info,
+            RequestTypes.ACKNOWLEDGE_GAME_VERSION: self._acknowledge_game_version,
         }
 
     async def process_message(self, message):
@@ -111,6 +130,15 @@ class Api:
         else:
             return WsResponse(send_to_current_player=[{"success": True}])
 
+    async def _acknowledge_game_version(self, request_type, message):
+        # The next states of the game will be sent as patches. They are created from the last
+        # version sent to the player: more recent than the acknowledged one if one was sent since.
+        self._receives_game_patches = True
+        version = message["request"]["version"]
+        if self._game_version is None or version > self._game_version:
+            self._game_version = version
+        return WsResponse()
+
     async def disconnect_player(self):
         if not await self._has_game_started:
             self.logger.debug(f"Freeing slot for player {self.id} in game {self.game_id}")
@@ -118,10 +146,40 @@ class Api:
                 {"player_id": self.id, "game_id": self.game_id, "free": True}, self._cache
             )
 
-        return await self._disconnect_player_from_game()
+        return await self._run_for_game(
+            self.game_id, self._retry_on_conflict, self._disconnect_player_from_game
+        )
+
+    async def _run_for_game(self, game_id, process, *args):
+        """Run ``process(*args)`` in the actor of the game if actors are enabled."""
+        if self._game_actors is None:
+            return await process(*args)
+
+        return await self._game_actors.get(game_id).call(process, *args)
+
+    async def _retry_on_conflict(self, process, *args):
+        """Play the request again on the updated game if it was saved meanwhile.
+
+        The game is saved only if no other request saved it since it was loaded: if so, the
+        request is played again on the updated game.
+        """
+        for attempt in range(1, self.MAX_PLAY_ATTEMPTS + 1):
+            ai_timer = self._ai_timers.get(self.game_id)
+            try:
+                return await process(*args)
+            except GameVersionConflictError:
+                self.logger.info(
+                    f"Game n°{self.game_id} was saved by another request "
+                    f"(attempt {attempt}/{self.MAX_PLAY_ATTEMPTS})."
+                )
+                # The AI was scheduled for a game that wasn't saved.
+                if self._ai_timers.get(self.game_id) is not ai_timer:
+                    self._cancel_scheduled_ai()
+
+        raise AotError("concurrent_play")
 
     async def _disconnect_player_from_game(self):
-        async with self._load_game() as game:
+        async with self._load_game() as (game, log):
             player = game.get_player_by_id(self.id)
             self.logger.debug(
                 f"Game n°{self._game_id}: player n°{self.id} ({player.name}) was "
@@ -131,8 +189,7 @@ class Api:
                 self._append_to_clients_pending_disconnection()
                 raise MustNotSaveGameError
 
-            player.is_connected = False
-            game.pass_turn()
+            log.play(EventTypes.DISCONNECTION, player.id)
             response = WsResponse(send_to_all=[get_global_game_message(game)])
             if game.active_player.is_ai:
                 response = response.add_future_message(self._schedule_play_ai(game))
@@ -155,14 +212,49 @@ class Api:
         if not await self._has_game_started:
             return await reconnect_to_lobby(message["request"], self._cache)
 
-        async with self._load_game(must_save=False) as game:
-            self._append_to_clients_pending_reconnection()
-            response = reconnect_to_game(message["request"], game)
+        return await self._run_for_game(self.game_id, self._reconnect_to_game, message)
+
+    async def _reconnect_to_game(self, message):
+        request = message["request"]
+        # The player is reconnected to the game before any other request is played on it.
+        self._append_to_clients_pending_reconnection()
+        can_resume_game = self._can_resume_game(request)
+        if can_resume_game:
+            # The game doesn't need to be loaded if it didn't change since the last states sent to
+            # the player. If an AI must play, it was scheduled when these states were sent.
+            response = resume_game_from_updates(request, self._game_updates)
+            if response is not None:
+                self._resume_from_game_version(request["game_version"])
+                return response
+
+        async with self._load_game(must_save=False) as (game, log):
+            if can_resume_game:
+                self._resume_from_game_version(request["game_version"])
+                response = resume_game(request, game)
+            else:
+                response = reconnect_to_game(request, game)
             if game.active_player.is_ai and self._game_id not in self._pending_ai:
                 response = response.add_future_message(self._schedule_play_ai(game))
 
         return response
 
+    def _resume_from_game_version(self, version):
+        # The player will only receive the changes since the last version it received.
+        self._game_version = version
+        self._receives_game_patches = True
+
+    def _can_resume_game(self, request):
+        """Whether the version of the game the player last received is still known.
+
+        If too many versions were played since, the full state of the game is sent instead.
+        """
+        version = request.get("game_version")
+        return (
+            version is not None
+            and self._game_updates is not None
+            and self._game_updates.has_version(self.game_id, version)
+        )
+
     def _append_to_clients_pending_reconnection(self):
         self._clients_pending_reconnection_from_game.add(self.id)
         self._clients_pending_disconnection_from_game.discard(self.id)
@@ -175,24 +267,43 @@ class Api:
         request["player_id"] = self.id
         request["index_first_player"] = self.INDEX_FIRST_PLAYER
 
-        response = await self._lobby_request_types_to_views[request_type](request, self._cache)
+        if request_type == RequestTypes.CREATE_LOBBY:
+            response = await create_lobby(request, self._cache)
+        else:
+            response = await self._run_for_game(
+                request.get("game_id", self.game_id),
+                self._lobby_request_types_to_views[request_type],
+                request,
+                self._cache,
+            )
 
         if request_type in (RequestTypes.CREATE_LOBBY, RequestTypes.JOIN_GAME):
             # The cache was initiated with the proper game id we couldn't know before.
             # Save it now.
             self._game_id = self._cache.game_id
+            self._game_version = None
 
         return response
 
     async def _process_play_request(self, request_type, message):
-        async with self._load_game() as game:
+        return await self._run_for_game(
+            self.game_id, self._retry_on_conflict, self._play_request, request_type, message
+        )
+
+    async def _play_request(self, request_type, message):
+        async with self._load_game() as (game, log):
             if self._is_this_player_turn(game):
-                response = self._play_game_requests_to_views[request_type](message["request"], game)
+                if request_type in LOGGED_REQUEST_TYPES:
+                    response = log.play_request(request_type, message["request"])
+                else:
+                    response = self._play_game_requests_to_views[request_type](
+                        message["request"], game
+                    )
                 if game.active_player.is_ai:
                     response = response.add_future_message(self._schedule_play_ai(game))
                 return response
             elif game.active_player.is_ai:
-                return self._play_ai(game)
+                return self._play_ai(game, log)
             else:
                 # We have a not_your_turn error that is displayed sometimes
                 # without an action for the player. We add logs to understand why.
@@ -222,7 +333,7 @@ class Api:
         self.logger.debug(f"Game n°{self._game_id}: schedule play for AI in {self._ai_delay}")
         self._pending_ai.add(self.game_id)
         future_message = asyncio.Future(loop=self._loop)
-        self._loop.call_later(
+        self._ai_timers[self.game_id] = self._loop.call_later(
             self._ai_delay,
             lambda: asyncio.ensure_future(
                 self._play_scheduled_ai(future_message),
@@ -231,19 +342,26 @@ class Api:
         )
         return future_message
 
+    def _cancel_scheduled_ai(self):
+        self._pending_ai.discard(self.game_id)
+        ai_timer = self._ai_timers.pop(self.game_id, None)
+        if ai_timer is not None:
+            ai_timer.cancel()
+
     async def _play_scheduled_ai(self, future: asyncio.Future):
         response = await self._process_play_request(request_type="ai", message={})
         future.set_result(response)
 
-    def _play_ai(self, game):
+    def _play_ai(self, game, log):
         self._pending_ai.discard(self._game_id)
+        self._ai_timers.pop(self._game_id, None)
         if not game.active_player.is_ai:
             self.logger.debug("It is not an AI turn, cannot play AI.")
             return
 
         self.logger.debug("Playing AI.")
         this_player = game.active_player
-        game.play_auto()
+        log.play(EventTypes.AI_MOVE)
         future_message = None
         if game.active_player.is_ai:
             future_message = self._schedule_play_ai(game)
@@ -257,15 +375,36 @@ class Api:
 
     @asynccontextmanager
     async def _load_game(self, must_save=True):
-        game = await self._cache.get_game()
+        if self._game_actors is None:
+            game_loader = self._load_game_from_cache(must_save)
+        else:
+            # The actor keeps the game in memory and saves it itself.
+            game_loader = self._game_actors.get(self.game_id).load_game()
+
+        disconnected_player_ids = reconnected_player_ids = ()
+        async with game_loader as (game, log):
+            # The request is played with the players connected as they are now.
+            changed_player_ids = (
+                self._disconnect_pending_players(log),
+                self._reconnect_pending_players(log),
+            )
+            yield game, log
+            disconnected_player_ids, reconnected_player_ids = changed_player_ids
 
-        if game is None:
+        # The players are only removed from the pending ones once the game is saved: if another
+        # request saved it meanwhile, they are changed again when the request is played again.
+        self._clients_pending_disconnection_from_game.difference_update(disconnected_player_ids)
+        self._clients_pending_reconnection_from_game.difference_update(reconnected_player_ids)
+
+    @asynccontextmanager
+    async def _load_game_from_cache(self, must_save):
+        log = await self._cache.load_game()
+
+        if log is None:
             raise AotError("game_does_not_exist")
 
         try:
-            yield game
-            self._disconnect_pending_players(game)
-            self._reconnect_pending_players(game)
+            yield log.game, log
         except MustNotSaveGameError:
             self.logger.info("Action asked not to save the game.", exc_info=True)
         except Exception:
@@ -273,24 +412,41 @@ class Api:
             raise
         else:
             if must_save:
-                await self._cache.save_game(game)
+                await self._save_game(log)
+
+        # A game with unsaved events differs from the saved one: it must not be reused.
+        if not log.new_events:
+            self._cache.keep_live_game(log)
 
-    def _disconnect_pending_players(self, game):
-        self._change_players_connection_status(
-            game,
+    async def _save_game(self, log):
+        if not log.new_events:
+            return
+
+        in_snapshot = log.must_snapshot
+        if in_snapshot:
+            version = await self._cache.save_game_if_unchanged(log.game, log.version)
+        else:
+            version = await self._cache.append_game_events(log.new_events, log.version)
+        log.mark_saved(version, in_snapshot=in_snapshot)
+
+    def _disconnect_pending_players(self, log):
+        return self._change_players_connection_status(
+            log,
             self._clients_pending_disconnection_from_game,
             is_connected=False,
         )
 
-    def _change_players_connection_status(self, game, player_ids, is_connected):
-        while len(player_ids) > 0:
-            player_id = player_ids.pop()
-            player = game.get_player_by_id(player_id)
-            player.is_connected = is_connected
+    def _change_players_connection_status(self, log, player_ids, is_connected):
+        if len(player_ids) == 0:
+            return ()
 
-    def _reconnect_pending_players(self, game):
-        self._change_players_connection_status(
-            game,
+        changed_player_ids = list(player_ids)
+        log.play(EventTypes.CONNECTIONS_CHANGE, changed_player_ids, is_connected)
+        return changed_player_ids
+
+    def _reconnect_pending_players(self, log):
+        return self._change_players_connection_status(
+            log,
             self._clients_pending_reconnection_from_game,
             is_connected=True,
         )
@@ -307,8 +463,17 @@ class Api:
         return self._game_id
 
     @property
-    async def player_ids(self):
-        return await self._cache.get_players_ids()
+    def game_version(self):
+        return self._game_version
+
+    @game_version.setter
+    def game_version(self, version):
+        self._game_version = version
+
+    @property
+    def patches_base_version(self):
+        """Version from which the states of the game are sent as patches, None for full states."""
+        return self._game_version if self._receives_game_patches else None
 
     @property
     def _clients_pending_reconnection_from_game(self):
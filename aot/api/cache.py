@@ -17,35 +17,296 @@
 # along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
 ################################################################################
 
+import asyncio
+import json
 import pickle  # noqa: S403 (bandit: pickle security issues)
-from copy import deepcopy
 from datetime import datetime
 
 import daiquiri
-from aredis import StrictRedis as Redis
 
 from ..config import config
+from . import events, snapshot
+from .events import EventLog
+from .live_games import LiveGames
 from .security import decode, encode
-from .utils import SlotState
+from .storage import Script, create_storage
+from .utils import GameVersionConflictError, SlotState
 
 logger = daiquiri.getLogger(__name__)
 
 
+# Implementations of the scripts below for the in memory storage. They must behave like the Lua
+# versions run by redis.
+def _append_game_events(database, keys, args):
+    game_key, events_key, _ = keys
+    expected_version, ttl, *new_events = args
+    if (database.hget(game_key, "version") or b"") != expected_version:
+        return None
+    database.rpush(events_key, *new_events)
+    database.expire(events_key, ttl)
+    return database.hincrby(game_key, "version", 1)
+
+
+def _save_game(database, keys, args):
+    game_key, events_key, started_games_key = keys
+    expected_version, game, over_game_id = args
+    if (database.hget(game_key, "version") or b"") != expected_version:
+        return None
+    database.hset(game_key, "game", game)
+    database.delete(events_key)
+    if over_game_id:
+        database.hset(game_key, "over", "true")
+        database.srem(started_games_key, over_game_id)
+    return database.hincrby(game_key, "version", 1)
+
+
+def _take_next_slot(database, keys, args):
+    game_key, players_key, stats_key = keys
+    player_id, player_name, hero, ttl = (arg.decode("utf-8") for arg in args)
+    game_master_id, encoded_slots = database.hmget(game_key, "game_master", "slots")
+    if game_master_id is None or encoded_slots is None:
+        return None
+    slots = json.loads(encoded_slots)
+    slot = next((slot for slot in slots if slot["state"] == SlotState.OPEN.value), None)
+    if slot is None:
+        return None
+
+    slot.update(
+        player_id=player_id, player_name=player_name, hero=hero, state=SlotState.TAKEN.value
+    )
+    encoded_slots = _save_raw_slots(database, game_key, slots)
+    if database.zadd(players_key, slot["index"], player_id):
+        database.hincrby(stats_key, "number_players", 1)
+    database.expire(players_key, ttl)
+    return [game_master_id, slot["index"], encoded_slots]
+
+
+def _free_slot(database, keys, args):
+    (game_key,) = keys
+    player_id = args[0].decode("utf-8")
+    encoded_slots = database.hget(game_key, "slots")
+    if encoded_slots is None:
+        return None
+    slots = json.loads(encoded_slots)
+    slot = next((slot for slot in slots if slot.get("player_id") == player_id), None)
+    if slot is None:
+        return None
+
+    del slot["player_id"]
+    slot.update(player_name="", state=SlotState.OPEN.value)
+    return _save_raw_slots(database, game_key, slots)
+
+
+def _update_slot(database, keys, args):
+    (game_key,) = keys
+    player_id = args[0].decode("utf-8")
+    game_master_id, encoded_slots = database.hmget(game_key, "game_master", "slots")
+    if encoded_slots is None:
+        return None
+    slots = json.loads(encoded_slots)
+    slot = json.loads(args[1])
+    if not 0 <= slot["index"] < len(slots):
+        return None
+
+    current_slot = slots[slot["index"]]
+    if current_slot["state"] == SlotState.OPEN.value and slot["state"] == SlotState.TAKEN.value:
+        slot["player_id"] = player_id
+    elif current_slot.get("player_id") == player_id:
+        if slot["state"] != SlotState.OPEN.value:
+            slot["player_id"] = player_id
+        elif "player_id" in slot:
+            del slot["player_id"]
+            slot["player_name"] = ""
+    elif (
+        game_master_id is not None
+        and game_master_id.decode("utf-8") == player_id
+        and current_slot["state"] != SlotState.TAKEN.value
+    ):
+        if slot["state"] in (SlotState.CLOSED.value, SlotState.OPEN.value):
+            slot.pop("player_name", None)
+    else:
+        return encoded_slots
+
+    slots[slot["index"]] = slot
+    return _save_raw_slots(database, game_key, slots)
+
+
+def _save_raw_slots(database, game_key, slots):
+    encoded_slots = json.dumps(slots, separators=(",", ":")).encode("utf-8")
+    database.hset(game_key, "slots", encoded_slots)
+    return encoded_slots
+
+
+# The scripts below save a game only if its version is still the expected one, ie if no other
+# request saved it since it was loaded. They return the new version of the game or nil if the
+# version changed.
+# KEYS: the key of the game, the key of its events, the key of the started games.
+# ARGV: the expected version (empty if the game has no version yet), the TTL of the events, the
+# events to append.
+_APPEND_GAME_EVENTS_SCRIPT = Script(
+    """
+    if (redis.call("HGET", KEYS[1], "version") or "") ~= ARGV[1] then
+        return nil
+    end
+    redis.call("RPUSH", KEYS[2], unpack(ARGV, 3))
+    redis.call("EXPIRE", KEYS[2], ARGV[2])
+    return redis.call("HINCRBY", KEYS[1], "version", 1)
+    """,
+    _append_game_events,
+)
+# A game which is over is removed from the started games.
+# KEYS: the key of the game, the key of its events, the key of the started games.
+# ARGV: the expected version (empty if the game has no version yet), the snapshot of the game,
+# the id of the game if it is over (empty otherwise).
+_SAVE_GAME_SCRIPT = Script(
+    """
+    if (redis.call("HGET", KEYS[1], "version") or "") ~= ARGV[1] then
+        return nil
+    end
+    redis.call("HSET", KEYS[1], "game", ARGV[2])
+    redis.call("DEL", KEYS[2])
+    if ARGV[3] ~= "" then
+        redis.call("HSET", KEYS[1], "over", "true")
+        redis.call("SREM", KEYS[3], ARGV[3])
+    end
+    return redis.call("HINCRBY", KEYS[1], "version", 1)
+    """,
+    _save_game,
+)
+# The scripts below update the slots of a lobby atomically. The slots are stored as a JSON list in
+# the hash of the game. They return nil if the lobby or the slot doesn't exist.
+# KEYS: the key of the game, the key of its players, the key of the statistics.
+# ARGV: the id of the player, its name, its hero, the TTL of the players.
+# Returns: the id of the game master, the index of the slot given to the player and the slots.
+_TAKE_NEXT_SLOT_SCRIPT = Script(
+    """
+    local lobby = redis.call("HMGET", KEYS[1], "game_master", "slots")
+    if not lobby[1] or not lobby[2] then
+        return nil
+    end
+    local slots = cjson.decode(lobby[2])
+    for _, slot in ipairs(slots) do
+        if slot.state == "OPEN" then
+            slot.player_id = ARGV[1]
+            slot.player_name = ARGV[2]
+            slot.hero = ARGV[3]
+            slot.state = "TAKEN"
+            local encoded_slots = cjson.encode(slots)
+            redis.call("HSET", KEYS[1], "slots", encoded_slots)
+            if redis.call("ZADD", KEYS[2], slot.index, ARGV[1]) == 1 then
+                redis.call("HINCRBY", KEYS[3], "number_players", 1)
+            end
+            redis.call("EXPIRE", KEYS[2], ARGV[4])
+            return {lobby[1], slot.index, encoded_slots}
+        end
+    end
+    return nil
+    """,
+    _take_next_slot,
+)
+# KEYS: the key of the game.
+# ARGV: the id of the player.
+# Returns: the slots.
+_FREE_SLOT_SCRIPT = Script(
+    """
+    local encoded_slots = redis.call("HGET", KEYS[1], "slots")
+    if not encoded_slots then
+        return nil
+    end
+    local slots = cjson.decode(encoded_slots)
+    for _, slot in ipairs(slots) do
+        if slot.player_id == ARGV[1] then
+            slot.player_id = nil
+            slot.player_name = ""
+            slot.state = "OPEN"
+            encoded_slots = cjson.encode(slots)
+            redis.call("HSET", KEYS[1], "slots", encoded_slots)
+            return encoded_slots
+        end
+    end
+    return nil
+    """,
+    _free_slot,
+)
+# The slot is only updated if the player is allowed to: a player can take an opened slot and
+# update its own slot, the game master can update the slots not taken by a player.
+# KEYS: the key of the game.
+# ARGV: the id of the player, the new slot.
+# Returns: the slots.
+_UPDATE_SLOT_SCRIPT = Script(
+    """
+    local lobby = redis.call("HMGET", KEYS[1], "game_master", "slots")
+    if not lobby[2] then
+        return nil
+    end
+    local slots = cjson.decode(lobby[2])
+    local slot = cjson.decode(ARGV[2])
+    local current_slot = slots[slot.index + 1]
+    if not current_slot then
+        return nil
+    end
+
+    if current_slot.state == "OPEN" and slot.state == "TAKEN" then
+        slot.player_id = ARGV[1]
+    elseif current_slot.player_id == ARGV[1] then
+        -- If new value is OPEN, we are freeing the slot and mustn't add the player id.
+        if slot.state ~= "OPEN" then
+            slot.player_id = ARGV[1]
+        elseif slot.player_id ~= nil then
+            slot.player_id = nil
+            slot.player_name = ""
+        end
+    elseif lobby[1] == ARGV[1] and current_slot.state ~= "TAKEN" then
+        -- If we are closing the slot, we remove the name of the previous player.
+        if slot.state == "CLOSED" or slot.state == "OPEN" then
+            slot.player_name = nil
+        end
+    else
+        return lobby[2]
+    end
+
+    slots[slot.index + 1] = slot
+    local encoded_slots = cjson.encode(slots)
+    redis.call("HSET", KEYS[1], "slots", encoded_slots)
+    return encoded_slots
+    """,
+    _update_slot,
+)
+
+
 class Cache:
     GAME_KEY_TEMPLATE = "game:{}"
     PLAYERS_KEY_TEMPLATE = "players:{}"
+    #: Key of the slots of the lobbies created before they were stored in the hash of the game.
     SLOTS_KEY_TEMPLATE = "slots:{}"
+    EVENTS_KEY_TEMPLATE = "events:{}"
+    #: Ids of the games in the cache and of the games which are started and not over yet.
+    GAMES_KEY = "stats:games"
+    STARTED_GAMES_KEY = "stats:started_games"
+    #: Counters used to compute statistics without scanning the games.
+    STATS_KEY = "stats"
 
     GAME_MASTER_KEY = "game_master"
     GAME_KEY = "game"
+    NUMBER_PLAYERS_KEY = "number_players"
+    OVER_KEY = "over"
+    SLOTS_KEY = "slots"
     STARTED_KEY = "started"
     TEST_KEY = "test"
+    VERSION_KEY = "version"
 
     GAME_STARTED = b"true"
     GAME_NOT_STARTED = b"false"
+    GAME_OVER = b"true"
     #: Time in seconds after which the game is deleted (48h).
     TTL = 2 * 24 * 60 * 60
     _cache = None
+    _live_games = None
+    _stats_reconciler = None
+    # Number of games saved by this worker and number of saves rejected because of a concurrent
+    # save.
+    _number_game_saves = 0
+    _number_game_save_conflicts = 0
 
     # Instance variables
     _game_id = ""
@@ -53,24 +314,23 @@ class Cache:
 
     @classmethod
     def create_new_instance(cls, loop=None):
-        cls._cache = cls._get_redis_instance(new=True, loop=loop)
+        cls._cache = cls._get_storage_instance(new=True, loop=loop)
 
     @classmethod
-    def _get_redis_instance(cls, new=False, loop=None):
+    def _get_storage_instance(cls, new=False, loop=None):
         if new:
-            logger.info(f'Connecting to redis with connection infos: {config["cache"]}.')
-            return Redis(
-                host=config["cache"]["host"],
-                port=config["cache"]["port"],
-                connect_timeout=config["cache"]["timeout"],
-                stream_timeout=config["cache"]["timeout"],
-                loop=loop,
-            )
+            return create_storage(loop=loop)
         else:  # pragma: no cover
             if cls._cache is None:
-                cls._cache = cls._get_redis_instance(new=True)
+                cls._cache = cls._get_storage_instance(new=True)
             return cls._cache
 
+    @classmethod
+    def _get_live_games(cls):
+        if cls._live_games is None:
+            cls._live_games = LiveGames(config["cache"]["live_games"])
+        return cls._live_games
+
     @classmethod
     def loads(cls, data):
         pickle_data = decode(data)
@@ -81,37 +341,127 @@ class Cache:
         pickle_data = pickle.dumps(data)  # noqa: S301 (pickle usage)
         return encode(pickle_data)
 
+    @classmethod
+    def loads_slots(cls, data):
+        # Slots are plain JSON so they can be updated by the scripts: unlike pickles, loading them
+        # cannot execute anything and they don't need to be signed.
+        return [{**slot, "state": SlotState(slot["state"])} for slot in json.loads(data)]
+
+    @classmethod
+    def dumps_slots(cls, slots):
+        return json.dumps(slots, default=cls._encode_slot_state, separators=(",", ":"))
+
+    @staticmethod
+    def _encode_slot_state(state):
+        if isinstance(state, SlotState):
+            return state.value
+        raise TypeError(f"{state!r} is not JSON serializable")
+
+    @classmethod
+    def loads_game(cls, data):
+        game_data = decode(data)
+        # Games saved before snapshots were introduced are pickled. They start with the PROTO
+        # opcode, which is not a valid snapshot version.
+        if game_data[:1] == pickle.PROTO:
+            return pickle.loads(game_data)  # noqa: S301 (pickle usage)
+        return snapshot.loads(game_data)
+
+    @classmethod
+    def dumps_game(cls, game):
+        return encode(snapshot.dumps(game))
+
     @classmethod
     async def clean_for_game(cls, game_id):
-        redis = cls._get_redis_instance()
-        await redis.delete(cls.SLOTS_KEY_TEMPLATE.format(game_id))
-        await redis.delete(cls.PLAYERS_KEY_TEMPLATE.format(game_id))
-        await redis.delete(cls.GAME_KEY_TEMPLATE.format(game_id))
+        storage = cls._get_storage_instance()
+        number_players = await storage.zcard(cls.PLAYERS_KEY_TEMPLATE.format(game_id))
+        pipeline = await storage.pipeline(transaction=True)
+        await pipeline.delete(cls.SLOTS_KEY_TEMPLATE.format(game_id))
+        await pipeline.delete(cls.PLAYERS_KEY_TEMPLATE.format(game_id))
+        await pipeline.delete(cls.GAME_KEY_TEMPLATE.format(game_id))
+        await pipeline.delete(cls.EVENTS_KEY_TEMPLATE.format(game_id))
+        await pipeline.srem(cls.GAMES_KEY, game_id)
+        await pipeline.srem(cls.STARTED_GAMES_KEY, game_id)
+        await pipeline.hincrby(cls.STATS_KEY, cls.NUMBER_PLAYERS_KEY, -number_players)
+        await pipeline.execute()
+
+    @classmethod
+    async def reconcile_stats(cls):
+        """Rebuild the statistics from the games in the cache.
+
+        The statistics are updated as games are created, started and finished but not when they
+        expire. Games created or joined while this runs may be missed until the next run.
+        """
+        storage = cls._get_storage_instance()
+        game_ids = [
+            key.decode("utf-8").split(":", 1)[1]
+            async for key in storage.scan_iter(match=cls.GAME_KEY_TEMPLATE.format("*"))
+        ]
+        pipeline = await storage.pipeline(transaction=False)
+        for game_id in game_ids:
+            await pipeline.hmget(
+                cls.GAME_KEY_TEMPLATE.format(game_id), cls.STARTED_KEY, cls.OVER_KEY
+            )
+            await pipeline.zcard(cls.PLAYERS_KEY_TEMPLATE.format(game_id))
+        results = await pipeline.execute() if game_ids else []
+
+        started_game_ids = [
+            game_id
+            for game_id, (started, over) in zip(game_ids, results[::2])
+            if started == cls.GAME_STARTED and over != cls.GAME_OVER
+        ]
+        pipeline = await storage.pipeline(transaction=True)
+        await pipeline.delete(cls.GAMES_KEY)
+        await pipeline.delete(cls.STARTED_GAMES_KEY)
+        if game_ids:
+            await pipeline.sadd(cls.GAMES_KEY, *game_ids)
+        if started_game_ids:
+            await pipeline.sadd(cls.STARTED_GAMES_KEY, *started_game_ids)
+        await pipeline.hset(cls.STATS_KEY, cls.NUMBER_PLAYERS_KEY, sum(results[1::2]))
+        await pipeline.execute()
+
+    @classmethod
+    def start_stats_reconciler(cls, loop, interval):
+        """Reconcile the statistics every ``interval`` seconds."""
+        cls._stats_reconciler = loop.create_task(cls._reconcile_stats_periodically(interval))
+
+    @classmethod
+    def stop_stats_reconciler(cls):
+        if cls._stats_reconciler is not None:
+            cls._stats_reconciler.cancel()
+            cls._stats_reconciler = None
+
+    @classmethod
+    async def _reconcile_stats_periodically(cls, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await cls.reconcile_stats()
+            except Exception:
+                logger.exception("Failed to reconcile the statistics of the cache.")
 
     def __init__(self, loop=None, new=False):
-        self._cache = self._get_redis_instance(loop=loop)
+        self._cache = self._get_storage_instance(loop=loop)
+        self._live_games = self._get_live_games()
         self.TTL = config["cache"]["ttl"]
 
     async def test(self):
         await self._cache.set(self.TEST_KEY, str(datetime.now()))
 
     async def info(self):
-        infos = {}
-        for key in await self._cache.keys():
-            key = key.decode("utf-8")
-            if key.startswith("game:"):
-                _, game_id = key.split(":")
-                self._game_id = game_id
-                infos["number_games"] = infos.get("number_games", 0) + 1
-                infos["average_number_players"] = infos.get("average_number_players", 0) + len(
-                    await self.get_players_ids(game_id)
-                )
-                if self.has_game_started:
-                    infos["number_started_games"] = infos.get("number_started_games", 0) + 1
-
-        infos["average_number_players"] = infos.get("average_number_players", 0) / infos.get(
-            "number_games", 1
-        )
+        pipeline = await self._cache.pipeline(transaction=False)
+        await pipeline.scard(self.GAMES_KEY)
+        await pipeline.scard(self.STARTED_GAMES_KEY)
+        await pipeline.hget(self.STATS_KEY, self.NUMBER_PLAYERS_KEY)
+        number_games, number_started_games, number_players = await pipeline.execute()
+
+        infos = {
+            "number_games": number_games,
+            "number_started_games": number_started_games,
+            "average_number_players": int(number_players or 0) / (number_games or 1),
+        }
+        infos.update(self._live_games.stats)
+        infos["game_saves"] = self._number_game_saves
+        infos["game_save_conflicts"] = self._number_game_save_conflicts
         return infos
 
     def init(self, game_id=None, player_id=None):
@@ -124,76 +474,65 @@ class Cache:
         ids = await self._cache.zrange(self.PLAYERS_KEY_TEMPLATE.format(game_id), 0, -1)
         return [id.decode("utf-8") for id in ids]
 
-    async def game_exists(self, game_id):
-        return (
-            await self._cache.hget(self.GAME_KEY_TEMPLATE.format(game_id), self.GAME_MASTER_KEY)
-            is not None
-        )
-
-    async def has_opened_slots(self, game_id):
-        return len(await self._get_opened_slots(game_id)) > 0
-
-    async def _get_opened_slots(self, game_id):
-        slots = await self.get_slots(game_id=game_id)
-        return [slot for slot in slots if slot["state"] == SlotState.OPEN]
-
     async def get_slots(self, game_id=None, include_player_id=True):
-        if game_id is None:
-            game_id = self._game_id
-        raw_slots = await self._cache.lrange(self.SLOTS_KEY_TEMPLATE.format(game_id), 0, -1)
-        slots = [self.loads(slot) for slot in raw_slots]
+        _, slots = await self.get_lobby(game_id)
         if not include_player_id:
-            slots = self._remove_player_id(slots)
+            slots = self.remove_player_id(slots)
         return slots
 
-    def _remove_player_id(self, slots):
-        corrected_slots = []
-        for slot in slots:
-            if "player_id" in slot:
-                del slot["player_id"]
-            corrected_slots.append(slot)
-        return corrected_slots
+    @staticmethod
+    def remove_player_id(slots):
+        """Copy the slots without the ids of the players: they must not be sent to the players."""
+        return [{key: value for key, value in slot.items() if key != "player_id"} for slot in slots]
 
     async def is_member_game(self, game_id, player_id):
         return player_id in await self.get_players_ids(game_id)
 
     async def create_new_game(self, test=False, nb_slots=4):
-        await self._cache.hset(
-            self.GAME_KEY_TEMPLATE.format(self._game_id), self.GAME_MASTER_KEY, self._player_id
-        )
-        await self._cache.hset(
-            self.GAME_KEY_TEMPLATE.format(self._game_id), self.STARTED_KEY, self.GAME_NOT_STARTED
-        )
-        await self._cache.hset(self.GAME_KEY_TEMPLATE.format(self._game_id), "test", test)
-        await self._init_slots(nb_slots)
-        await self._cache.expire(self.SLOTS_KEY_TEMPLATE.format(self._game_id), self.TTL)
-        await self._cache.expire(self.GAME_KEY_TEMPLATE.format(self._game_id), self.TTL)
-
-    async def _init_slots(self, nb_slots):
-        slot = {
-            "player_name": "",
-            "player_id": self._player_id,
-            "index": 0,
-            "state": SlotState.OPEN,
-        }
-        await self._add_slot(slot)
-
-        slot["player_id"] = ""
-        index = 0
-        while not await self._max_number_slots_reached(nb_slots):
-            index += 1
-            slot["index"] = index
-            await self._add_slot(slot)
-
-    async def _add_slot(self, slot):
-        slot = deepcopy(slot)
-        await self._cache.rpush(
-            self.SLOTS_KEY_TEMPLATE.format(self._game_id),
-            self.dumps(slot),
+        """Create the lobby of the game in one round trip."""
+        slots = [
+            {"player_name": "", "player_id": "", "index": index, "state": SlotState.OPEN}
+            for index in range(nb_slots)
+        ]
+        slots[0]["player_id"] = self._player_id
+
+        pipeline = await self._cache.pipeline(transaction=True)
+        await pipeline.hmset(
+            self.GAME_KEY_TEMPLATE.format(self._game_id),
+            {
+                self.GAME_MASTER_KEY: self._player_id,
+                self.STARTED_KEY: self.GAME_NOT_STARTED,
+                self.SLOTS_KEY: self.dumps_slots(slots),
+                "test": test,
+            },
         )
+        await pipeline.expire(self.GAME_KEY_TEMPLATE.format(self._game_id), self.TTL)
+        await pipeline.sadd(self.GAMES_KEY, self._game_id)
+        await pipeline.execute()
 
-    async def _max_number_slots_reached(self, nb_slots):
-        return len(await self.get_slots()) == nb_slots
+    async def get_lobby(self, game_id=None):
+        """Get the id of the game master and the slots of a game.
+
+        Returns:
+            tuple: the id of the game master (``None`` if the game doesn't exist) and the list of
+            slots.
+        """
+        if game_id is None:
+            game_id = self._game_id
+        game_master_id, raw_slots = await self._cache.hmget(
+            self.GAME_KEY_TEMPLATE.format(game_id), self.GAME_MASTER_KEY, self.SLOTS_KEY
+        )
+        if game_master_id is None:
+            return None, []
+        elif raw_slots is None:
+            slots = await self._get_legacy_slots(game_id)
+        else:
+            slots = self.loads_slots(raw_slots)
+        return game_master_id.decode("utf-8"), slots
+
+    async def _get_legacy_slots(self, game_id):
+        raw_slots = await self._cache.lrange(self.SLOTS_KEY_TEMPLATE.format(game_id), 0, -1)
+        return [self.loads(slot) for slot in raw_slots]
 
     async def is_test(self):
         value = await self._cache.hget(self.GAME_KEY_TEMPLATE.format(self._game_id), "test")
@@ -205,15 +544,59 @@ class Cache:
             self.GAME_KEY,
         )
         if game_data:
-            return self.loads(game_data)
-
-    async def save_session(self, player_index):
-        await self._cache.zadd(
-            self.PLAYERS_KEY_TEMPLATE.format(self._game_id),
-            player_index,
-            self._player_id,
+            return self.loads_game(game_data)
+
+    async def load_game(self):
+        """Load the game with the events played on it since its last snapshot.
+
+        If the game didn't change since this worker saved or loaded it, it is reused from memory
+        instead of being deserialized.
+
+        Returns:
+            EventLog: the event log of the game or ``None`` if the game doesn't exist.
+        """
+        # The version must be read first: if the game changes while we load it, we will load a
+        # more recent game than its version and we will just miss the next time.
+        version = await self.get_game_version()
+        log = self._live_games.take(self._game_id, version)
+        if log is not None:
+            return log
+
+        game = await self.get_game()
+        if game is None:
+            return None
+        return EventLog.from_events(game, await self.get_game_events(), version=version)
+
+    def keep_live_game(self, log):
+        """Keep the game in memory to reuse it on the next load."""
+        self._live_games.put(self._game_id, log)
+
+    async def get_game_version(self):
+        version = await self._cache.hget(
+            self.GAME_KEY_TEMPLATE.format(self._game_id), self.VERSION_KEY
+        )
+        return None if version is None else int(version)
+
+    async def get_game_events(self):
+        """Get the events played on the game since its last snapshot."""
+        raw_events = await self._cache.lrange(self.EVENTS_KEY_TEMPLATE.format(self._game_id), 0, -1)
+        return [events.loads(decode(raw_event)) for raw_event in raw_events]
+
+    async def append_game_events(self, new_events, expected_version):
+        """Append events to the log of the game instead of saving the whole game.
+
+        Raises:
+            GameVersionConflictError: if the game is not at the expected version anymore.
+
+        Returns:
+            int: the new version of the game.
+        """
+        return await self._save_if_unchanged(
+            _APPEND_GAME_EVENTS_SCRIPT,
+            expected_version,
+            self.TTL,
+            *(encode(events.dumps(event)) for event in new_events),
         )
-        await self._cache.expire(self.PLAYERS_KEY_TEMPLATE.format(self._game_id), self.TTL)
 
     async def get_player_index(self):
         slot = [
@@ -237,59 +620,53 @@ class Cache:
         slots = await self.get_slots()
         return [slot for slot in slots if slot["state"] in (SlotState.TAKEN, SlotState.AI)]
 
-    async def affect_next_slot(self, player_name, hero):
-        opened_slots = await self._get_opened_slots(self._game_id)
-        next_available_slot = opened_slots[0]
-        next_available_slot["player_id"] = self._player_id
-        next_available_slot["state"] = SlotState.TAKEN
-        next_available_slot["player_name"] = player_name
-        next_available_slot["hero"] = hero
-        await self.update_slot(next_available_slot)
-
-        return next_available_slot["index"]
+    async def take_next_slot(self, player_name, hero):
+        """Give the first opened slot to the player and save its session.
+
+        Returns:
+            tuple: the id of the game master, the index of the slot of the player and the slots
+            of the game or ``None`` if the game doesn't exist or has no opened slot.
+        """
+        result = await self._cache.run_script(
+            _TAKE_NEXT_SLOT_SCRIPT,
+            keys=[
+                self.GAME_KEY_TEMPLATE.format(self._game_id),
+                self.PLAYERS_KEY_TEMPLATE.format(self._game_id),
+                self.STATS_KEY,
+            ],
+            args=[self._player_id, player_name, hero, self.TTL],
+        )
+        if result is None:
+            return None
+
+        game_master_id, index, raw_slots = result
+        return game_master_id.decode("utf-8"), index, self.loads_slots(raw_slots)
+
+    async def free_slot(self):
+        """Open the slot of the player.
+
+        Returns:
+            list: the slots of the game or ``None`` if the player has no slot.
+        """
+        raw_slots = await self._cache.run_script(
+            _FREE_SLOT_SCRIPT,
+            keys=[self.GAME_KEY_TEMPLATE.format(self._game_id)],
+            args=[self._player_id],
+        )
+        return None if raw_slots is None else self.loads_slots(raw_slots)
 
     async def update_slot(self, slot):
-        current_slot = await self.get_slot(slot["index"])
-        if current_slot["state"] == SlotState.OPEN and slot["state"] == SlotState.TAKEN:
-            slot["player_id"] = self._player_id
-            await self._save_slot(slot)
-        elif current_slot.get("player_id", "") == self._player_id:
-            # If new value is OPEN, we are freeing the slot and mustn't add the player id.
-            if slot["state"] != SlotState.OPEN:
-                slot["player_id"] = self._player_id
-            elif "player_id" in slot:
-                del slot["player_id"]
-                slot["player_name"] = ""
-            await self._save_slot(slot)
-        elif await self.is_game_master() and current_slot["state"] != SlotState.TAKEN:
-            # If we are closing the slot, we remove the name of the previous player.
-            if slot["state"] in (SlotState.CLOSED, SlotState.OPEN) and "player_name" in slot:
-                del slot["player_name"]
-
-            await self._save_slot(slot)
-
-    async def _save_slot(self, slot):
-        await self._cache.lset(
-            self.SLOTS_KEY_TEMPLATE.format(self._game_id), slot["index"], self.dumps(slot)
+        """Update the slot if the player is allowed to.
+
+        Returns:
+            list: the slots of the game or ``None`` if the slot doesn't exist.
+        """
+        raw_slots = await self._cache.run_script(
+            _UPDATE_SLOT_SCRIPT,
+            keys=[self.GAME_KEY_TEMPLATE.format(self._game_id)],
+            args=[self._player_id, self.dumps_slots(slot)],
         )
-
-    async def slot_exists(self, slot):
-        return await self._get_raw_slot(slot["index"], self._game_id) is not None
-
-    async def _get_raw_slot(self, index, game_id):
-        # This method is used in class methods, therefore, we must rely on
-        # _get_redis_instance to get the proper cache object
-        cache = self._get_redis_instance()
-        return await cache.lindex(self.SLOTS_KEY_TEMPLATE.format(game_id), index)
-
-    @classmethod
-    async def get_slot_from_game_id(cls, index, game_id):
-        data = await cls._get_raw_slot(cls, index, game_id)
-        return cls.loads(data)
-
-    async def get_slot(self, index):
-        data = await self._get_raw_slot(index, self._game_id)
-        return self.loads(data)
+        return None if raw_slots is None else self.loads_slots(raw_slots)
 
     async def has_game_started(self):
         game_started = await self._cache.hget(
@@ -299,18 +676,67 @@ class Cache:
         return game_started == self.GAME_STARTED
 
     async def game_has_started(self):
-        await self._cache.hset(
+        pipeline = await self._cache.pipeline(transaction=True)
+        await pipeline.hset(
             self.GAME_KEY_TEMPLATE.format(self._game_id),
             self.STARTED_KEY,
             self.GAME_STARTED,
         )
+        await pipeline.sadd(self.STARTED_GAMES_KEY, self._game_id)
+        await pipeline.execute()
+
+    async def save_game_if_unchanged(self, game, expected_version):
+        """Save a snapshot of the game if it is still at the expected version.
+
+        Raises:
+            GameVersionConflictError: if the game is not at the expected version anymore.
+
+        Returns:
+            int: the new version of the game.
+        """
+        return await self._save_if_unchanged(
+            _SAVE_GAME_SCRIPT,
+            expected_version,
+            self.dumps_game(game),
+            self._game_id if game.is_over else "",
+        )
+
+    async def _save_if_unchanged(self, script, expected_version, *args):
+        version = await self._cache.run_script(
+            script,
+            keys=[
+                self.GAME_KEY_TEMPLATE.format(self._game_id),
+                self.EVENTS_KEY_TEMPLATE.format(self._game_id),
+                self.STARTED_GAMES_KEY,
+            ],
+            args=["" if expected_version is None else str(expected_version), *args],
+        )
+        if version is None:
+            type(self)._number_game_save_conflicts += 1
+            raise GameVersionConflictError
+
+        type(self)._number_game_saves += 1
+        return version
 
     async def save_game(self, game):
-        await self._cache.hset(
+        """Save a snapshot of the game whatever its current version, eg when it is created.
+
+        The events played since the previous snapshot are part of it: they are deleted in the
+        same transaction.
+
+        Returns:
+            int: the new version of the game.
+        """
+        pipeline = await self._cache.pipeline(transaction=True)
+        await pipeline.hset(
             self.GAME_KEY_TEMPLATE.format(self._game_id),
             self.GAME_KEY,
-            self.dumps(game),
+            self.dumps_game(game),
         )
+        await pipeline.delete(self.EVENTS_KEY_TEMPLATE.format(self._game_id))
+        await pipeline.hincrby(self.GAME_KEY_TEMPLATE.format(self._game_id), self.VERSION_KEY, 1)
+        *_, version = await pipeline.execute()
+        return version
 
     @property
     def game_id(self):
@@ -0,0 +1,205 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+"""Event log of games.
+
+Instead of saving the whole game after each action, the validated commands that changed it are
+appended to the event log of the game and a snapshot is only saved from time to time (see
+:meth:`EventLog.must_snapshot`). A game is loaded from its last snapshot on which the events
+appended since are replayed.
+
+For a replay to give the same game, each event is applied with the time and the random seed it
+was first played with (see :func:`aot.utils.replayable`).
+"""
+
+import dataclasses
+import random
+from enum import Enum
+from typing import List, Tuple
+
+from ..utils import get_time, replayable
+from . import snapshot
+from .utils import RequestTypes
+from .views import play_action, play_card, play_trump
+
+#: Number of events after which a new snapshot of the game is saved.
+SNAPSHOT_INTERVAL = 10
+
+
+class EventTypes(Enum):
+    PLAY_REQUEST = 0
+    AI_MOVE = 1
+    DISCONNECTION = 2
+    CONNECTIONS_CHANGE = 3
+
+
+@dataclasses.dataclass(frozen=True)
+class Event:
+    type: EventTypes
+    payload: Tuple
+    time: int
+    seed: int
+
+    @classmethod
+    def new(cls, event_type, *payload):
+        return cls(event_type, payload, get_time(), random.getrandbits(32))
+
+
+def dumps(event: Event) -> bytes:
+    return snapshot.dumps_value((event.type.value, event.payload, event.time, event.seed))
+
+
+def loads(data: bytes) -> Event:
+    event_type, payload, time, seed = snapshot.loads_value(data)
+    return Event(EventTypes(event_type), payload, time, seed)
+
+
+def apply_event(game, event: Event):
+    """Apply the event to the game and return the result of its command."""
+    with replayable(event.time, event.seed):
+        result = _commands_by_event_type[event.type](game, *event.payload)
+    game.increment_version()
+    return result
+
+
+def _play_request(game, request_type, request):
+    return _play_views_by_request_type[request_type](request, game)
+
+
+def _play_ai(game):
+    game.play_auto()
+
+
+def _disconnect_player(game, player_id):
+    player = game.get_player_by_id(player_id)
+    player.is_connected = False
+    game.pass_turn()
+
+
+def _change_connections(game, player_ids, is_connected):
+    for player_id in player_ids:
+        game.get_player_by_id(player_id).is_connected = is_connected
+
+
+# Only requests that change the game are logged: the requests to view the possible squares or
+# actions don't need to be replayed.
+_play_views_by_request_type = {
+    RequestTypes.PLAY_CARD.value: play_card,
+    RequestTypes.PLAY_TRUMP.value: play_trump,
+    RequestTypes.SPECIAL_ACTION_PLAY.value: play_action,
+}
+
+#: Types of the requests that must be played with :meth:`EventLog.play_request`.
+LOGGED_REQUEST_TYPES = frozenset(RequestTypes(value) for value in _play_views_by_request_type)
+
+_commands_by_event_type = {
+    EventTypes.PLAY_REQUEST: _play_request,
+    EventTypes.AI_MOVE: _play_ai,
+    EventTypes.DISCONNECTION: _disconnect_player,
+    EventTypes.CONNECTIONS_CHANGE: _change_connections,
+}
+
+
+class EventLog:
+    """Log of the events of a loaded game.
+
+    Events played with :meth:`play` are applied to the game and kept to be saved with the game.
+
+    Args:
+        game: the game, with the events saved since its last snapshot already applied.
+        number_saved_events: the number of events saved since the last snapshot.
+        version: the version of the game in the cache, if known.
+    """
+
+    def __init__(self, game, number_saved_events=0, version=None):
+        self._game = game
+        self._number_saved_events = number_saved_events
+        self._version = version
+        self._new_events: List[Event] = []
+        self._nb_turns = game.nb_turns
+
+    @classmethod
+    def from_events(cls, game, events, version=None):
+        """Replay the events saved since the last snapshot on the game."""
+        for event in events:
+            apply_event(game, event)
+        return cls(game, number_saved_events=len(events), version=version)
+
+    def play_request(self, request_type: RequestTypes, request):
+        if request_type not in LOGGED_REQUEST_TYPES:
+            # This request doesn't change the game, no need to log it.
+            raise ValueError(f"Request of type {request_type} cannot be logged.")
+
+        return self.play(EventTypes.PLAY_REQUEST, request_type.value, request)
+
+    def play(self, event_type: EventTypes, *payload):
+        """Apply a new event to the game and log it if the command succeeded."""
+        event = Event.new(event_type, *payload)
+        result = apply_event(self._game, event)
+        self._new_events.append(event)
+        return result
+
+    def replay_unsaved_events(self, events):
+        """Replay events played on another copy of the game which were not saved.
+
+        They are kept as new events to be saved with the game.
+        """
+        for event in events:
+            apply_event(self._game, event)
+        self._new_events.extend(events)
+
+    def mark_saved(self, version, in_snapshot):
+        """Mark the new events as saved, in a snapshot or appended to the saved events."""
+        if in_snapshot:
+            self._number_saved_events = 0
+        else:
+            self._number_saved_events += len(self._new_events)
+        self._new_events = []
+        self._nb_turns = self._game.nb_turns
+        self._version = version
+
+    @property
+    def game(self):
+        return self._game
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def number_events(self):
+        """Number of events played since the last snapshot, saved or not."""
+        return self._number_saved_events + len(self._new_events)
+
+    @property
+    def new_events(self):
+        return self._new_events
+
+    @property
+    def must_snapshot(self):
+        """Whether a snapshot of the game must be saved instead of appending the new events.
+
+        We snapshot every :data:`SNAPSHOT_INTERVAL` events, at the end of each turn of the game
+        (when all players played) and when the game is over.
+        """
+        return (
+            self.number_events >= SNAPSHOT_INTERVAL
+            or self._game.nb_turns != self._nb_turns
+            or self._game.is_over
+        )
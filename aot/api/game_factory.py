@@ -23,18 +23,11 @@ import random
 import daiquiri
 
 from aot.game.board import Board, Color
-from aot.game.cards import Card, Deck
+from aot.game.cards import Card, Deck, get_cards_specs
 from aot.game.config import GAME_CONFIGS
 from aot.game.game import Game
 from aot.game.player import Player
-from aot.game.trumps import (
-    Gauge,
-    SpecialActionsList,
-    TrumpsList,
-    create_action_from_description,
-    power_type_to_class,
-    trump_type_to_class,
-)
+from aot.game.trumps import Gauge, TrumpsList, power_type_to_class, trump_type_to_class
 
 from ..utils import remove_mappingproxies
 
@@ -71,70 +64,8 @@ def create_game_for_players(players_description, game_id, name="standard"):
 
 
 def build_cards_list(config, board):
-    colors = _get_colors(config)
-    cards = []
-    for card_description in config["movements_cards"]["cards"]:
-        cards.extend(
-            _get_cards_for_each_color(
-                board, card_description, colors, config["movements_cards"]["number_cards_per_color"]
-            ),
-        )
-    return cards
-
-
-def _get_colors(config):
-    colors = set()
-    for color_name in config["colors"]:
-        colors.add(Color[color_name])
-    return colors
-
-
-def _get_cards_for_each_color(board, card_description, colors, number_cards_per_color):
-    cards = []
-    movements_types = card_description["movements_type"]
-    number_movements = card_description["number_of_movements"]
-    name = card_description["name"]
-    description = card_description["description"]
-    cost = card_description["cost"]
-    additional_movements_color = card_description.get("additional_movements_colors", [])
-    complementary_colors = card_description.get("complementary_colors", {})
-
-    for color in sorted(colors, key=lambda _color: _color.name):
-        additional_colors = _get_additional_colors(
-            color, additional_movements_color, complementary_colors
-        )
-        for _ in range(number_cards_per_color):
-            special_actions = _get_special_actions(
-                card_description.get("special_actions", []), color
-            )
-            card = Card(
-                board,
-                number_movements=number_movements,
-                color=color,
-                complementary_colors=additional_colors,
-                name=name,
-                description=description,
-                movements_types=movements_types,
-                cost=cost,
-                special_actions=special_actions,
-            )
-            cards.append(card)
-    return cards
-
-
-def _get_special_actions(description, color):
-    actions = []
-    for action_description in description:
-        actions.append(create_action_from_description(action_description, color))
-
-    return SpecialActionsList(actions)
-
-
-def _get_additional_colors(color, additional_movements_color, complementary_colors):  # noqa: E503
-    additional_colors = set()
-    additional_colors.update([Color[col] for col in additional_movements_color])
-    additional_colors.update([Color[col] for col in complementary_colors.get(color.name, [])])
-    return additional_colors
+    # The definitions of the cards are shared by all the games, only their state is per game.
+    return [Card.from_spec(board, spec) for spec in get_cards_specs(config)]
 
 
 def _get_trumps(description):
@@ -0,0 +1,254 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+"""Patches of the global state of the games.
+
+The global state of a game is sent to all its players each time the game changes. Once a player
+acknowledged a version of the state (with an ``ACKNOWLEDGE_GAME_VERSION`` request), it receives
+the next states as JSON patches (RFC 6902) from the last version sent to it, which are much smaller
+than the state of long games. The states recently sent by this worker are kept by version
+to create these patches: a player whose version isn't known anymore receives the full state.
+
+Players reconnecting to a game give the last version they received: if it is still known, they are
+only sent the changes since this version. The last private state sent to each player is also kept,
+so the game doesn't need to be loaded to reconnect them if it didn't change since.
+"""
+
+import json
+from collections import OrderedDict
+
+from ..utils import get_time
+from .serializers import to_json
+from .utils import RequestTypes
+
+
+def make_patch(source, target, path=""):
+    """Create the JSON patch operations to transform the JSON value ``source`` into ``target``."""
+    if source == target:
+        return []
+    elif isinstance(source, dict) and isinstance(target, dict):
+        return _make_dict_patch(source, target, path)
+    elif isinstance(source, list) and isinstance(target, list):
+        return _make_list_patch(source, target, path)
+
+    return [{"op": "replace", "path": path, "value": target}]
+
+
+def _make_dict_patch(source, target, path):
+    operations = [
+        {"op": "remove", "path": _join_path(path, key)} for key in source if key not in target
+    ]
+    for key, value in target.items():
+        key_path = _join_path(path, key)
+        if key in source:
+            operations.extend(make_patch(source[key], value, key_path))
+        else:
+            operations.append({"op": "add", "path": key_path, "value": value})
+    return operations
+
+
+def _make_list_patch(source, target, path):
+    # Lists like the last actions of the game are sliding windows: elements are removed at their
+    # start and added at their end.
+    for number_removed in range(len(source)):
+        number_kept = len(source) - number_removed
+        if source[number_removed:] == target[:number_kept]:
+            return [{"op": "remove", "path": _join_path(path, 0)}] * number_removed + [
+                {"op": "add", "path": _join_path(path, "-"), "value": value}
+                for value in target[number_kept:]
+            ]
+
+    return [{"op": "replace", "path": path, "value": target}]
+
+
+def _join_path(path, key):
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+class GameState:
+    """A recorded game update, serialized as a full state."""
+
+    def __init__(self, game_id, version, message):
+        self.game_id = game_id
+        self.version = version
+        self.message = message
+        self._state = None
+
+    @property
+    def state(self):
+        # The state is only needed to create patches: it is parsed from the message when needed.
+        if self._state is None:
+            self._state = json.loads(self.message)["request"]
+        return self._state
+
+
+class PlayerState:
+    """A recorded update of the private state of a player, serialized."""
+
+    def __init__(self, game_id, player_id, version, message):
+        self.game_id = game_id
+        self.player_id = player_id
+        self.version = version
+        self.message = message
+        self.time = get_time()
+
+    def get_resumed_message(self):
+        """Get the message to send again to the player, with its elapsed time updated."""
+        request = json.loads(self.message)["request"]
+        request["elapsed_time"] += get_time() - self.time
+        return {"rt": RequestTypes.PLAYER_UPDATED, "request": request}
+
+
+class GameUpdates:
+    """Last global states of the games of this worker, to send them as patches.
+
+    Args:
+        history_size: the number of versions kept for each game. 0 disables patches.
+        max_games: the number of games for which states are kept, the least recently updated game
+            is evicted first.
+    """
+
+    def __init__(self, history_size, max_games):
+        self._history_size = history_size
+        self._max_games = max_games
+        self._games = OrderedDict()
+        # Last private state sent to each player by id, by game id.
+        self._players_states = {}
+
+    def record(self, messages, game_id=None):
+        """Serialize the game updates of the messages and keep their states.
+
+        Args:
+            messages: the messages to record.
+            game_id: the game of the player the messages are sent to. Updates of the private state
+                of a player are only recorded if it is given.
+
+        Returns:
+            The messages with the game and player updates replaced by their states, to give to
+            :meth:`get_messages`.
+        """
+        return [self._record(message, game_id) for message in messages]
+
+    def _record(self, message, game_id):
+        if not isinstance(message, dict):
+            return message
+        elif message.get("rt") == RequestTypes.GAME_UPDATED:
+            return self._record_game_state(message)
+        elif message.get("rt") == RequestTypes.PLAYER_UPDATED and game_id is not None:
+            return self._record_player_state(game_id, message)
+
+        return message
+
+    def _record_game_state(self, message):
+        request = message["request"]
+        game_state = GameState(
+            request["id"], request["version"], json.dumps(message, default=to_json)
+        )
+        if self._history_size <= 0:
+            return game_state
+
+        history = self._games.pop(game_state.game_id, None) or OrderedDict()
+        history[game_state.version] = game_state
+        while len(history) > self._history_size:
+            history.popitem(last=False)
+        self._games[game_state.game_id] = history
+        while len(self._games) > self._max_games:
+            evicted_game_id, _ = self._games.popitem(last=False)
+            self._players_states.pop(evicted_game_id, None)
+
+        return game_state
+
+    def _record_player_state(self, game_id, message):
+        request = message["request"]
+        player_state = PlayerState(
+            game_id, request["id"], request["game_version"], json.dumps(message, default=to_json)
+        )
+        # Private states are only useful to reconnect players to games with a history.
+        if game_id in self._games:
+            self._players_states.setdefault(game_id, {})[player_state.player_id] = player_state
+
+        return player_state
+
+    def has_version(self, game_id, version):
+        return self._get_state(game_id, version) is not None
+
+    @staticmethod
+    def get_version(messages, version=None):
+        """Get the version of the game a player has once it received the recorded messages."""
+        for message in messages:
+            if isinstance(message, GameState):
+                version = message.version
+        return version
+
+    def get_resume_messages(self, game_id, player_id, version):
+        """Get the messages to send to a player who reconnects with this version of the game.
+
+        They are created from the last recorded states, without loading the game.
+
+        Returns:
+            The recorded messages to give to :meth:`get_messages` or ``None`` if the version isn't
+            known anymore or if the private state of the player wasn't recorded for the last
+            version of the game: the game must then be loaded.
+        """
+        history = self._games.get(game_id)
+        if not history or version not in history:
+            return None
+
+        last_state = next(reversed(history.values()))
+        player_state = self._players_states.get(game_id, {}).get(player_id)
+        if player_state is None or player_state.version != last_state.version:
+            return None
+
+        return [last_state, player_state.get_resumed_message()]
+
+    def get_messages(self, messages, version=None):
+        """Get the messages to send to a player who has this version of the game."""
+        return [self._get_message(message, version) for message in messages]
+
+    def _get_message(self, message, version):
+        if isinstance(message, PlayerState):
+            return message.message
+        elif not isinstance(message, GameState):
+            return message
+
+        return self._get_patch_message(message, version)
+
+    def _get_patch_message(self, game_state, version):
+        base_state = self._get_state(game_state.game_id, version)
+        if base_state is None:
+            return game_state.message
+
+        patch_message = json.dumps(
+            {
+                "rt": RequestTypes.GAME_UPDATED.value,
+                "request": {
+                    "id": game_state.game_id,
+                    "base_version": version,
+                    "version": game_state.version,
+                    "patch": make_patch(base_state.state, game_state.state),
+                },
+            }
+        )
+        # The patch of a state that changed a lot can be bigger than the state.
+        return min(patch_message, game_state.message, key=len)
+
+    def _get_state(self, game_id, version):
+        if version is None:
+            return None
+        return self._games.get(game_id, {}).get(version)
@@ -0,0 +1,81 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+from collections import OrderedDict
+from typing import Optional
+
+from .events import EventLog
+
+
+class LiveGames:
+    """In-process LRU cache of the games loaded by this worker.
+
+    Each game is stored with the version it had in redis when it was saved or loaded. A game is
+    only reused if its version in redis didn't change since: no other worker played on it. Games
+    are taken out of the cache while they are played and put back once saved, so concurrent
+    requests for the same game never share a game object and a game left in an unknown state by
+    an error is simply dropped.
+
+    The cache is bounded by the number of games it holds, the least recently used game is evicted
+    first.
+    """
+
+    def __init__(self, max_size):
+        self._max_size = max_size
+        self._games = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def take(self, game_id, version) -> Optional[EventLog]:
+        """Take the game out of the cache if it is still at this version."""
+        entry = self._games.pop(game_id, None)
+        if version is not None and entry is not None and entry[0] == version:
+            self._hits += 1
+            _, game, number_saved_events = entry
+            return EventLog(game, number_saved_events=number_saved_events, version=version)
+
+        self._misses += 1
+        return None
+
+    def put(self, game_id, log: EventLog):
+        """Keep the game of this log, it must not have unsaved events."""
+        if self._max_size <= 0 or log.version is None:
+            return
+
+        self._games[game_id] = (log.version, log.game, log.number_events)
+        self._games.move_to_end(game_id)
+        while len(self._games) > self._max_size:
+            self._games.popitem(last=False)
+            self._evictions += 1
+
+    def discard(self, game_id):
+        self._games.pop(game_id, None)
+
+    def __len__(self):
+        return len(self._games)
+
+    @property
+    def stats(self):
+        return {
+            "live_games": len(self._games),
+            "live_games_hits": self._hits,
+            "live_games_misses": self._misses,
+            "live_games_evictions": self._evictions,
+        }
@@ -19,47 +19,90 @@
 
 import hashlib
 import hmac
-from base64 import b64decode, b64encode
+from base64 import b64decode
 
 from ..config import config
 
+#: Version of the envelope of signed data. Legacy data is base 64 encoded and can't start with it.
+FORMAT_VERSION = 1
+#: Size in bytes of the keyed BLAKE2b MAC.
+MAC_SIZE = 32
+_HEADER_SIZE = 2
+_MAX_KEY_SIZE = hashlib.blake2b.MAX_KEY_SIZE
+
 
 class InvalidSignatureError(ValueError):
     pass
 
 
 def encode(data):
-    """Encode data in base 64 and append its b64 signature."""
-    signature = sign(data)
-    return b64encode(data) + b":" + b64encode(signature)
-
-
-def sign(data):
-    """Sign ``data`` with the sign_key from the config and return the signature.
+    """Sign data and return it in a binary envelope.
 
-    The result contains a b64 representation of the signature, a colon and a b64 representation
-    of the data. This is meant to garante that the colon is present in neither of them.
+    The envelope is made of the format version, the id of the sign key, the MAC of the data and
+    the data itself.
     """
-    secret = config["cache"]["sign_key"]
-    return hmac.new(secret, msg=data, digestmod=hashlib.sha512).digest()
+    key_id = config["cache"]["sign_key_id"]
+    header = bytes((FORMAT_VERSION, key_id))
+    return header + _mac(config["cache"]["sign_key"], header, data) + data
 
 
 def decode(signed_data):
-    """Return the decoded data from a signed data.
+    """Return the data from its signed envelope.
+
+    Data signed with a previous sign key or in the legacy base 64 format is still accepted.
 
     raise:
         InvalidSignatureError: if the signature from signed_data in invalid.
     """
+    if signed_data[:1] != bytes((FORMAT_VERSION,)):
+        return _decode_legacy(signed_data)
+
+    header = signed_data[:_HEADER_SIZE]
+    signature = signed_data[_HEADER_SIZE : _HEADER_SIZE + MAC_SIZE]  # noqa: E203 (black slices)
+    data = signed_data[_HEADER_SIZE + MAC_SIZE :]  # noqa: E203 (black slices)
+    key = _get_sign_keys().get(header[1]) if len(header) == _HEADER_SIZE else None
+    if key is None or not hmac.compare_digest(signature, _mac(key, header, data)):
+        raise InvalidSignatureError
+
+    return data
+
+
+def _mac(key, header, data):
+    if len(key) > _MAX_KEY_SIZE:
+        key = hashlib.blake2b(key).digest()
+    mac = hashlib.blake2b(header, key=key, digest_size=MAC_SIZE)
+    mac.update(data)
+    return mac.digest()
+
+
+def _get_sign_keys():
+    return {
+        **config["cache"]["previous_sign_keys"],
+        config["cache"]["sign_key_id"]: config["cache"]["sign_key"],
+    }
+
+
+def sign(data, secret):
+    """Sign ``data`` with ``secret`` like it was done before the binary envelope."""
+    return hmac.new(secret, msg=data, digestmod=hashlib.sha512).digest()
+
+
+def _decode_legacy(signed_data):
+    """Decode data signed before the binary envelope.
+
+    It contains a b64 representation of the data, a colon and a b64 representation of its
+    HMAC-SHA512 signature.
+    """
     try:
         encoded_data, encoded_signature = signed_data.rsplit(b":", 1)
         data = b64decode(encoded_data)
         signature = b64decode(encoded_signature)
-        computed_signature = sign(data)
     except Exception:
         # Payload is not in the expected format, thus it is invalid.
         raise InvalidSignatureError
 
-    if not hmac.compare_digest(signature, computed_signature):
-        raise InvalidSignatureError
+    for key in _get_sign_keys().values():
+        if hmac.compare_digest(signature, sign(data, key)):
+            return data
 
-    return data
+    raise InvalidSignatureError
@@ -0,0 +1,115 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+"""Queues of the messages waiting to be sent to slow clients.
+
+When a client doesn't read its messages fast enough, the write buffer of its connection fills up
+and writing is paused (see :meth:`asyncio.BaseProtocol.pause_writing`). The messages sent
+meanwhile wait in a bounded queue instead of piling up in the buffer and are sent once writing
+resumes. Messages holding the state of the game or of the player are coalesced: a new state
+supersedes the one still waiting, only the latest is sent.
+"""
+
+import itertools
+from collections import OrderedDict
+from enum import Enum
+
+from .game_updates import GameState, PlayerState
+from .utils import RequestTypes
+
+
+class OverflowPolicies(Enum):
+    """What to do with a new message when the queue is full."""
+
+    #: Close the connection: the client will reconnect and receive the current state.
+    CLOSE = "close"
+    #: Drop the oldest message of the queue.
+    DROP_OLDEST = "drop_oldest"
+    #: Drop the new message.
+    DROP_NEWEST = "drop_newest"
+
+
+class SendQueueOverflowError(Exception):
+    """The queue is full and its policy is to close the connection."""
+
+
+class SendQueue:
+    """Bounded queue of the messages waiting to be sent to a client.
+
+    Args:
+        max_size: the maximum number of messages in the queue.
+        overflow_policy: what to do when a message is added to a full queue.
+    """
+
+    def __init__(self, max_size, overflow_policy: OverflowPolicies):
+        self._max_size = max_size
+        self._overflow_policy = overflow_policy
+        # Messages by key: messages with the same key supersede each other.
+        self._messages = OrderedDict()
+        self._keys = itertools.count()
+        self._number_dropped = 0
+
+    def put(self, message):
+        """Add a message to the queue.
+
+        Raises:
+            SendQueueOverflowError: if the queue is full and its policy is to close the connection.
+        """
+        key = _get_coalescing_key(message)
+        if key is None:
+            key = next(self._keys)
+        elif key in self._messages:
+            # The new message is sent in place of the superseded one, after the messages added
+            # since to keep their order.
+            del self._messages[key]
+            self._number_dropped += 1
+
+        if len(self._messages) >= self._max_size:
+            if self._overflow_policy == OverflowPolicies.CLOSE:
+                raise SendQueueOverflowError
+            self._number_dropped += 1
+            if self._overflow_policy == OverflowPolicies.DROP_NEWEST:
+                return
+            self._messages.popitem(last=False)
+
+        self._messages[key] = message
+
+    def pop_all(self):
+        """Take all the messages out of the queue, in the order they must be sent."""
+        messages = list(self._messages.values())
+        self._messages.clear()
+        return messages
+
+    @property
+    def number_dropped(self):
+        """Number of messages dropped because they were superseded or the queue was full."""
+        return self._number_dropped
+
+    def __len__(self):
+        return len(self._messages)
+
+
+def _get_coalescing_key(message):
+    if isinstance(message, GameState):
+        return RequestTypes.GAME_UPDATED, message.game_id
+    elif isinstance(message, PlayerState):
+        return RequestTypes.PLAYER_UPDATED, message.player_id
+    elif isinstance(message, dict) and message.get("rt") == RequestTypes.PLAYER_UPDATED:
+        return RequestTypes.PLAYER_UPDATED, message["request"]["id"]
+    return None
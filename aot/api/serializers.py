@@ -49,6 +49,7 @@ def get_global_game_state(game):
         "current_player_index": game.active_player.index,
         "nb_turns": game.nb_turns,
         "players": {player.index: _get_public_player_state(player) for player in game.players},
+        "version": game.version,
         "winners": game.winners,
     }
 
@@ -97,6 +98,8 @@ def get_private_player_state(game, player):
         "available_trumps": player.available_trumps,
         "hero": player.hero,
         "your_turn": player.id == game.active_player.id,
+        # Version of the game this state belongs to, see aot.api.game_updates.
+        "game_version": game.version,
         "on_last_line": player.on_last_line,
         "has_won": player.has_won,
         "rank": player.rank,
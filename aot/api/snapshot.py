@@ -0,0 +1,621 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+"""Versioned binary snapshots of games.
+
+A snapshot only contains what can change during a game, described by explicit schemas: the
+geometry of the board is saved as the name of its layout, cards from a config as a reference to
+their spec and other players or squares as indexes. The resulting tree of tuples, lists and
+primitive values is then serialized as compact JSON and compressed. Unlike pickle, this doesn't
+save any class path, so the classes can be refactored freely as long as their schemas are updated.
+
+The first byte of a snapshot is the version of its format. When the format changes,
+:data:`FORMAT_VERSION` must be incremented and a function converting a tree of the previous
+version to the new one must be registered in :data:`MIGRATIONS`.
+"""
+
+import dataclasses
+import json
+import zlib
+from itertools import repeat
+
+from ..game import Game, Player
+from ..game.actions import Action
+from ..game.board import Board, Color, ColorSet, Square
+from ..game.board.layout import get_layout_by_name
+from ..game.cards import Card, CardSpec, Deck, get_cards_specs
+from ..game.cards.spec import _get_card_spec
+from ..game.config import GAME_CONFIGS
+from ..game.trumps import (
+    Gauge,
+    SpecialActionsList,
+    TrumpsList,
+    effects,
+    powers,
+    special_actions,
+    trumps,
+)
+from ..game.trumps.constants import EffectTypes
+
+#: Version of the format of the snapshots created by this module.
+FORMAT_VERSION = 1
+#: Functions to convert the tree of a snapshot from a version to the next one, by version.
+MIGRATIONS = {}
+# Snapshots are small: the fastest compression level is almost as good as the others.
+_COMPRESSION_LEVEL = 1
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+# Tags of the encoded values that are not primitives.
+_TUPLE = 0
+_SET = 1
+_FROZENSET = 2
+_DICT = 3
+_ENUM = 4
+_TYPE = 5
+_DATACLASS = 6
+_OBJECT = 7
+_PLAYER = 8
+_BOARD = 9
+_SQUARE = 10
+_DETACHED_SQUARE = 11
+_CARD_SPEC = 12
+_COLOR_SET = 13
+_DECK = 14
+_CARD_REFERENCE = 15
+_LIST = 16
+_DATACLASS_REFERENCE = 17
+
+# Primitive values are encoded as is, other values are encoded as tagged tuples. They are loaded as
+# lists starting with their tag.
+_PRIMITIVE_TYPES = frozenset((type(None), bool, int, float, str))
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class _Schema:
+    """Attributes to save for objects of a class.
+
+    Args:
+        fields: Names of the attributes saved in the snapshot, in this order.
+        restore: Called with the object and the decoder once its fields are loaded to restore the
+            attributes that are not saved.
+    """
+
+    def __init__(self, fields, restore=None):
+        self.fields = fields
+        self.restore = restore
+
+
+def _restore_player(player, decoder):
+    player._board = decoder.board
+    player._aim = decoder.board.aim
+
+
+def _restore_board_bound(obj, decoder):
+    obj._board = decoder.board
+
+
+_PLAYER_SCHEMA = _Schema(
+    (
+        "_available_trumps",
+        "_can_play",
+        "_current_square",
+        "_deck",
+        "_game_id",
+        "_gauge",
+        "_has_won",
+        "_hero",
+        "_id",
+        "_index",
+        "_is_ai",
+        "_is_connected",
+        "_last_square_previous_turn",
+        "_name",
+        "_number_moves_played",
+        "_number_moves_to_play",
+        "_number_trumps_played",
+        "_number_turns_passed_not_connected",
+        "_power",
+        "_rank",
+        "_special_action_start_time",
+        "_special_actions",
+        "_special_actions_names",
+        "_trump_effects",
+        "_turn_start_time",
+    ),
+    restore=_restore_player,
+)
+_GAME_FIELDS = (
+    "_actions",
+    "_active_player",
+    "_game_id",
+    "_index_first_player",
+    "_is_over",
+    "_nb_turns",
+    "_next_rank_available",
+    "_players_id_to_index",
+    "_version",
+    "_winners",
+)
+_EFFECT_SCHEMA = _Schema(
+    ("_context", "_duration", "_effect_type", "_initiator", "_target", "_trump")
+)
+_SCHEMAS = {
+    Card: _Schema(
+        ("_spec", "_colors", "_number_movements_delta", "_special_actions"),
+        restore=_restore_board_bound,
+    ),
+    Gauge: _Schema(("_value",), restore=_restore_board_bound),
+    Player: _PLAYER_SCHEMA,
+    SpecialActionsList: _Schema(("_trumps_like",)),
+    TrumpsList: _Schema(("_trumps_like",)),
+}
+_DATACLASSES = {Action, CardSpec}
+_ENUMS = {Color, EffectTypes}
+
+for _module in (effects, powers, special_actions, trumps):
+    for _value in vars(_module).values():
+        if not isinstance(_value, type) or _value.__module__ != _module.__name__:
+            continue
+        elif issubclass(_value, effects.TrumpEffect):
+            _SCHEMAS[_value] = _EFFECT_SCHEMA
+        elif dataclasses.is_dataclass(_value):
+            _DATACLASSES.add(_value)
+
+_CLASSES_BY_NAME = {cls.__name__: cls for cls in (*_SCHEMAS, *_DATACLASSES, *_ENUMS)}
+
+
+def dumps(game: Game) -> bytes:
+    """Create a snapshot of a game."""
+    tree = _Encoder(game).encode_game()
+    return bytes((FORMAT_VERSION,)) + zlib.compress(
+        _JSON_ENCODER.encode(tree).encode(), _COMPRESSION_LEVEL
+    )
+
+
+def loads(data: bytes) -> Game:
+    """Load a game from a snapshot created by :func:`dumps`, migrating it if needed."""
+    version = data[0]
+    if version > FORMAT_VERSION:
+        raise SnapshotError(f"Snapshot version {version} is more recent than {FORMAT_VERSION}.")
+
+    tree = json.loads(zlib.decompress(data[1:]))
+    while version < FORMAT_VERSION:
+        if version not in MIGRATIONS:
+            raise SnapshotError(f"No migration registered for snapshot version {version}.")
+        tree = MIGRATIONS[version](tree)
+        version += 1
+
+    return _Decoder().decode_game(tree)
+
+
+def dumps_value(value) -> bytes:
+    """Serialize a value that doesn't belong to a game, like the request of a player.
+
+    It can contain the same types as a snapshot except the objects bound to a game: players,
+    squares and cards.
+    """
+    return bytes((FORMAT_VERSION,)) + _JSON_ENCODER.encode(_Encoder().encode(value)).encode()
+
+
+def loads_value(data: bytes):
+    """Load a value serialized with :func:`dumps_value`."""
+    version = data[0]
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"Cannot load a value of version {version}.")
+
+    return _Decoder().decode(json.loads(data[1:]))
+
+
+class _Encoder:
+    def __init__(self, game=None):
+        self._game = game
+        self._board = None if game is None else game.board
+        # Cards of the decks already encoded by id: (number of the deck, index of the card).
+        self._cards_references = {}
+        self._number_decks = 0
+        # Index of the dataclasses already encoded by id.
+        self._encoded_dataclasses = {}
+        self._encoded_values = []
+        self._encoders_by_type = {
+            list: self._encode_list,
+            tuple: self._encode_tuple,
+            dict: self._encode_dict,
+            set: self._encode_set,
+            frozenset: self._encode_frozenset,
+            ColorSet: self._encode_color_set,
+            Square: self._encode_square,
+            Player: self._encode_player,
+            Board: self._encode_board_reference,
+            CardSpec: self._encode_card_spec,
+            Card: self._encode_card,
+            Deck: self._encode_deck,
+        }
+
+    def encode_game(self):
+        game = self._game
+        return (
+            self._encode_board(),
+            [
+                None if player is None else self._encode_fields(player, _PLAYER_SCHEMA.fields)
+                for player in game._players
+            ],
+            self._encode_fields(game, _GAME_FIELDS),
+        )
+
+    def _encode_board(self):
+        """Encode what changed on the board since the start of the game.
+
+        We only save the name of the layout, the colors of the squares that changed color and the
+        ids of the squares whose occupation differs from the layout.
+        """
+        board = self._board
+        layout = board.layout
+        if layout.name is None:
+            raise SnapshotError("Cannot snapshot a board whose layout has no name.")
+
+        # The squares that changed are found by comparing the bitboards of the board with the
+        # initial ones of the layout.
+        bitboard = layout.bitboard
+        original_colors_masks = layout.original_colors_masks
+        changed_colors = []
+        for color, mask in board._colors_masks.items():
+            for square_id in bitboard.iter_ids(mask & ~original_colors_masks.get(color, 0)):
+                changed_colors.extend((square_id, color.value))
+
+        return (
+            layout.name,
+            board.version,
+            changed_colors,
+            list(bitboard.iter_ids(board.occupied_mask ^ layout.initially_occupied_mask)),
+            list(board._updated_squares),
+        )
+
+    def _encode_fields(self, obj, fields):
+        # Most fields are primitive values: we don't call encode for them to go faster.
+        encode = self.encode
+        return [
+            value if type(value) in _PRIMITIVE_TYPES else encode(value)
+            for value in map(getattr, repeat(obj), fields)
+        ]
+
+    def encode(self, value):
+        value_type = type(value)
+        if value_type in _PRIMITIVE_TYPES:
+            return value
+        elif value_type in self._encoders_by_type:
+            return self._encoders_by_type[value_type](value)
+        elif value_type in _SCHEMAS:
+            return self._encode_object(value)
+        elif value_type in _DATACLASSES:
+            return self._encode_dataclass(value)
+        elif value_type in _ENUMS:
+            return _ENUM, value_type.__name__, value.value
+        elif isinstance(value, type) and _CLASSES_BY_NAME.get(value.__name__) is value:
+            return _TYPE, value.__name__
+
+        raise SnapshotError(f"Cannot snapshot values of type {value_type.__name__}.")
+
+    def _encode_list(self, value):
+        return (_LIST, *(self.encode(item) for item in value))
+
+    def _encode_tuple(self, value):
+        return (_TUPLE, *(self.encode(item) for item in value))
+
+    def _encode_dict(self, value):
+        encoded = [_DICT]
+        for key, item in value.items():
+            encoded.append(self.encode(key))
+            encoded.append(self.encode(item))
+        return tuple(encoded)
+
+    def _encode_set(self, value):
+        return (_SET, *(self.encode(item) for item in value))
+
+    def _encode_frozenset(self, value):
+        return (_FROZENSET, *(self.encode(item) for item in value))
+
+    def _encode_color_set(self, value):
+        return (_COLOR_SET, *(color.value for color in value))
+
+    def _encode_square(self, square):
+        if square._board is self._board:
+            return _SQUARE, square._id
+
+        return (
+            _DETACHED_SQUARE,
+            square.x,
+            square.y,
+            _encode_color(square._original_color),
+            _encode_color(square.color),
+            square.occupied,
+            square.is_arrival,
+            square.is_departure,
+        )
+
+    def _encode_player(self, player):
+        if self._game is None:
+            raise SnapshotError("Cannot serialize a player without its game.")
+
+        players = self._game._players
+        if 0 <= player.index < len(players) and players[player.index] is player:
+            return _PLAYER, player.index
+
+        # The player is not part of the game anymore, we must save it completely.
+        return (_OBJECT, Player.__name__, *self._encode_fields(player, _PLAYER_SCHEMA.fields))
+
+    def _encode_board_reference(self, board):
+        if board is not self._board:
+            raise SnapshotError("Cannot snapshot a board that is not the board of the game.")
+
+        return (_BOARD,)
+
+    def _encode_card_spec(self, spec):
+        if spec.config_name is not None:
+            return _CARD_SPEC, spec.config_name, spec.index
+
+        return self._encode_dataclass(spec)
+
+    def _encode_deck(self, deck):
+        """Encode a deck.
+
+        Cards created from the config of the first card are saved as the index of their spec if
+        they were not modified.
+        """
+        cards = deck._cards
+        config_name = cards[0].spec.config_name if cards else None
+        encoded_cards = []
+        for index, card in enumerate(cards):
+            spec = card.spec
+            if config_name is not None and spec.config_name == config_name and _is_default(card):
+                encoded_cards.append(spec.index)
+            else:
+                encoded_cards.append(self._encode_object(card))
+            self._cards_references[id(card)] = (self._number_decks, index)
+        self._number_decks += 1
+
+        return (
+            _DECK,
+            config_name,
+            encoded_cards,
+            deck._hand,
+            deck._graveyard,
+            deck._stock,
+        )
+
+    def _encode_card(self, card):
+        # Cards from a deck (eg in the actions) are saved as a reference to keep them identical.
+        if id(card) in self._cards_references:
+            return (_CARD_REFERENCE, *self._cards_references[id(card)])
+
+        return self._encode_object(card)
+
+    def _encode_object(self, value):
+        value_type = type(value)
+        return (
+            _OBJECT,
+            value_type.__name__,
+            *self._encode_fields(value, _SCHEMAS[value_type].fields),
+        )
+
+    def _encode_dataclass(self, value):
+        # Dataclasses are frozen: a value used several times (like a trump in the list of trumps of
+        # a player and in an action) is encoded once and then referenced by its index.
+        index = self._encoded_dataclasses.get(id(value))
+        if index is not None:
+            return _DATACLASS_REFERENCE, index
+
+        index = self._encoded_dataclasses[id(value)] = len(self._encoded_values)
+        # Keep the value alive so its id cannot be reused during the encoding.
+        self._encoded_values.append(value)
+        return (
+            _DATACLASS,
+            index,
+            type(value).__name__,
+            *self._encode_fields(value, _get_dataclass_fields(type(value))),
+        )
+
+
+class _Decoder:
+    def __init__(self):
+        self.board = None
+        self._players = []
+        self._decks = []
+        self._decoded_dataclasses = {}
+        self._decoders_by_tag = {
+            _LIST: self._decode_list,
+            _TUPLE: self._decode_tuple,
+            _SET: self._decode_set,
+            _FROZENSET: self._decode_frozenset,
+            _DICT: self._decode_dict,
+            _ENUM: self._decode_enum,
+            _TYPE: self._decode_type,
+            _DATACLASS: self._decode_dataclass,
+            _DATACLASS_REFERENCE: self._decode_dataclass_reference,
+            _OBJECT: self._decode_object,
+            _PLAYER: self._decode_player,
+            _BOARD: self._decode_board_reference,
+            _SQUARE: self._decode_square,
+            _DETACHED_SQUARE: self._decode_detached_square,
+            _CARD_SPEC: self._decode_card_spec,
+            _COLOR_SET: self._decode_color_set,
+            _DECK: self._decode_deck,
+            _CARD_REFERENCE: self._decode_card_reference,
+        }
+
+    def decode_game(self, tree):
+        board_tree, players_trees, game_fields = tree
+        self.board = self._decode_board(board_tree)
+        # Players reference each other, so they must all exist before their fields are loaded.
+        self._players = [
+            None if player_fields is None else Player.__new__(Player)
+            for player_fields in players_trees
+        ]
+        for player, player_fields in zip(self._players, players_trees):
+            if player is not None:
+                self._decode_fields(player, _PLAYER_SCHEMA, player_fields)
+
+        game = Game.__new__(Game)
+        game._board = self.board
+        game._players = self._players
+        for field, value in zip(_GAME_FIELDS, game_fields):
+            setattr(game, field, self.decode(value))
+
+        return game
+
+    def _decode_board(self, board_tree):
+        layout_name, version, changed_colors, changed_occupations, updated_squares = board_tree
+        board = Board.from_layout(get_layout_by_name(layout_name))
+        for index in range(0, len(changed_colors), 2):
+            board._set_color(changed_colors[index], Color(changed_colors[index + 1]))
+        for square_id in changed_occupations:
+            board._set_occupied(square_id, not board._occupied[square_id])
+        board._version = version
+        board._updated_squares = updated_squares
+        return board
+
+    def _decode_fields(self, obj, schema, values):
+        obj.__dict__.update(zip(schema.fields, self._decode_values(values)))
+        if schema.restore is not None:
+            schema.restore(obj, self)
+
+    def _decode_values(self, values):
+        decode = self.decode
+        return [decode(value) if type(value) is list else value for value in values]
+
+    def decode(self, value):
+        if type(value) is list:
+            return self._decoders_by_tag[value[0]](value)
+
+        return value
+
+    def _decode_list(self, value):
+        return [self.decode(item) for item in value[1:]]
+
+    def _decode_tuple(self, value):
+        return tuple(self.decode(item) for item in value[1:])
+
+    def _decode_set(self, value):
+        return {self.decode(item) for item in value[1:]}
+
+    def _decode_frozenset(self, value):
+        return frozenset(self.decode(item) for item in value[1:])
+
+    def _decode_dict(self, value):
+        return {
+            self.decode(value[index]): self.decode(value[index + 1])
+            for index in range(1, len(value), 2)
+        }
+
+    def _decode_enum(self, value):
+        _, class_name, enum_value = value
+        return _get_class(class_name)(enum_value)
+
+    def _decode_type(self, value):
+        return _get_class(value[1])
+
+    def _decode_dataclass(self, value):
+        cls = _get_class(value[2])
+        # Dataclasses are frozen and some of them modify their fields in __post_init__: we must
+        # bypass __init__ to restore them as they were.
+        obj = cls.__new__(cls)
+        obj.__dict__.update(zip(_get_dataclass_fields(cls), self._decode_values(value[3:])))
+        self._decoded_dataclasses[value[1]] = obj
+        return obj
+
+    def _decode_dataclass_reference(self, value):
+        return self._decoded_dataclasses[value[1]]
+
+    def _decode_object(self, value):
+        cls = _get_class(value[1])
+        obj = cls.__new__(cls)
+        self._decode_fields(obj, _SCHEMAS[cls], value[2:])
+        return obj
+
+    def _decode_player(self, value):
+        return self._players[value[1]]
+
+    def _decode_board_reference(self, value):
+        return self.board
+
+    def _decode_square(self, value):
+        return self.board.get_square_by_id(value[1])
+
+    def _decode_detached_square(self, value):
+        _, x, y, original_color, color, occupied, is_arrival, is_departure = value
+        square = Square(x, y, _decode_color(original_color), occupied, is_arrival, is_departure)
+        square.color = _decode_color(color)
+        return square
+
+    def _decode_card_spec(self, value):
+        return _get_card_spec(value[1], value[2])
+
+    def _decode_deck(self, value):
+        _, config_name, encoded_cards, hand, graveyard, stock = value
+        deck = Deck.__new__(Deck)
+        specs = () if config_name is None else get_cards_specs(GAME_CONFIGS[config_name])
+        board = self.board
+        deck._cards = tuple(
+            Card.from_spec(board, specs[card]) if type(card) is int else self.decode(card)
+            for card in encoded_cards
+        )
+        deck._hand = list(hand)
+        deck._graveyard = list(graveyard)
+        deck._stock = list(stock)
+        self._decks.append(deck)
+        return deck
+
+    def _decode_card_reference(self, value):
+        return self._decks[value[1]]._cards[value[2]]
+
+    def _decode_color_set(self, value):
+        return ColorSet(Color(color) for color in value[1:])
+
+
+_dataclasses_fields = {}
+
+
+def _get_dataclass_fields(cls):
+    if cls not in _dataclasses_fields:
+        _dataclasses_fields[cls] = tuple(field.name for field in dataclasses.fields(cls))
+    return _dataclasses_fields[cls]
+
+
+def _encode_color(color):
+    # Detached squares can have no color.
+    return None if color is None else color.value
+
+
+def _decode_color(value):
+    return None if value is None else Color(value)
+
+
+def _is_default(card):
+    return (
+        card._colors is None and card._number_movements_delta == 0 and card._special_actions is None
+    )
+
+
+def _get_class(class_name):
+    try:
+        return _CLASSES_BY_NAME[class_name]
+    except KeyError:
+        raise SnapshotError(f"Unknown class {class_name} in snapshot.")
@@ -0,0 +1,298 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import fnmatch
+import time
+from bisect import insort
+
+import daiquiri
+from aredis import StrictRedis
+from aredis.scripting import Script as RedisScript
+
+from ..config import config
+
+logger = daiquiri.getLogger(__name__)
+
+# Minimum number of seconds between two sweeps of the expired keys of a MemoryDatabase.
+_EXPIRED_KEYS_SWEEP_INTERVAL = 60
+
+
+def create_storage(loop=None):
+    """Create the storage configured with the ``cache.backend`` config key."""
+    backend = config["cache"]["backend"]
+    if backend == "memory":
+        logger.info("Storing the cache in memory.")
+        return MemoryStorage()
+    elif backend == "redis":
+        logger.info(f'Connecting to redis with connection infos: {config["cache"]}.')
+        return RedisStorage(
+            host=config["cache"]["host"],
+            port=config["cache"]["port"],
+            connect_timeout=config["cache"]["timeout"],
+            stream_timeout=config["cache"]["timeout"],
+            loop=loop,
+        )
+
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+class Script:
+    """A script run atomically by the storage.
+
+    Args:
+        lua: the source of the script run by redis.
+        function: the implementation of the script for the :class:`MemoryStorage`. It is called
+            with the :class:`MemoryDatabase`, the keys and the args of the script as bytes and
+            must return what the Lua script returns.
+    """
+
+    def __init__(self, lua, function):
+        self._redis_script = RedisScript(None, lua)
+        self._function = function
+
+    @property
+    def lua(self):
+        return self._redis_script.script
+
+    @property
+    def redis_script(self):
+        return self._redis_script
+
+    @property
+    def function(self):
+        return self._function
+
+
+class RedisStorage(StrictRedis):
+    """Storage backed by a redis server."""
+
+    async def run_script(self, script, keys, args):
+        return await script.redis_script.execute(keys=keys, args=args, client=self)
+
+
+class MemoryStorage:
+    """In process storage with the subset of the redis API used by the cache.
+
+    It can only be used if the API runs in a single process. Commands are run synchronously on
+    a :class:`MemoryDatabase`: pipelines and scripts are atomic.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._database = MemoryDatabase(clock)
+
+    def __getattr__(self, name):
+        command = getattr(self._database, name)
+
+        async def run_command(*args, **kwargs):
+            return command(*args, **kwargs)
+
+        return run_command
+
+    async def pipeline(self, transaction=True):
+        return MemoryPipeline(self._database)
+
+    async def run_script(self, script, keys, args):
+        return script.function(self._database, keys, [_to_bytes(arg) for arg in args])
+
+    async def scan_iter(self, match=None, count=None):
+        for key in self._database.scan(match):
+            yield key
+
+    @property
+    def database(self):
+        return self._database
+
+
+class MemoryPipeline:
+    """Queue commands and run them all at once like a redis pipeline."""
+
+    def __init__(self, database):
+        self._database = database
+        self._commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self._database, name)
+
+        async def queue_command(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+
+        return queue_command
+
+    async def execute(self):
+        commands, self._commands = self._commands, []
+        return [command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class MemoryDatabase:
+    """Synchronous implementation of the redis commands used by the cache.
+
+    Keys and values are stored as bytes and returned as such, like redis does. Expired keys are
+    removed when they are accessed. Since some keys are never accessed again once they expired,
+    writes also sweep all the expired keys, at most once every ``_EXPIRED_KEYS_SWEEP_INTERVAL``
+    seconds so the cost of the sweep is amortized.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._values = {}
+        self._expiry_times = {}
+        self._next_sweep_time = clock() + _EXPIRED_KEYS_SWEEP_INTERVAL
+
+    def _get(self, key, default=None):
+        key = _to_bytes(key)
+        expiry_time = self._expiry_times.get(key)
+        if expiry_time is not None and expiry_time <= self._clock():
+            self._delete(key)
+        return self._values.get(key, default)
+
+    def _get_or_create(self, key, factory):
+        self._sweep_expired_keys()
+        value = self._get(key)
+        if value is None:
+            value = self._values[_to_bytes(key)] = factory()
+        return value
+
+    def _delete(self, key):
+        self._expiry_times.pop(key, None)
+        return self._values.pop(key, None) is not None
+
+    def _sweep_expired_keys(self):
+        now = self._clock()
+        if now < self._next_sweep_time:
+            return
+
+        self._next_sweep_time = now + _EXPIRED_KEYS_SWEEP_INTERVAL
+        expired_keys = [
+            key for key, expiry_time in self._expiry_times.items() if expiry_time <= now
+        ]
+        for key in expired_keys:
+            self._delete(key)
+
+    def _delete_if_empty(self, key):
+        if not self._values.get(_to_bytes(key), True):
+            self._delete(_to_bytes(key))
+
+    def scan(self, match=None):
+        match = None if match is None else _to_bytes(match)
+        for key in list(self._values):
+            if self._get(key) is not None and (match is None or fnmatch.fnmatchcase(key, match)):
+                yield key
+
+    def delete(self, *keys):
+        return sum(self._get(key) is not None and self._delete(_to_bytes(key)) for key in keys)
+
+    def expire(self, key, seconds):
+        self._sweep_expired_keys()
+        if self._get(key) is None:
+            return False
+        self._expiry_times[_to_bytes(key)] = self._clock() + int(seconds)
+        return True
+
+    def ttl(self, key):
+        if self._get(key) is None:
+            return -2
+        expiry_time = self._expiry_times.get(_to_bytes(key))
+        return -1 if expiry_time is None else round(expiry_time - self._clock())
+
+    def get(self, key):
+        return self._get(key)
+
+    def set(self, key, value):
+        self._sweep_expired_keys()
+        key = _to_bytes(key)
+        self._delete(key)
+        self._values[key] = _to_bytes(value)
+        return True
+
+    def hget(self, key, field):
+        return self._get(key, {}).get(_to_bytes(field))
+
+    def hmget(self, key, *fields):
+        values = self._get(key, {})
+        return [values.get(_to_bytes(field)) for field in fields]
+
+    def hset(self, key, field, value):
+        values = self._get_or_create(key, dict)
+        is_new_field = _to_bytes(field) not in values
+        values[_to_bytes(field)] = _to_bytes(value)
+        return int(is_new_field)
+
+    def hmset(self, key, mapping):
+        for field, value in mapping.items():
+            self.hset(key, field, value)
+        return True
+
+    def hincrby(self, key, field, increment=1):
+        value = int(self.hget(key, field) or 0) + int(increment)
+        self.hset(key, field, value)
+        return value
+
+    def lrange(self, key, start, end):
+        values = self._get(key, [])
+        return values[start : None if end == -1 else end + 1]  # noqa: E203 (black slices)
+
+    def rpush(self, key, *values):
+        stored_values = self._get_or_create(key, list)
+        stored_values.extend(_to_bytes(value) for value in values)
+        return len(stored_values)
+
+    def sadd(self, key, *members):
+        members = {_to_bytes(member) for member in members}
+        stored_members = self._get_or_create(key, set)
+        number_added = len(members - stored_members)
+        stored_members.update(members)
+        return number_added
+
+    def srem(self, key, *members):
+        stored_members = self._get(key, set())
+        number_removed = 0
+        for member in members:
+            if _to_bytes(member) in stored_members:
+                stored_members.remove(_to_bytes(member))
+                number_removed += 1
+        self._delete_if_empty(key)
+        return number_removed
+
+    def scard(self, key):
+        return len(self._get(key, set()))
+
+    def zadd(self, key, score, member):
+        # Sorted sets are stored as sorted lists of (score, member).
+        member = _to_bytes(member)
+        scores = self._get_or_create(key, list)
+        existing = [item for item in scores if item[1] == member]
+        for item in existing:
+            scores.remove(item)
+        insort(scores, (float(score), member))
+        return int(not existing)
+
+    def zrange(self, key, start, end):
+        members = [member for _, member in self._get(key, [])]
+        return members[start : None if end == -1 else end + 1]  # noqa: E203 (black slices)
+
+    def zcard(self, key):
+        return len(self._get(key, []))
+
+
+def _to_bytes(value):
+    """Encode a value like redis clients do."""
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
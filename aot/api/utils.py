@@ -53,6 +53,10 @@ class MustNotSaveGameError(Exception):
     pass
 
 
+class GameVersionConflictError(Exception):
+    """The game was saved by another request since it was loaded."""
+
+
 @dataclasses.dataclass(frozen=True)
 class WsResponse:
     future_message: Optional[asyncio.Future] = None
@@ -88,6 +92,7 @@ class RequestTypes(Enum):
     GAME_UPDATED = "GAME_UPDATED"
     PLAYER_UPDATED = "PLAYER_UPDATED"
     RECONNECT = "RECONNECT"
+    ACKNOWLEDGE_GAME_VERSION = "ACKNOWLEDGE_GAME_VERSION"
 
 
 class SlotState(Enum):
@@ -226,9 +226,15 @@ _REQUEST_TYPE_TO_REQUEST_VALIDATOR = make_immutable(
             {
                 "game_id": {"type": "string", "empty": False},
                 "player_id": {"type": "string", "empty": False},
+                # Last version of the game received by the player, if it was in a game.
+                "game_version": {"type": "integer", "min": 0, "required": False},
             },
             require_all=True,
         ),
+        RequestTypes.ACKNOWLEDGE_GAME_VERSION: Validator(
+            {"version": {"type": "integer", "min": 0}},
+            require_all=True,
+        ),
     }
 )
 
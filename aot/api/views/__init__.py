@@ -21,7 +21,7 @@ from .create_game import create_game, create_lobby, free_slot, join_game, update
 from .play_actions import play_action, view_possible_actions
 from .play_cards import play_card, view_possible_squares
 from .play_trump import play_trump
-from .reconnect import reconnect_to_game, reconnect_to_lobby
+from .reconnect import reconnect_to_game, reconnect_to_lobby, resume_game, resume_game_from_updates
 
 __all__ = [
     # Create game views.
@@ -39,4 +39,6 @@ __all__ = [
     # Reconnect.
     reconnect_to_lobby.__name__,
     reconnect_to_game.__name__,
+    resume_game.__name__,
+    resume_game_from_updates.__name__,
 ]
@@ -37,7 +37,7 @@ async def create_lobby(request, cache):
         nb_slots=game_config["number_players"],
     )
 
-    return await join_game(request, cache)
+    return await _join_lobby(request, cache)
 
 
 def _create_game_id():
@@ -92,12 +92,17 @@ async def _initialize_game(cache, submitted_player_descriptions):
 
 
 async def join_game(request, cache):
-    if not await _can_join(request, cache):
+    cache.init(game_id=request["game_id"], player_id=request["player_id"])
+    return await _join_lobby(request, cache)
+
+
+async def _join_lobby(request, cache):
+    lobby = await cache.take_next_slot(request["player_name"], request["hero"])
+    if lobby is None:
         raise AotErrorToDisplay("cannot_join")
 
-    cache.init(game_id=request["game_id"], player_id=request["player_id"])
-    index = await cache.affect_next_slot(request["player_name"], request["hero"])
-    await cache.save_session(index)
+    game_master_id, index, slots = lobby
+    public_slots = cache.remove_player_id(slots)
 
     return WsResponse(
         send_to_current_player=[
@@ -106,9 +111,9 @@ async def join_game(request, cache):
                 "request": {
                     "game_id": request["game_id"],
                     "player_id": request["player_id"],
-                    "is_game_master": await cache.is_game_master(),
+                    "is_game_master": game_master_id == request["player_id"],
                     "index": index,
-                    "slots": await cache.get_slots(include_player_id=False),
+                    "slots": public_slots,
                     "api_version": config["version"],
                 },
             }
@@ -116,53 +121,39 @@ async def join_game(request, cache):
         send_to_all=[
             {
                 "rt": RequestTypes.SLOT_UPDATED,
-                "request": {"slots": await cache.get_slots(include_player_id=False)},
+                "request": {"slots": public_slots},
             }
         ],
     )
 
 
-async def _can_join(request, cache):
-    return await cache.game_exists(request["game_id"]) and await cache.has_opened_slots(
-        request["game_id"]
-    )
-
-
 async def free_slot(request, cache):
-    slots = await cache.get_slots()
-    slots = [slot for slot in slots if slot.get("player_id", None) == request["player_id"]]
-    if not slots:
+    slots = await cache.free_slot()
+    if slots is None:
         return WsResponse()
 
-    slot = slots[0]
-    slot["state"] = SlotState.OPEN
-    await cache.update_slot(slot)
-
     return WsResponse(
         send_to_all=[
             {
                 "rt": RequestTypes.SLOT_UPDATED,
-                "request": {"slots": await cache.get_slots(include_player_id=False)},
+                "request": {"slots": cache.remove_player_id(slots)},
             }
         ]
     )
 
 
 async def update_slot(request, cache):
-    slot = request["slot"]
-    if not await cache.slot_exists(slot):
+    slots = await cache.update_slot(request["slot"])
+    if slots is None:
         raise AotError("non-existent_slot")
 
-    await cache.update_slot(slot)
     # The player_id is stored in the cache so we can know to which player which slot is
-    # associated. We don't pass this information to the frontend. If the slot is new, it
-    # doesn't have a player_id yet, so we have to check for its existence before attempting
-    # to delete it.
+    # associated. We don't pass this information to the frontend.
     return WsResponse(
         send_to_all=[
             {
                 "rt": RequestTypes.SLOT_UPDATED,
-                "request": {"slots": await cache.get_slots(include_player_id=False)},
+                "request": {"slots": cache.remove_player_id(slots)},
             }
         ]
     )
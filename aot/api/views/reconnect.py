@@ -18,12 +18,17 @@
 #
 
 from ...config import config
-from ..serializers import get_global_game_state, get_private_player_state
+from ..serializers import (
+    get_global_game_message,
+    get_global_game_state,
+    get_private_player_message,
+    get_private_player_state,
+)
 from ..utils import RequestTypes, WsResponse
 
 
 def reconnect_to_game(request, game):
-    player = [player for player in game.players if player and player.id == request["player_id"]][0]
+    player = _get_player(request, game)
 
     return WsResponse(
         send_to_current_player=[
@@ -38,6 +43,42 @@ def reconnect_to_game(request, game):
     )
 
 
+def resume_game(request, game):
+    """Send to the player what changed since the version of the game it last received.
+
+    The global state is sent as a patch from this version like for players who acknowledged it,
+    see :mod:`aot.api.game_updates`.
+    """
+    player = _get_player(request, game)
+
+    return WsResponse(
+        send_to_current_player=[
+            get_global_game_message(game),
+            get_private_player_message(game, player),
+        ]
+    )
+
+
+def resume_game_from_updates(request, game_updates):
+    """Like :func:`resume_game` but without the game: the states are taken from its last updates.
+
+    Returns:
+        The response or ``None`` if the states are not known anymore: the game must then be loaded
+        to resume it.
+    """
+    messages = game_updates.get_resume_messages(
+        request["game_id"], request["player_id"], request["game_version"]
+    )
+    if messages is None:
+        return None
+
+    return WsResponse(send_to_current_player=messages)
+
+
+def _get_player(request, game):
+    return [player for player in game.players if player and player.id == request["player_id"]][0]
+
+
 async def reconnect_to_lobby(request, cache):
     try:
         index = await cache.get_player_index()
@@ -25,8 +25,11 @@ from autobahn.asyncio.websocket import WebSocketServerProtocol
 from autobahn.exception import Disconnected
 
 from ..config import config
+from .actors import GameActors
 from .api import Api as AotApi
 from .cache import Cache
+from .game_updates import GameUpdates
+from .send_queue import OverflowPolicies, SendQueue, SendQueueOverflowError
 from .serializers import to_json
 from .utils import (
     AotError,
@@ -44,7 +47,11 @@ class AotWs(WebSocketServerProtocol):
     DISCONNECTED_TIMEOUT_WAIT = 10  # In seconds.
     logger = daiquiri.getLogger(__name__)
     _clients = {}
+    # Connections of this worker by the id of their game, to send them the messages of the game.
+    _clients_by_game = {}
     _disconnect_timeouts = {}
+    _game_actors = None
+    _game_updates = None
     _error_messages = {
         "cannot_join": "You cannot join this game. No slots opened.",
         "game_master_request": "Only the game master can use {rt} request.",
@@ -77,6 +84,9 @@ class AotWs(WebSocketServerProtocol):
     _api = None
     _loop = None
     _id = None
+    _game_id = None
+    _send_queue = None
+    _writing_paused = False
 
     def set_event_loop_for_testing(self, event_loop):
         self._loop = event_loop
@@ -91,7 +101,37 @@ class AotWs(WebSocketServerProtocol):
             loop=self._loop,
             cache=Cache(loop=self._loop),
             ai_delay=config["ai"]["delay"],
+            game_actors=self._get_game_actors(self._loop),
+            game_updates=self._get_game_updates(),
         )
+        self._send_queue = SendQueue(
+            max_size=config["api"]["send_queue_size"],
+            overflow_policy=OverflowPolicies(config["api"]["send_queue_overflow_policy"]),
+        )
+
+    @classmethod
+    def _get_game_actors(cls, loop):
+        if cls._game_actors is None and config["game_actors"]["enabled"]:
+            cls._game_actors = GameActors(
+                loop=loop,
+                flush_delay=config["game_actors"]["flush_delay"],
+                idle_timeout=config["game_actors"]["idle_timeout"],
+            )
+        return cls._game_actors
+
+    @classmethod
+    def _get_game_updates(cls):
+        if cls._game_updates is None:
+            cls._game_updates = GameUpdates(
+                history_size=config["game_updates"]["history_size"],
+                max_games=config["game_updates"]["max_games"],
+            )
+        return cls._game_updates
+
+    @classmethod
+    async def stop_game_actors(cls):
+        if cls._game_actors is not None:
+            await cls._game_actors.stop()
 
     async def onMessage(self, payload, is_binary):
         message = {}
@@ -103,6 +143,7 @@ class AotWs(WebSocketServerProtocol):
             self._check_reconnect(validated_message)
             response = await self._api.process_message(validated_message)
             self._handle_id_change()
+            self._handle_game_change()
         except AotError as e:
             await self._send_error(e, message)
         except ValidationError as e:
@@ -135,6 +176,25 @@ class AotWs(WebSocketServerProtocol):
         self._id = self._api.id
         self._clients[self.id] = self
 
+    def _handle_game_change(self):
+        # The game of the connection is known once the player created or joined a lobby or
+        # reconnected.
+        if self._game_id == self._api.game_id:
+            return
+
+        self._leave_game()
+        if self._api.game_id is not None:
+            self._game_id = self._api.game_id
+            self._clients_by_game.setdefault(self._game_id, set()).add(self)
+
+    def _leave_game(self):
+        game_clients = self._clients_by_game.get(self._game_id)
+        if game_clients is not None:
+            game_clients.discard(self)
+            if not game_clients:
+                del self._clients_by_game[self._game_id]
+        self._game_id = None
+
     async def _send_response(self, response: WsResponse):
         if response.include_number_connected_clients:
             # The client making the info request is in the clients dict. We must not count it.
@@ -163,22 +223,84 @@ class AotWs(WebSocketServerProtocol):
         await asyncio.gather(*sent_responses)
 
     async def send_messages(self, messages):
+        await self._send_recorded_messages(
+            self._get_game_updates().record(messages, game_id=self._api.game_id)
+        )
+
+    async def _send_recorded_messages(self, messages):
+        if self._must_queue_messages:
+            self._queue_messages(messages)
+            return
+
+        game_updates = self._get_game_updates()
+        version = self._api.patches_base_version
+        self._api.game_version = game_updates.get_version(messages, self._api.game_version)
+
         sent_messages = []
-        for message in messages:
+        for message in game_updates.get_messages(messages, version):
             sent_messages.append(self._send_message(message))
         await asyncio.gather(*sent_messages)
 
     async def _send_message(self, message):
-        if isinstance(message, dict):
-            message = json.dumps(message, default=to_json)
+        message = self._encode_message(message)
         self.logger.debug(f"Sending to {self.id}: {message}")
-        message = message.encode("utf-8")
         # Must not use await here: sendMessage in the base class is not a coroutine.
         try:
             self.sendMessage(message)
         except Disconnected:
             self.logger.debug("Connection was closed, cannot send message.")
 
+    def _encode_message(self, message):
+        if isinstance(message, dict):
+            message = json.dumps(message, default=to_json)
+        return message.encode("utf-8")
+
+    def _prepare_messages(self, messages):
+        """Encode and frame messages once so they can be sent to many clients."""
+        return [self.factory.prepareMessage(self._encode_message(message)) for message in messages]
+
+    async def _send_prepared_messages(self, prepared_messages):
+        sent_messages = []
+        for prepared_message in prepared_messages:
+            sent_messages.append(self._send_prepared_message(prepared_message))
+        await asyncio.gather(*sent_messages)
+
+    async def _send_prepared_message(self, prepared_message):
+        self.logger.debug(f"Sending to {self.id}: {prepared_message.payload}")
+        # sendPreparedMessage writes the frame directly without checking the connection state.
+        if self.state != self.STATE_OPEN:
+            self.logger.debug("Connection was closed, cannot send message.")
+            return
+
+        self.sendPreparedMessage(prepared_message)
+
+    def pause_writing(self):
+        # The client doesn't read its messages fast enough: the next ones are queued.
+        self._writing_paused = True
+
+    def resume_writing(self):
+        self._writing_paused = False
+        if self._send_queue:
+            asyncio.ensure_future(self._flush_send_queue(), loop=self._loop)
+
+    @property
+    def _must_queue_messages(self):
+        # Messages are queued until the queue is flushed to keep their order.
+        return self._writing_paused or bool(self._send_queue)
+
+    def _queue_messages(self, messages):
+        try:
+            for message in messages:
+                self._send_queue.put(message)
+        except SendQueueOverflowError:
+            self.logger.warning(f"Too many messages waiting to be sent to {self.id}, closing.")
+            self.dropConnection(abort=True)
+
+    async def _flush_send_queue(self):
+        # Writing may have been paused again before the flush could run.
+        if not self._writing_paused:
+            await self._send_recorded_messages(self._send_queue.pop_all())
+
     async def onClose(self, was_clean, code, reason):  # pragma: no cover  # noqa: N802
         self.logger.info(
             f"WS n°{self.id} was closed cleanly? {was_clean} with code {code} and reason {reason}",
@@ -194,6 +316,7 @@ class AotWs(WebSocketServerProtocol):
             )
 
         self._clients.pop(self.id, None)
+        self._leave_game()
 
     async def _disconnect_player(self):
         self.logger.debug(f"Disconnecting player {self.id} from game {self._api.game_id}")
@@ -224,12 +347,31 @@ class AotWs(WebSocketServerProtocol):
         if excluded_players is None:
             excluded_players = set()
 
+        game_updates = self._get_game_updates()
+        messages = game_updates.record(messages)
+        new_version = game_updates.get_version(messages)
+        # The messages are the same for all players who have the same version of the game: they are
+        # serialized and framed only once per version.
+        prepared_messages_by_version = {}
         sent_messages = []
 
-        for player_id in await self._api.player_ids:
-            player = self._clients.get(player_id, None)
-            if player is not None and player_id not in excluded_players:
-                sent_messages.append(player.send_messages(messages))
+        for player in self._clients_by_game.get(self._api.game_id, ()):
+            if player.id in excluded_players:
+                continue
+            elif player._must_queue_messages:
+                player._queue_messages(messages)
+                continue
+
+            version = player._api.patches_base_version
+            if version not in prepared_messages_by_version:
+                prepared_messages_by_version[version] = self._prepare_messages(
+                    game_updates.get_messages(messages, version)
+                )
+            if new_version is not None:
+                player._api.game_version = new_version
+            sent_messages.append(
+                player._send_prepared_messages(prepared_messages_by_version[version])
+            )
 
         await asyncio.gather(*sent_messages)
 
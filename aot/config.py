@@ -29,14 +29,26 @@ class Config:
     ENV_VARS = {
         "API_ALLOW_DEBUG",
         "API_HOST",
+        "API_SEND_QUEUE_OVERFLOW_POLICY",
+        "API_SEND_QUEUE_SIZE",
         "API_WS_PORT",
         "AI_DELAY",
+        "CACHE_BACKEND",
         "CACHE_HOST",
+        "CACHE_LIVE_GAMES",
         "CACHE_PORT",
+        "CACHE_PREVIOUS_SIGN_KEYS",
         "CACHE_SIGN_KEY",
+        "CACHE_SIGN_KEY_ID",
+        "CACHE_STATS_RECONCILE_INTERVAL",
         "CACHE_TIMEOUT",
         "CACHE_TTL",
         "ENV",
+        "GAME_ACTORS",
+        "GAME_ACTORS_FLUSH_DELAY",
+        "GAME_ACTORS_IDLE_TIMEOUT",
+        "GAME_UPDATES_HISTORY_SIZE",
+        "GAME_UPDATES_MAX_GAMES",
         "LOG_LEVEL",
         "SENTRY_DSN",
         "VERSION",
@@ -66,6 +78,14 @@ class Config:
         cache_sign_key = self.env.str("CACHE_SIGN_KEY", "")
         if env != "development" and not cache_sign_key:
             raise EnvironmentError("You must supply a CACHE_SIGN_KEY env var")
+        cache_sign_key_id = self.env.int("CACHE_SIGN_KEY_ID", 0)
+        if not 0 <= cache_sign_key_id <= 255:
+            raise EnvironmentError("CACHE_SIGN_KEY_ID must be between 0 and 255")
+        send_queue_overflow_policy = self.env.str("API_SEND_QUEUE_OVERFLOW_POLICY", "close")
+        if send_queue_overflow_policy not in {"close", "drop_oldest", "drop_newest"}:
+            raise EnvironmentError(
+                "API_SEND_QUEUE_OVERFLOW_POLICY must be close, drop_oldest or drop_newest"
+            )
 
         self._config = make_immutable(
             {
@@ -74,20 +94,58 @@ class Config:
                     # Binding to all interfaces, bandit don't allow this (#104)
                     "host": self.env.str("API_HOST", "0.0.0.0"),  # noqa: S104
                     "min_elapsed_time_to_consider": 8,  # In seconds.
+                    # Messages kept for each client that doesn't read them fast enough and what
+                    # to do with a new one when they are too many: close the connection (the
+                    # client will reconnect), drop the oldest message or drop the new one.
+                    "send_queue_overflow_policy": send_queue_overflow_policy,
+                    "send_queue_size": self.env.int("API_SEND_QUEUE_SIZE", 64),
                     "ws_port": self.env.int("API_WS_PORT", 8181),
                 },
                 "ai": {"delay": self.env.int("AI_DELAY", 5)},
                 "cache": {
+                    # Either redis or memory. The memory backend can only be used if the API runs in
+                    # a single process.
+                    "backend": self.env.str("CACHE_BACKEND", "redis"),
                     "host": self.env.str("CACHE_HOST", "127.0.0.1"),
+                    # Number of games kept deserialized in the memory of each worker.
+                    "live_games": self.env.int("CACHE_LIVE_GAMES", 256),
                     "port": self.env.int("CACHE_PORT", 6379),
                     # Sign key must be of type bytes, not str.
                     "sign_key": cache_sign_key.encode("utf-8"),
+                    # Id of the sign key, stored with the signed data. When the sign key changes,
+                    # give the new one another id and keep the previous ones with their ids in
+                    # CACHE_PREVIOUS_SIGN_KEYS (id=key,id=key) until the data signed with them
+                    # expired.
+                    "sign_key_id": cache_sign_key_id,
+                    "previous_sign_keys": {
+                        int(key_id): key.encode("utf-8")
+                        for key_id, key in self.env.dict("CACHE_PREVIOUS_SIGN_KEYS", {}).items()
+                    },
+                    # Interval in seconds between two reconciliations of the statistics of the
+                    # cache with its content. 0 disables them.
+                    "stats_reconcile_interval": self.env.int(
+                        "CACHE_STATS_RECONCILE_INTERVAL", 10 * 60
+                    ),
                     "timeout": self.env.int("CACHE_TIMEOUT", 5),
                     "ttl": self.env.int("CACHE_TTL", 2 * 24 * 60 * 60),  # 2 days
                 },
                 # Amount of time to wait for pending futures before forcing them to shutdown.
                 "cleanup_timeout": self.env.int("CLEANUP_TIMEOUT", 5),
                 "env": env,
+                # Keep each game in memory in a task that saves it periodically.
+                "game_actors": {
+                    "enabled": self.env.bool("GAME_ACTORS", False),
+                    "flush_delay": self.env.int("GAME_ACTORS_FLUSH_DELAY", 5),  # In seconds.
+                    "idle_timeout": self.env.int(
+                        "GAME_ACTORS_IDLE_TIMEOUT", 10 * 60
+                    ),  # In seconds.
+                },
+                # Global states of the games kept to send the next ones as patches.
+                "game_updates": {
+                    # Number of versions kept for each game. 0 always sends the full state.
+                    "history_size": self.env.int("GAME_UPDATES_HISTORY_SIZE", 8),
+                    "max_games": self.env.int("GAME_UPDATES_MAX_GAMES", 1024),
+                },
                 "log": {"level": self.env.str("LOG_LEVEL", None)},
                 "sentry_dsn": self.env.str("SENTRY_DSN", None),
                 "version": self.env.str("VERSION", "latest"),
@@ -19,37 +19,39 @@
 
 from collections import namedtuple
 
-from .pathfinding import a_star
-
 IACardResult = namedtuple("IAResult", "card square")
 
 
 def distance_covered(start_square, proposed_destination_square, goal_square, board):
-    distance_from_start = len(a_star(start_square, goal_square, board))
-    distance_from_destination = len(a_star(proposed_destination_square, goal_square, board))
-    return distance_from_start - distance_from_destination
+    distances = board.distances.get_distance_field([goal_square])
+    return distances[start_square] - distances[proposed_destination_square]
 
 
 def find_move_to_play(hand, current_square, goal_squares, board):
+    # Distance from each square to the closest goal square. It is computed once per board
+    # definition so scoring a move is only two lookups.
+    distances = board.distances.get_distance_field(goal_squares)
+    current_distance = distances[current_square]
     best_distance = 0
     best_card = None
     best_square = None
-    for goal_square in goal_squares:
-        for card in hand:
-            for square in card.move(current_square):
-                if square in goal_squares:
-                    # We can't find a better move. Stopping here.
-                    return IACardResult(card=card, square=square)
-
-                distance = distance_covered(current_square, square, goal_square, board)
-                if (
-                    distance > best_distance
-                    or should_make_null_move(distance, best_distance, card, best_card)
-                    or is_card_cheaper(distance, best_distance, card, best_card)
-                ):
-                    best_card = card
-                    best_square = square
-                    best_distance = distance
+    for card in hand:
+        # Squares are generated lazily: we don't compute the other moves of the card once we
+        # reached a goal.
+        for square in card.iter_moves(current_square):
+            if square in goal_squares:
+                # We can't find a better move. Stopping here.
+                return IACardResult(card=card, square=square)
+
+            distance = current_distance - distances[square]
+            if (
+                distance > best_distance
+                or should_make_null_move(distance, best_distance, card, best_card)
+                or is_card_cheaper(distance, best_distance, card, best_card)
+            ):
+                best_card = card
+                best_square = square
+                best_distance = distance
 
     return IACardResult(card=best_card, square=best_square)
 
@@ -17,17 +17,22 @@
 # along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
 ################################################################################
 
+import heapq
+from functools import lru_cache
+
 
 def a_star(start, goal, board, movements_types=None):
     """A* algorithom to find shortest path from start to goal.
 
     Take and adapted from https://en.wikipedia.org/wiki/A*_search_algorithm#Pseudocode
+
+    The open set is a binary heap ordered by fscore. Ties are broken by the order in which nodes
+    were discovered so we always expand the same node as a linear scan of the fscores would.
     """
+    heuristic = get_heuristic_table(board)
+    goal_x, goal_y = goal.x, goal.y
     # The set of nodes already evaluated
     closed_set = set()
-    # The set of currently discovered nodes still to be evaluated.
-    # Initially, only the start node is known.
-    open_set = {start}
     # For each node, which node it can most efficiently be reached from.
     # If a node can be reached from many nodes, cameFrom will eventually contain the
     # most efficient previous step.
@@ -37,18 +42,22 @@ def a_star(start, goal, board, movements_types=None):
     gscore = {}
     # The cost of going from start to start is zero.
     gscore[start] = 0
-    # For each node, the total cost of getting from the start node to the goal
-    # by passing by that node. That value is partly known, partly heuristic.
-    fscore = {}
-    # For the first node, that value is completely heuristic.
-    fscore[start] = heuristic_cost_estimate(start, goal, board)
-
-    while len(open_set) > 0:
-        current = get_node_lowest_fscore(fscore, open_set)
+    # For each node, the order in which it was discovered. Used to break ties between nodes
+    # with the same fscore.
+    discovery_order = {start: 0}
+    # The currently discovered nodes still to be evaluated, stored as (fscore, discovery order,
+    # node). Initially, only the start node is known and its fscore is completely heuristic.
+    # When a better path to a node is found, a new entry is pushed: the outdated one will be
+    # popped after it and ignored since the node will be in closed_set by then.
+    open_heap = [(heuristic[abs(start.x - goal_x)][abs(start.y - goal_y)], 0, start)]
+
+    while open_heap:
+        _, _, current = heapq.heappop(open_heap)
+        if current in closed_set:
+            continue
         if current == goal:
             return reconstruct_path(came_from, current)
 
-        open_set.remove(current)
         closed_set.add(current)
         for neighbor in board.get_neighbors(current, movements_types=movements_types):
             if neighbor in closed_set:
@@ -56,15 +65,18 @@ def a_star(start, goal, board, movements_types=None):
             # The distance from start to a neighbor. The dist between current and neighbors is
             # always 1.
             tentative_gscore = gscore[current] + 1
-            if neighbor not in open_set:  # Discover a new node
-                open_set.add(neighbor)
+            if neighbor not in discovery_order:  # Discover a new node
+                discovery_order[neighbor] = len(discovery_order)
             elif tentative_gscore >= gscore[neighbor]:
                 continue  # This is not a better path.
 
             # This path is the best until now. Record it!
             came_from[neighbor] = current
             gscore[neighbor] = tentative_gscore
-            fscore[neighbor] = gscore[neighbor] + heuristic_cost_estimate(neighbor, goal, board)
+            fscore = (
+                tentative_gscore + heuristic[abs(neighbor.x - goal_x)][abs(neighbor.y - goal_y)]
+            )
+            heapq.heappush(open_heap, (fscore, discovery_order[neighbor], neighbor))
 
     return []  # pragma: no cover
 
@@ -76,8 +88,10 @@ def heuristic_cost_estimate(start, goal, board):
 
     We compute the absolute difference between the two abscissas and the two ordinates.
     """
-    xx = abs(start.x - goal.x)
-    yy = abs(start.y - goal.y)
+    return _heuristic_cost(abs(start.x - goal.x), abs(start.y - goal.y))
+
+
+def _heuristic_cost(xx, yy):
     if xx == yy:
         # Moving in diagonal
         return 10 * xx
@@ -88,15 +102,19 @@ def heuristic_cost_estimate(start, goal, board):
             return 10 * (xx + yy - 1)
 
 
-def get_node_lowest_fscore(fscore, open_set):
-    score_min = float("inf")
-    square_min = None
-    for square, score in fscore.items():
-        if score < score_min and square in open_set:
-            score_min = score
-            square_min = square
+def get_heuristic_table(board):
+    """Return the table of heuristic costs for the board.
+
+    The heuristic only depends on the absolute differences between the coordinates of the two
+    squares, so the table is indexed by them: ``table[abs(dx)][abs(dy)]``. It is computed once
+    for each board size.
+    """
+    return _build_heuristic_table(board.width, board.height)
+
 
-    return square_min
+@lru_cache(maxsize=None)
+def _build_heuristic_table(width, height):
+    return tuple(tuple(_heuristic_cost(xx, yy) for yy in range(height)) for xx in range(width))
 
 
 def reconstruct_path(came_from, current):
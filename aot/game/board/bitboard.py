@@ -0,0 +1,109 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+"""Bitboards: sets of squares stored as bits of a Python integer.
+
+The square at (x, y) is the bit ``y * stride + x`` where the stride is the width of the board plus
+one. The extra column is never part of the board, so shifting a set of squares by one column can't
+make a square wrap from one row to the next: it lands in this column and is removed by the mask of
+the squares of the board.
+"""
+
+
+class BitboardGeometry:
+    """Positions of the squares of a layout in bitboards and moves on these bitboards.
+
+    The moves take a bitboard of origins and return the bitboard of all the squares reachable from
+    at least one of them in one move, whatever their color or whether they are occupied. Colors
+    and occupation are applied by the caller with the masks maintained by the board.
+    """
+
+    def __init__(self, xs, ys, width):
+        self._stride = width + 1
+        self._bits = tuple(1 << (y * self._stride + x) for x, y in zip(xs, ys))
+        self._ids_by_position = {
+            bit.bit_length() - 1: square_id for square_id, bit in enumerate(self._bits)
+        }
+        self._squares_mask = 0
+        for bit in self._bits:
+            self._squares_mask |= bit
+
+    def get_mask(self, square_ids):
+        """Return the bitboard containing the given squares."""
+        mask = 0
+        for square_id in square_ids:
+            mask |= self._bits[square_id]
+        return mask
+
+    def iter_ids(self, mask):
+        """Yield the ids of the squares of the bitboard."""
+        ids_by_position = self._ids_by_position
+        while mask:
+            lowest_bit = mask & -mask
+            yield ids_by_position[lowest_bit.bit_length() - 1]
+            mask ^= lowest_bit
+
+    def line_moves(self, origins):
+        stride = self._stride
+        return (
+            origins << 1 | origins >> 1 | origins << stride | origins >> stride
+        ) & self._squares_mask
+
+    def diagonal_moves(self, origins):
+        up = origins << self._stride
+        down = origins >> self._stride
+        return (up << 1 | up >> 1 | down << 1 | down >> 1) & self._squares_mask
+
+    def knight_moves(self, origins):
+        """Return the squares a knight can jump to from the origins.
+
+        Like Board.layout.knight_destinations, the squares the knight goes through must exist. So
+        we move one step at a time (or two rows at a time since the vertical move doesn't require
+        the square in between) and remove the squares outside the board after each step.
+        """
+        squares = self._squares_mask
+        two_rows = 2 * self._stride
+
+        # Two squares vertically and one horizontally, in any order.
+        two_rows_moves = (origins << two_rows | origins >> two_rows) & squares
+        one_column_moves = (origins << 1 | origins >> 1) & squares
+        vertical_jumps = (
+            two_rows_moves << 1
+            | two_rows_moves >> 1
+            | one_column_moves << two_rows
+            | one_column_moves >> two_rows
+        )
+
+        # One square vertically and two horizontally.
+        one_row_moves = (origins << self._stride | origins >> self._stride) & squares
+        right_moves = (one_row_moves << 1) & squares
+        left_moves = (one_row_moves >> 1) & squares
+        horizontal_jumps = right_moves << 1 | left_moves >> 1
+
+        return (vertical_jumps | horizontal_jumps) & squares
+
+    @property
+    def bits(self):
+        """For each square, its bitboard."""
+        return self._bits
+
+    @property
+    def squares_mask(self):
+        """Bitboard of all the squares of the layout."""
+        return self._squares_mask
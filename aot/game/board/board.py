@@ -17,73 +17,157 @@
 # along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
 ################################################################################
 
-from .square import Color, Square, SquareSet
+from .distances import get_distance_oracle
+from .layout import get_layout, is_walkable_color
+from .square import Square, SquareSet
 
 
 class Board:
+    """Board of a game.
+
+    The geometry of the board is stored in a layout shared with all the games using the same board
+    definition. The board itself only stores what can change during a game in arrays indexed by
+    the ids of the squares: their colors and whether they are occupied. Squares are views on these
+    arrays, they are created the first time they are accessed.
+
+    The board also maintains a bitboard of the occupied squares and one bitboard per color. They
+    are used to compute the moves of the cards with a few bit operations.
+    """
+
     def __init__(self, board_description):
-        self._board = {}
+        self._init(get_layout(board_description))
+
+    @classmethod
+    def from_layout(cls, layout):
+        """Create a board in its initial state from an existing layout."""
+        board = cls.__new__(cls)
+        board._init(layout)
+        return board
+
+    def _init(self, layout):
+        self._layout = layout
+        self._colors = list(self._layout.original_colors)
+        self._occupied = bytearray(self._layout.initially_occupied)
+        self._occupied_mask = self._layout.initially_occupied_mask
+        self._colors_masks = dict(self._layout.original_colors_masks)
+        # Incremented each time a square changes.
+        self._version = 0
+        # Ids of the squares that were updated.
         self._updated_squares = []
-        for square in board_description["squares"]:
-            type_ = square["type"]
-            try:
-                color = Color[board_description["squares-types-to-colors"].get(type_)]
-            except KeyError:
-                # This is an empty square, existing only to fill the board definition and to
-                # calculate some moves.
-                color = None
-
-            x = square["x"]
-            y = square["y"]
-            self._board[(x, y)] = Square(
-                x,
-                y,
-                color,
-                is_occupied=square["id"] is None,
-                is_arrival=square["is-arrival"],
-                is_departure=square["is-departure"],
-            )
+        self._squares = [None] * len(self._layout)
+        # Oracle of the boards on which some squares can't be used in the same paths anymore.
+        self._distances = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Squares are only views on the arrays, no need to pickle them.
+        del state["_squares"]
+        # Distances are computed again on demand.
+        del state["_distances"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._squares = [None] * len(self._layout)
+        self._distances = None
+
+    def _get_square(self, square_id):
+        square = self._squares[square_id]
+        if square is None:
+            square = Square._create_view(self, square_id)
+            self._squares[square_id] = square
+
+        return square
+
+    def _set_color(self, square_id, color):
+        bit = self._layout.bitboard.bits[square_id]
+        previous_color = self._colors[square_id]
+        self._colors_masks[previous_color] &= ~bit
+        self._colors_masks[color] = self._colors_masks.get(color, 0) | bit
+        self._colors[square_id] = color
+        self._version += 1
+
+    def _set_occupied(self, square_id, occupied):
+        bit = self._layout.bitboard.bits[square_id]
+        if occupied:
+            self._occupied_mask |= bit
+        else:
+            self._occupied_mask &= ~bit
+        self._occupied[square_id] = occupied
+        self._version += 1
 
     def change_color_of_square(self, x, y, color):
         updated_square = self[x, y]
         updated_square.color = color
-        self._updated_squares.append(updated_square)
+        self._updated_squares.append(updated_square._id)
 
     def free_all_squares(self):
         """Can be used in some tests to move outside the "normal" board on hidden squares."""
-        for square in self._board.values():
-            square.occupied = False
+        self._occupied = bytearray(len(self._occupied))
+        self._occupied_mask = 0
+        self._version += 1
 
     def get_line_squares(self, square, colors):
-        squares = SquareSet(colors)
-        squares.add(self[square.x - 1, square.y])
-        squares.add(self[square.x + 1, square.y])
-        squares.add(self[square.x, square.y - 1])
-        squares.add(self[square.x, square.y + 1])
-        return squares
+        return SquareSet(
+            colors,
+            initial_squares=self._get_squares(self._layout.line_neighbors, square),
+        )
 
     def get_diagonal_squares(self, square, colors):
-        squares = SquareSet(colors)
-        squares.add(self[square.x - 1, square.y - 1])
-        squares.add(self[square.x + 1, square.y - 1])
-        squares.add(self[square.x - 1, square.y + 1])
-        squares.add(self[square.x + 1, square.y + 1])
-        return squares
+        return SquareSet(
+            colors,
+            initial_squares=self._get_squares(self._layout.diagonal_neighbors, square),
+        )
+
+    def _get_squares(self, adjacency_table, square):
+        square_id = self.get_square_id(square)
+        if square_id is None:
+            return ()
+
+        return [self._get_square(adjacent_id) for adjacent_id in adjacency_table[square_id]]
 
     def get_neighbors(self, square, movements_types=None):
+        square_id = self.get_square_id(square)
+        if square_id is None:
+            return set()
+
         neighbors = set()
         if movements_types is None or "line" in movements_types:
-            neighbors.update(self.get_line_squares(square, [Color.ALL]))
+            neighbors.update(self._get_walkable_squares(self._layout.line_neighbors[square_id]))
         if movements_types is None or "diagonal" in movements_types:
-            neighbors.update(self.get_diagonal_squares(square, [Color.ALL]))
+            neighbors.update(self._get_walkable_squares(self._layout.diagonal_neighbors[square_id]))
         return neighbors
 
+    def _get_walkable_squares(self, square_ids):
+        return (
+            self._get_square(square_id)
+            for square_id in square_ids
+            if is_walkable_color(self._colors[square_id])
+        )
+
+    def get_colors_mask(self, colors):
+        """Return the bitboard of the squares with a color in colors."""
+        mask = 0
+        for color in colors:
+            mask |= self._colors_masks.get(color, 0)
+        return mask
+
+    def get_squares_of_mask(self, mask):
+        """Return the squares of a bitboard."""
+        return [self._get_square(square_id) for square_id in self._layout.bitboard.iter_ids(mask)]
+
+    def get_square_id(self, square):
+        """Return the id of the square of this board with the same coordinates as square."""
+        return self._layout.get_id(square.x, square.y)
+
+    def get_square_by_id(self, square_id):
+        return self._get_square(square_id)
+
     def get_square_for_player_with_index(self, index):
-        departure_squares = [square for square in self._board.values() if square.is_departure]
-        return departure_squares[index]
+        return self._get_square(self._layout.departures[index])
 
     def __len__(self):  # pragma: no cover
-        return len(self._board)
+        return len(self._layout)
 
     def __getitem__(self, coords):
         """Return the square at the given coordinates.
@@ -98,16 +182,74 @@ class Board:
             return
 
         x, y = coords
-        try:
-            return self._board[(x, y)]
-        except KeyError:
+        square_id = self._layout.get_id(x, y)
+        if square_id is None:
             return None
 
+        return self._get_square(square_id)
+
+    def _get_walkability_changes(self):
+        return frozenset(
+            square_id
+            for square_id in self._updated_squares
+            if is_walkable_color(self._colors[square_id])
+            != is_walkable_color(self._layout.original_colors[square_id])
+        )
+
+    @property
+    def bitboard(self):
+        return self._layout.bitboard
+
+    @property
+    def distances(self):
+        """Oracle to get the shortest distances between squares of this board.
+
+        Oracles are shared between boards as long as the color of their squares didn't change in
+        a way that changes which squares can be part of a path. Otherwise, the board keeps an
+        oracle for its own changes until they change again.
+        """
+        walkability_changes = self._get_walkability_changes()
+        if not walkability_changes:
+            return get_distance_oracle(self._layout)
+
+        if self._distances is None or self._distances.walkability_changes != walkability_changes:
+            self._distances = get_distance_oracle(self._layout).with_walkability_changes(
+                walkability_changes
+            )
+        return self._distances
+
+    @property
+    def layout(self):
+        return self._layout
+
+    @property
+    def occupied_mask(self):
+        """Bitboard of the occupied squares."""
+        return self._occupied_mask
+
+    @property
+    def version(self):
+        """Number of changes of the squares (color or occupation) since the start of the game.
+
+        It can be used to know whether something computed from the squares is still valid.
+        """
+        return self._version
+
+    @property
+    def width(self):
+        """Number of columns of the board, ie the greatest abscissa plus one."""
+        return self._layout.width
+
+    @property
+    def height(self):
+        """Number of rows of the board, ie the greatest ordinate plus one."""
+        return self._layout.height
+
     @property
     def aim(self):
-        return [square for square in self._board.values() if square.is_arrival]
+        return [self._get_square(square_id) for square_id in self._layout.arrivals]
 
     @property
     def updated_squares(self) -> tuple:
         """Tuple of square that were updated (eg changed color) since the start of the game."""
-        return tuple(self._updated_squares)
+        return tuple(self._get_square(square_id) for square_id in self._updated_squares)
@@ -0,0 +1,203 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import math
+from array import array
+from functools import lru_cache
+
+from .layout import is_walkable_color
+
+#: Distance to a square that cannot be reached.
+UNREACHABLE = math.inf
+
+MOVEMENTS_KEYS = (("line",), ("diagonal",), ("diagonal", "line"))
+
+
+class DistanceOracle:
+    """Shortest distances between the squares of a layout.
+
+    Paths follow the same rules as Board.get_neighbors: a path can go to any adjacent square
+    (in line or in diagonal) with a color, whether it is occupied or not. Since this doesn't
+    depend on the state of the game, an oracle is shared by all boards with the same geometry.
+    Use :func:`get_distance_oracle` to get it.
+
+    Distances between two squares are stored in one all-pairs table per combination of
+    movements types. The tables are arrays of small integers indexed by square id. A row (the
+    distances from one square to all the others) is filled the first time the square is used as a
+    start, so the tables are complete after a few games and don't cost anything at startup.
+    """
+
+    def __init__(self, layout, walkability_changes=frozenset(), adjacent_squares=None):
+        self._layout = layout
+        self.walkability_changes = walkability_changes
+        walkable = [is_walkable_color(color) for color in layout.original_colors]
+        # Squares whose color was changed during the game can only be in or out of the set.
+        for square_id in walkability_changes:
+            walkable[square_id] = not walkable[square_id]
+
+        # A path can't be longer than the number of squares so we only use 2 bytes per distance
+        # for big boards.
+        self._typecode = "B" if len(layout) < 0xFF else "H"
+        self._unreachable = 0xFF if self._typecode == "B" else 0xFFFF
+        if adjacent_squares is None:
+            adjacent_squares = {
+                ("line",): layout.line_neighbors,
+                ("diagonal",): layout.diagonal_neighbors,
+                ("diagonal", "line"): tuple(
+                    diagonal_neighbors + line_neighbors
+                    for diagonal_neighbors, line_neighbors in zip(
+                        layout.diagonal_neighbors, layout.line_neighbors
+                    )
+                ),
+            }
+        self._adjacent_squares = adjacent_squares
+        self._neighbors = {
+            movements_key: tuple(
+                tuple(neighbor_id for neighbor_id in neighbors if walkable[neighbor_id])
+                for neighbors in adjacent_squares[movements_key]
+            )
+            for movements_key in MOVEMENTS_KEYS
+        }
+        self._tables = {movements_key: {} for movements_key in MOVEMENTS_KEYS}
+
+        # Squares from which we can go to each square. It is used to search from the goals:
+        # any square can be left but only walkable ones can be reached.
+        self._predecessors = tuple(
+            neighbors if walkable[square_id] else ()
+            for square_id, neighbors in enumerate(adjacent_squares[("diagonal", "line")])
+        )
+
+        self._fields = {}
+
+    def with_walkability_changes(self, walkability_changes):
+        """Return an oracle in which the squares of ``walkability_changes`` are toggled.
+
+        Toggled squares could be part of a path at the start of the game but cannot anymore or the
+        other way around. The adjacency of the layout is shared with this oracle but the distances
+        are not: they are computed on demand, like for a new layout. Boards keep the oracle of
+        their own changes so it is never shared between games.
+        """
+        if walkability_changes == self.walkability_changes:
+            return self
+
+        return DistanceOracle(self._layout, walkability_changes, self._adjacent_squares)
+
+    def get_distance_field(self, goal_squares):
+        """Return the distance from every square to the closest square in ``goal_squares``.
+
+        Fields are computed once for each set of goals.
+        """
+        goals = frozenset(self._layout.get_id(square.x, square.y) for square in goal_squares)
+        if goals not in self._fields:
+            distances = [UNREACHABLE] * len(self._layout)
+            for square_id, distance in _breadth_first_search(goals, self._predecessors).items():
+                distances[square_id] = distance
+            self._fields[goals] = DistanceField(self._layout, distances)
+
+        return self._fields[goals]
+
+    def get_distance(self, start, goal, movements_types=None):
+        """Return the number of moves required to go from start to goal.
+
+        Args:
+            movements_types: types of the moves that can be used, among line and diagonal. All
+                types are used if it is not given.
+        """
+        movements_key = _get_movements_key(movements_types)
+        start_id = self._layout.get_id(start.x, start.y)
+        goal_id = self._layout.get_id(goal.x, goal.y)
+        if movements_key not in self._tables:
+            # None of the movements types allows to move to a neighbor.
+            return 0 if start_id == goal_id else UNREACHABLE
+
+        row = self._tables[movements_key].get(start_id)
+        if row is None:
+            row = self._compute_row(start_id, movements_key)
+
+        distance = row[goal_id]
+        return UNREACHABLE if distance == self._unreachable else distance
+
+    def _compute_row(self, start_id, movements_key):
+        row = array(self._typecode, [self._unreachable]) * len(self._layout)
+        distances = _breadth_first_search([start_id], self._neighbors[movements_key])
+        for square_id, distance in distances.items():
+            row[square_id] = distance
+
+        self._tables[movements_key][start_id] = row
+        return row
+
+
+class DistanceField:
+    """Distances from the squares of a board to a set of goals, indexed by square."""
+
+    __slots__ = ("_distances", "_layout")
+
+    def __init__(self, layout, distances):
+        self._layout = layout
+        self._distances = distances
+
+    def __getitem__(self, square):
+        return self._distances[self._layout.get_id(square.x, square.y)]
+
+
+def _get_movements_key(movements_types):
+    if movements_types is None:
+        return ("diagonal", "line")
+
+    return tuple(
+        sorted(
+            movements_type
+            for movements_type in set(movements_types)
+            if movements_type in ("line", "diagonal")
+        )
+    )
+
+
+def _breadth_first_search(sources, next_squares):
+    """Compute the number of steps from the sources to each square reachable from them.
+
+    Args:
+        sources: ids of the squares to start from.
+        next_squares: for each square id, the ids of the squares one can go to in one step.
+    """
+    distances = dict.fromkeys(sources, 0)
+    frontier = list(sources)
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for square_id in frontier:
+            for next_id in next_squares[square_id]:
+                if next_id not in distances:
+                    distances[next_id] = distance
+                    next_frontier.append(next_id)
+        frontier = next_frontier
+
+    return distances
+
+
+@lru_cache(maxsize=32)
+def get_distance_oracle(layout):
+    """Return the oracle shared by all the boards of the layout whose squares can still be used
+    in the same paths as at the start of the game.
+
+    Boards on which this changed derive their own oracle with
+    :meth:`DistanceOracle.with_walkability_changes`.
+    """
+    return DistanceOracle(layout)
@@ -0,0 +1,263 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+from array import array
+
+from ..config.boards import load_board
+from .bitboard import BitboardGeometry
+from .color import Color, all_colors
+
+#: Value of the grid where the board has no square.
+NO_SQUARE = -1
+
+LINE_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIAGONAL_DIRECTIONS = ((-1, -1), (1, -1), (-1, 1), (1, 1))
+
+
+class BoardLayout:
+    """Geometry of a board definition: everything about the board that doesn't change in a game.
+
+    Each square has an id: its index in the board definition. The properties of the squares are
+    stored in tuples indexed by these ids and a dense grid gives the id of the square at each
+    coordinates. The squares next to each square (in line or in diagonal) and the squares a knight
+    can jump to are also precomputed as tuples of ids. Finally, the layout gives the position of
+    each square in bitboards (see :mod:`aot.game.board.bitboard`).
+
+    A layout is immutable and shared by all the boards created from the same definition. Use
+    :func:`get_layout` to get it instead of creating it directly. When a board is pickled, its
+    layout is only pickled as a reference to its definition.
+    """
+
+    def __init__(self, board_description):
+        self._name = board_description.get("name")
+        squares_types_to_colors = board_description["squares-types-to-colors"]
+        xs = []
+        ys = []
+        original_colors = []
+        initially_occupied = []
+        is_arrival = []
+        is_departure = []
+        for square in board_description["squares"]:
+            try:
+                color = Color[squares_types_to_colors.get(square["type"])]
+            except KeyError:
+                # This is an empty square, existing only to fill the board definition and to
+                # calculate some moves.
+                color = None
+
+            xs.append(square["x"])
+            ys.append(square["y"])
+            original_colors.append(color)
+            initially_occupied.append(square["id"] is None)
+            is_arrival.append(square["is-arrival"])
+            is_departure.append(square["is-departure"])
+
+        self._xs = tuple(xs)
+        self._ys = tuple(ys)
+        self._original_colors = tuple(original_colors)
+        self._initially_occupied = bytes(initially_occupied)
+        self._is_arrival = tuple(is_arrival)
+        self._is_departure = tuple(is_departure)
+        self._arrivals = tuple(square_id for square_id, arrival in enumerate(is_arrival) if arrival)
+        self._departures = tuple(
+            square_id for square_id, departure in enumerate(is_departure) if departure
+        )
+
+        self._width = max(xs) + 1
+        self._height = max(ys) + 1
+        self._grid = array("i", [NO_SQUARE]) * (self._width * self._height)
+        for square_id, (x, y) in enumerate(zip(xs, ys)):
+            self._grid[y * self._width + x] = square_id
+
+        self._line_neighbors = self._build_adjacency_table(LINE_DIRECTIONS)
+        self._diagonal_neighbors = self._build_adjacency_table(DIAGONAL_DIRECTIONS)
+        self._knight_destinations = tuple(
+            self._get_knight_destinations(x, y) for x, y in zip(xs, ys)
+        )
+        self._bitboard = BitboardGeometry(self._xs, self._ys, self._width)
+        self._initially_occupied_mask = self._bitboard.get_mask(
+            square_id for square_id, occupied in enumerate(initially_occupied) if occupied
+        )
+        self._original_colors_masks = {}
+        for square_id, color in enumerate(original_colors):
+            self._original_colors_masks[color] = (
+                self._original_colors_masks.get(color, 0) | self._bitboard.bits[square_id]
+            )
+
+    def _build_adjacency_table(self, directions):
+        return tuple(
+            tuple(
+                square_id
+                for square_id in (self.get_id(x + dx, y + dy) for dx, dy in directions)
+                if square_id is not None
+            )
+            for x, y in zip(self._xs, self._ys)
+        )
+
+    def _get_knight_destinations(self, x, y):
+        """Return the ids of the squares a knight can jump to from (x, y).
+
+        A knight must be able to reach its destination one step at a time: either two steps
+        vertically and one horizontally (in any order) or one step vertically and two
+        horizontally. The squares it jumps over must exist but can be of any color.
+        """
+        destinations = []
+        for dy in (2, -2):
+            for dx in (1, -1):
+                destination = self.get_id(x + dx, y + dy)
+                if destination is not None and (
+                    self.get_id(x, y + dy) is not None or self.get_id(x + dx, y) is not None
+                ):
+                    destinations.append(destination)
+
+        for dy in (1, -1):
+            if self.get_id(x, y + dy) is None:
+                continue
+            for dx in (1, -1):
+                destination = self.get_id(x + 2 * dx, y + dy)
+                if destination is not None and self.get_id(x + dx, y + dy) is not None:
+                    destinations.append(destination)
+
+        return tuple(destinations)
+
+    def __reduce__(self):
+        if self._name is None:  # pragma: no cover
+            return super().__reduce__()
+
+        return get_layout_by_name, (self._name,)
+
+    def __len__(self):
+        return len(self._xs)
+
+    def get_id(self, x, y):
+        """Return the id of the square at the given coordinates or None if there is none."""
+        if x is None or y is None or not (0 <= x < self._width and 0 <= y < self._height):
+            return None
+
+        square_id = self._grid[y * self._width + x]
+        return None if square_id == NO_SQUARE else square_id
+
+    @property
+    def arrivals(self):
+        """Ids of the arrival squares."""
+        return self._arrivals
+
+    @property
+    def bitboard(self):
+        return self._bitboard
+
+    @property
+    def departures(self):
+        """Ids of the departure squares, in the order of the board definition."""
+        return self._departures
+
+    @property
+    def diagonal_neighbors(self):
+        """For each square, the ids of the squares next to it in diagonal."""
+        return self._diagonal_neighbors
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def initially_occupied(self):
+        """For each square, 1 if it is occupied when the game starts, 0 otherwise."""
+        return self._initially_occupied
+
+    @property
+    def initially_occupied_mask(self):
+        return self._initially_occupied_mask
+
+    @property
+    def is_arrival(self):
+        return self._is_arrival
+
+    @property
+    def is_departure(self):
+        return self._is_departure
+
+    @property
+    def knight_destinations(self):
+        """For each square, the ids of the squares a knight can jump to."""
+        return self._knight_destinations
+
+    @property
+    def line_neighbors(self):
+        """For each square, the ids of the squares next to it in line."""
+        return self._line_neighbors
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def original_colors(self):
+        return self._original_colors
+
+    @property
+    def original_colors_masks(self):
+        """Bitboard of the squares of each color at the start of a game, by color."""
+        return self._original_colors_masks
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def xs(self):
+        return self._xs
+
+    @property
+    def ys(self):
+        return self._ys
+
+
+def is_walkable_color(color):
+    """Tell whether a square of this color can be part of a path (see Board.get_neighbors)."""
+    return color in all_colors
+
+
+_layouts_by_name = {}
+_layouts_by_description_id = {}
+
+
+def get_layout(board_description):
+    """Return the layout shared by all boards created from ``board_description``."""
+    name = board_description.get("name")
+    if name is not None:
+        if name not in _layouts_by_name:
+            _layouts_by_name[name] = BoardLayout(board_description)
+        return _layouts_by_name[name]
+
+    # Descriptions without name are only used in tests. We keep a reference to the description so
+    # its id cannot be reused by another one.
+    description_id = id(board_description)
+    if description_id not in _layouts_by_description_id:
+        _layouts_by_description_id[description_id] = (
+            board_description,
+            BoardLayout(board_description),
+        )
+    return _layouts_by_description_id[description_id][1]
+
+
+def get_layout_by_name(name):
+    if name not in _layouts_by_name:
+        _layouts_by_name[name] = BoardLayout(load_board(name))
+    return _layouts_by_name[name]
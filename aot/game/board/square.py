@@ -21,14 +21,35 @@ from .color import Color, ColorSet
 
 
 class Square:
+    """A square of a board.
+
+    Squares of a board are lightweight views: their color and whether they are occupied are
+    stored in the arrays of the board and their other properties in its layout. Squares created
+    directly (mostly in tests) don't belong to any board and hold their own copy of these arrays.
+    """
+
+    __slots__ = ("_board", "_hash", "_id", "_x", "_y")
+
     def __init__(self, x, y, color, is_occupied=False, is_arrival=False, is_departure=False):
+        self._init(
+            _DetachedSquareStorage(color, is_occupied, is_arrival, is_departure),
+            0,
+            x,
+            y,
+        )
+
+    @classmethod
+    def _create_view(cls, board, square_id):
+        square = cls.__new__(cls)
+        square._init(board, square_id, board.layout.xs[square_id], board.layout.ys[square_id])
+        return square
+
+    def _init(self, board, square_id, x, y):
+        self._board = board
+        self._id = square_id
         self._x = x
         self._y = y
-        self._color = color
-        self._original_color = self._color
-        self._occupied = is_occupied
-        self._is_arrival = is_arrival
-        self._is_departure = is_departure
+        self._hash = x * 10 + y * 100 + hash(self._original_color)
 
     @property
     def x(self):
@@ -40,29 +61,33 @@ class Square:
 
     @property
     def occupied(self):
-        return self._occupied
+        return bool(self._board._occupied[self._id])
 
     @occupied.setter
     def occupied(self, occupied):
-        self._occupied = bool(occupied)
+        self._board._set_occupied(self._id, bool(occupied))
 
     @property
     def color(self):
-        return self._color
+        return self._board._colors[self._id]
 
     @color.setter
     def color(self, color):
         if isinstance(color, str):
             color = Color[color]
-        self._color = color
+        self._board._set_color(self._id, color)
 
     @property
     def is_departure(self):
-        return self._is_departure
+        return self._board._layout.is_departure[self._id]
 
     @property
     def is_arrival(self):
-        return self._is_arrival
+        return self._board._layout.is_arrival[self._id]
+
+    @property
+    def _original_color(self):
+        return self._board._layout.original_colors[self._id]
 
     def __eq__(self, other):  # pragma: no cover
         return (
@@ -82,7 +107,62 @@ class Square:
         return str(self)
 
     def __hash__(self):
-        return self._x * 10 + self._y * 100 + hash(self._original_color)
+        return self._hash
+
+    def __reduce__(self):
+        if isinstance(self._board, _DetachedSquareStorage):
+            return (
+                _create_detached_square,
+                (
+                    self._x,
+                    self._y,
+                    self._original_color,
+                    self.color,
+                    self.occupied,
+                    self.is_arrival,
+                    self.is_departure,
+                ),
+            )
+
+        # Squares of a board are not pickled: we only keep a reference to the board and get
+        # its square when unpickling.
+        return _get_square_of_board, (self._board, self._id)
+
+
+class _DetachedSquareStorage:
+    """Storage of a square which doesn't belong to a board, with the same arrays as Board."""
+
+    __slots__ = ("_colors", "_layout", "_occupied")
+
+    def __init__(self, color, is_occupied, is_arrival, is_departure):
+        self._colors = [color]
+        self._occupied = bytearray([bool(is_occupied)])
+        self._layout = _DetachedSquareLayout(color, is_arrival, is_departure)
+
+    def _set_color(self, square_id, color):
+        self._colors[square_id] = color
+
+    def _set_occupied(self, square_id, occupied):
+        self._occupied[square_id] = occupied
+
+
+class _DetachedSquareLayout:
+    __slots__ = ("is_arrival", "is_departure", "original_colors")
+
+    def __init__(self, color, is_arrival, is_departure):
+        self.original_colors = (color,)
+        self.is_arrival = (is_arrival,)
+        self.is_departure = (is_departure,)
+
+
+def _create_detached_square(x, y, original_color, color, is_occupied, is_arrival, is_departure):
+    square = Square(x, y, original_color, is_occupied, is_arrival, is_departure)
+    square.color = color
+    return square
+
+
+def _get_square_of_board(board, square_id):
+    return board._get_square(square_id)
 
 
 class SquareSet(set):
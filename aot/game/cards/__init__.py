@@ -19,5 +19,6 @@
 
 from .card import Card
 from .deck import Deck
+from .spec import CardSpec, get_cards_specs
 
-__all__ = ["Card", "Deck"]
+__all__ = ["Card", "CardSpec", "Deck", "get_cards_specs"]
@@ -18,22 +18,30 @@
 ################################################################################
 
 from .. import trumps
-from ..board import Color, ColorSet, SquareSet
+from ..board import Color, ColorSet, all_colors
+from .spec import CardSpec
 
 
 class Card:
+    """A card of a player.
+
+    What cannot change during a game is stored in a :class:`CardSpec` shared by all the games. The
+    card itself only stores its board and what trumps can modify: its colors, its number of
+    movements and its special actions. They are only set when they differ from the spec.
+    """
+
     _board = None
-    _color = None
-    _colors = set()
-    _default_colors = set()
-    _default_number_moves = 0
-    _description = ""
-    _name = ""
-    _movements = []
-    _number_movements = 0
-    _cost = 0
+    _spec = None
+    # Colors modified by a trump, None if the card uses the colors of its spec.
+    _colors = None
+    _number_movements_delta = 0
+    # Special actions added by a trump, None if the card uses the special actions of its spec.
     _special_actions = None
-    movements_methods = set()
+    # Squares returned by move for the current version of the board.
+    _possible_squares_cache = None
+    _possible_squares_board_version = None
+    # Colors of the card as used in the keys of the cache, computed once until the card changes.
+    _possible_squares_colors = None
 
     def __init__(
         self,
@@ -47,36 +55,40 @@ class Card:
         cost=0,
         special_actions=None,
     ):
-        if not complementary_colors:
-            complementary_colors = set()
-        if not movements_types:
-            movements_types = set()
-
-        self.movements_methods = {
-            "line": self._line_move,
-            "diagonal": self._diagonal_move,
-            "knight": self._knight_move,
-        }
-
         self._board = board
-        self._color = color
-        self._colors = ColorSet(complementary_colors)
-        self._colors.add(color)
-        self._default_colors = set(self._colors)
-        self._description = description
-        self._name = name
-        self._movements = [self.movements_methods[mvt] for mvt in movements_types]
-        self._movements_types = movements_types
-        self._default_number_moves = number_movements
-        self._number_movements = number_movements
-        self._cost = cost
-        self._special_actions = special_actions or ()
+        self._spec = CardSpec.create(
+            name=name,
+            description=description,
+            color=color,
+            complementary_colors=complementary_colors,
+            movements_types=movements_types,
+            number_movements=number_movements,
+            cost=cost,
+            special_actions=special_actions,
+        )
+
+    @classmethod
+    def from_spec(cls, board, spec):
+        card = cls.__new__(cls)
+        card._board = board
+        card._spec = spec
+        return card
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The cache is only valid during a turn, no need to save it with the game.
+        state.pop("_possible_squares_cache", None)
+        state.pop("_possible_squares_board_version", None)
+        state.pop("_possible_squares_colors", None)
+        return state
 
     def modify_colors(self, colors):
         self._colors = ColorSet(colors)
+        self._clear_possible_squares_cache()
 
     def modify_number_moves(self, delta):
-        self._number_movements += delta
+        self._number_movements_delta += delta
+        self._clear_possible_squares_cache()
 
     def set_special_actions(self, special_action_descriptions):
         self._special_actions = trumps.SpecialActionsList(
@@ -87,168 +99,133 @@ class Card:
         )
 
     def move(self, origin):
-        number_movements_left = self._number_movements
-        possible_squares = SquareSet(initial_squares={origin})
-        while number_movements_left > 0:
-            possible_squares_per_levels = []
-            for possible_origin in possible_squares:
-                possible_squares_level = self._move_level(possible_origin)
-                possible_squares_per_levels.append(possible_squares_level)
-
-            for possible_squares_per_level in possible_squares_per_levels:
-                possible_squares.update(possible_squares_per_level)
-
-            number_movements_left -= 1
-
-        return {
-            square for square in possible_squares if not square.occupied and square is not origin
-        }
-
-    def _move_level(self, origin):
-        possible_squares_level = set()
-        for move in self._movements:
-            possible_squares_move = move(origin)
-            possible_squares_level.update(possible_squares_move)
-
-        return possible_squares_level
-
-    def _line_move(self, origin):
-        possible_squares = set()
-        new_squares = self._board.get_line_squares(origin, self._colors)
-        possible_squares.update(new_squares)
+        """Return the set of the free squares the card can reach from origin.
+
+        The result is memoized: during a turn, the possible squares of a card are viewed and then
+        checked when the card is played. It is computed again when the card is modified (by a
+        trump for instance) or when the board changes (a pawn moved or a square changed color).
+        """
+        board_version = self._board.version
+        if (
+            self._possible_squares_cache is None
+            or board_version != self._possible_squares_board_version
+        ):
+            # The board changed since the squares were cached: they can't be used anymore.
+            self._possible_squares_cache = {}
+            self._possible_squares_board_version = board_version
+
+        if self._possible_squares_colors is None:
+            self._possible_squares_colors = frozenset(self.colors)
+
+        key = (origin, self._possible_squares_colors, self.number_movements)
+        possible_squares = self._possible_squares_cache.get(key)
+        if possible_squares is None:
+            possible_squares = frozenset(self.iter_moves(origin))
+            self._possible_squares_cache[key] = possible_squares
 
         return possible_squares
 
-    def _diagonal_move(self, origin):
-        possible_squares = set()
-        new_squares = self._board.get_diagonal_squares(origin, self._colors)
-        possible_squares.update(new_squares)
-
-        return possible_squares
-
-    def _knight_move(self, origin):
-        possible_squares = set()
-        possible_squares.update(self.__knight_get_vertical_squares(origin))
-
-        possible_squares.update(self.__knigt_get_horizontal_square(origin))
-
-        return possible_squares
-
-    def __knight_get_vertical_squares(self, origin):
-        probable_squares = self.__knight_get_vertical_squares_vertical_first(origin)
-        probable_squares.update(self.__knight_get_vertical_squares_horizontal_first(origin))
-
-        return [
-            square
-            for square in probable_squares
-            if square.color in self._colors and not square.occupied
+    def _clear_possible_squares_cache(self):
+        self._possible_squares_cache = None
+        self._possible_squares_colors = None
+
+    def iter_moves(self, origin):
+        """Yield the free squares the card can reach from origin, closest squares first.
+
+        Squares are reached with a breadth first search: each movement level only expands the
+        squares discovered at the previous level and each square is yielded only once. Sets of
+        squares are bitboards so each level is a few shifts and bitwise operations (see
+        :mod:`aot.game.board.bitboard`). Since this is a generator, the caller can stop as soon as
+        it finds the square it is looking for.
+        """
+        origin_id = self._board.get_square_id(origin)
+        if origin_id is None or origin.color not in all_colors:
+            return
+
+        colors_mask = self._board.get_colors_mask(ColorSet(self.colors))
+        movements = [
+            getattr(self, f"_{movements_type}_move") for movements_type in self.movements_types
         ]
+        # The origin is reached from the start so it is never expanded again nor yielded.
+        reached_mask = frontier_mask = self._board.bitboard.bits[origin_id]
+        number_movements_left = self.number_movements
+        while number_movements_left > 0 and frontier_mask:
+            level_mask = 0
+            for move in movements:
+                level_mask |= move(frontier_mask, colors_mask)
+
+            frontier_mask = level_mask & ~reached_mask
+            reached_mask |= frontier_mask
+            number_movements_left -= 1
 
-    def __knight_get_vertical_squares_vertical_first(self, origin):
-        probable_squares = set()
-        temporary_vertical_squares = {
-            self._board[origin.x, origin.y + 2],
-            self._board[origin.x, origin.y - 2],
-        }
-
-        for square in temporary_vertical_squares:
-            # Squares in temporary_vertical_squares are added by board[] so they
-            # can be None.
-            if not square:
-                continue
-            right_square = self._board[square.x + 1, square.y]
-            left_square = self._board[square.x - 1, square.y]
-            if right_square:
-                probable_squares.add(right_square)
-            if left_square:
-                probable_squares.add(left_square)
-
-        return probable_squares
-
-    def __knight_get_vertical_squares_horizontal_first(self, origin):
-        probable_squares = set()
-        temporary_horizontal_squares = {
-            self._board[origin.x + 1, origin.y],
-            self._board[origin.x - 1, origin.y],
-        }
-
-        for square in temporary_horizontal_squares:
-            if square:
-                upper_square = self._board[square.x, square.y + 2]
-                lower_square = self._board[square.x, square.y - 2]
-                if upper_square:
-                    probable_squares.add(upper_square)
-                if lower_square:
-                    probable_squares.add(lower_square)
-
-        return probable_squares
-
-    def __knigt_get_horizontal_square(self, origin):
-        probable_squares = set()
-
-        for square in (self._board[origin.x, origin.y + 1], self._board[origin.x, origin.y - 1]):
-            if square:
-                probable_squares.update(self.__knight_get_temporary_horizontal_square(square))
-
-        return [
-            square
-            for square in probable_squares
-            if square and square.color in self._colors and not square.occupied
-        ]
+            yield from self._board.get_squares_of_mask(frontier_mask & ~self._board.occupied_mask)
+
+    def _line_move(self, origins_mask, colors_mask):
+        return self._board.bitboard.line_moves(origins_mask) & colors_mask
 
-    def __knight_get_temporary_horizontal_square(self, origin):
-        # We must get horizontal squares one step at a time to avoid switching
-        # board
-        square_left = self._board[origin.x - 1, origin.y]
-        square_right = self._board[origin.x + 1, origin.y]
-        temporary_horizontal_squares = set()
-        if square_left:
-            temporary_horizontal_squares.add(self._board[square_left.x - 1, square_left.y])
-        if square_right:
-            temporary_horizontal_squares.add(self._board[square_right.x + 1, square_right.y])
+    def _diagonal_move(self, origins_mask, colors_mask):
+        return self._board.bitboard.diagonal_moves(origins_mask) & colors_mask
 
-        return temporary_horizontal_squares
+    def _knight_move(self, origins_mask, colors_mask):
+        return (
+            self._board.bitboard.knight_moves(origins_mask)
+            & colors_mask
+            & ~self._board.occupied_mask
+        )
 
     def remove_color_from_possible_colors(self, color):
         if color == Color.ALL:
             self._colors = set()
-        elif color in self._colors:
+        elif color in self.colors:
+            self._colors = set(self.colors)
             self._colors.remove(color)
+        self._clear_possible_squares_cache()
 
     def revert_to_default(self):
-        self._colors = set(self._default_colors)
-        self._number_movements = self._default_number_moves
+        self._colors = None
+        self._number_movements_delta = 0
+        self._clear_possible_squares_cache()
 
     @property
     def color(self):
-        return self._color
+        return self._spec.color
 
     @property
     def colors(self):
-        return self._colors
+        return self._spec.colors if self._colors is None else self._colors
 
     @property
     def cost(self):
-        return self._cost
+        return self._spec.cost
 
     @property
     def description(self):
-        return self._description
+        return self._spec.description
 
     @property
     def is_knight(self):  # pragma: no cover
-        return self._movements == [self._knight_move]
+        return self._spec.movements_types == ("knight",)
 
     @property
     def movements_types(self):  # pragma: no cover
-        return self._movements_types
+        return self._spec.movements_types
 
     @property
     def name(self):  # pragma: no cover
-        return self._name
+        return self._spec.name
+
+    @property
+    def number_movements(self):
+        return self._spec.number_movements + self._number_movements_delta
+
+    @property
+    def spec(self):
+        return self._spec
 
     @property
     def special_actions(self):
+        if self._special_actions is None:
+            return self._spec.special_actions
         return self._special_actions
 
     def __str__(self):  # pragma: no cover
@@ -25,23 +25,49 @@ from .exceptions import CardNotFoundError
 
 
 class Deck:
+    """Cards of a player.
+
+    The cards are stored once in a table and the stock, the hand and the graveyard are lists of
+    indexes in this table. The stock is stored in reverse order so drawing a card pops the last
+    index of the list.
+    """
+
     CARDS_IN_HAND = 5
 
-    _cards = []
+    _cards = ()
     _graveyard = []
     _hand = []
     _stock = []
+    # Indexes of the cards in the table by (name, color), built on first use.
+    _indexes_by_key = None
 
     def __init__(self, cards):
-        self._cards = cards
+        self._cards = tuple(cards)
         self._graveyard = []
         self._hand = []
 
         self._init_stock()
         self.init_turn()
 
+    def _get_indexes(self, key):
+        if self._indexes_by_key is None:
+            self._indexes_by_key = {}
+            for index, card in enumerate(self._cards):
+                card_key = (card.name, card.color)
+                self._indexes_by_key[card_key] = self._indexes_by_key.get(card_key, ()) + (index,)
+
+        return self._indexes_by_key.get(key, ())
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # It can be rebuilt from the cards.
+        state.pop("_indexes_by_key", None)
+        return state
+
     def _init_stock(self):
-        self._stock = random.sample(self._cards, len(self._cards))
+        # We sample the indexes like we would sample the cards so the order is the same.
+        indexes = list(range(len(self._cards)))
+        self._stock = random.sample(indexes, len(indexes))[::-1]
 
     def init_turn(self):
         while len(self._hand) < self.CARDS_IN_HAND:
@@ -50,23 +76,20 @@ class Deck:
     def _draw_next_card(self):
         if self.number_cards_in_stock == 0:
             self._init_stock()
-            for card in self._hand:
-                self._stock.remove(card)
+            self._stock = [index for index in self._stock if index not in self._hand]
 
-        drawn_card = self._stock[0]
-        self._stock.remove(drawn_card)
-        return drawn_card
+        return self._stock.pop()
 
     def modify_colors(self, colors, filter_=None):
-        for card in filter(filter_, self._hand):
+        for card in filter(filter_, self.hand):
             card.modify_colors(colors)
 
     def modify_number_moves(self, delta, filter_=None):
-        for card in filter(filter_, self._hand):
+        for card in filter(filter_, self.hand):
             card.modify_number_moves(delta)
 
     def set_special_actions_to_card(self, card_name, special_action_descriptions):
-        for card in filter(lambda x: x.name == card_name, self._hand):
+        for card in filter(lambda x: x.name == card_name, self.hand):
             actions_copy = copy.deepcopy(special_action_descriptions)
             card.set_special_actions(actions_copy)
 
@@ -85,40 +108,48 @@ class Deck:
         if card is not None and not isinstance(card, Card):
             card = self.get_card(card.name, card.color)
 
-        if card is not None and card in self._hand:
+        index = self._get_index_in_hand(card) if card is not None else None
+        if index is not None:
             card.revert_to_default()
-            self._hand.remove(card)
-            self._graveyard.append(card)
+            self._hand.remove(index)
+            self._graveyard.append(index)
+
+    def _get_index_in_hand(self, card):
+        for index in self._get_indexes((card.name, card.color)):
+            if self._cards[index] is card and index in self._hand:
+                return index
+
+        return None
 
     def remove_color_from_possible_colors(self, color):
-        for card in self._hand:
+        for card in self.hand:
             card.remove_color_from_possible_colors(color)
 
     def revert_to_default(self):
-        for card in self._hand:
+        for card in self.hand:
             card.revert_to_default()
 
     @property
     def first_card_in_hand(self):
-        return self._hand[0]
+        return self._cards[self._hand[0]]
 
     def get_card(self, card_name, card_color):
-        matching_cards = [
-            card for card in self._hand if card.name == card_name and card.color == card_color
+        matching_indexes = [
+            index for index in self._get_indexes((card_name, card_color)) if index in self._hand
         ]
 
-        if len(matching_cards) != 1:
+        if len(matching_indexes) != 1:
             raise CardNotFoundError
 
-        return matching_cards[0]
+        return self._cards[matching_indexes[0]]
 
     @property
     def graveyard(self):
-        return self._graveyard
+        return [self._cards[index] for index in self._graveyard]
 
     @property
     def hand(self):
-        return self._hand
+        return [self._cards[index] for index in self._hand]
 
     @property
     def number_cards_in_stock(self):
@@ -134,7 +165,8 @@ class Deck:
 
     @property
     def stock(self):
-        return self._stock
+        """Cards of the stock, in the order in which they will be drawn."""
+        return [self._cards[index] for index in reversed(self._stock)]
 
     def __iter__(self):
-        return iter(self._hand + self._stock)
+        return iter(self.hand + self.stock)
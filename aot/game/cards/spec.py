@@ -0,0 +1,149 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+from dataclasses import dataclass, field
+
+from .. import trumps
+from ..board import Color, ColorSet
+from ..config import GAME_CONFIGS
+
+
+@dataclass(frozen=True)
+class CardSpec:
+    """Immutable definition of a card: everything that cannot change during a game.
+
+    Specs built from a game config with :func:`get_cards_specs` are shared by all the cards of all
+    the games created with this config. When they are pickled, only a reference to their config
+    is saved.
+    """
+
+    name: str = ""
+    description: str = ""
+    color: Color = Color.ALL
+    #: Colors the card can move on by default: its color and its complementary colors.
+    colors: frozenset = frozenset()
+    movements_types: tuple = ()
+    number_movements: int = 1
+    cost: int = 0
+    special_actions: tuple = ()
+    # Position of the spec in the list returned by get_cards_specs for its config.
+    config_name: str = field(default=None, compare=False, repr=False)
+    index: int = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def create(
+        cls,
+        color=Color.ALL,
+        complementary_colors=None,
+        movements_types=None,
+        special_actions=None,
+        **kwargs,
+    ):
+        colors = ColorSet(complementary_colors or ())
+        colors.add(color)
+        return cls(
+            color=color,
+            colors=frozenset(colors),
+            movements_types=tuple(movements_types or ()),
+            special_actions=special_actions or (),
+            **kwargs,
+        )
+
+    def __reduce__(self):
+        if self.config_name is None:
+            return super().__reduce__()
+
+        return _get_card_spec, (self.config_name, self.index)
+
+
+_cards_specs_by_config_id = {}
+
+
+def get_cards_specs(config):
+    """Return the specs of all the cards of a player for this config.
+
+    They are built once for each config.
+    """
+    config_id = id(config)
+    if config_id not in _cards_specs_by_config_id:
+        # We keep a reference to the config so its id cannot be reused by another one.
+        _cards_specs_by_config_id[config_id] = (config, _build_cards_specs(config))
+
+    return _cards_specs_by_config_id[config_id][1]
+
+
+def _get_card_spec(config_name, index):
+    return get_cards_specs(GAME_CONFIGS[config_name])[index]
+
+
+def _build_cards_specs(config):
+    config_name = _get_config_name(config)
+    colors = {Color[color_name] for color_name in config["colors"]}
+    number_cards_per_color = config["movements_cards"]["number_cards_per_color"]
+    specs = []
+    for card_description in config["movements_cards"]["cards"]:
+        additional_movements_color = card_description.get("additional_movements_colors", [])
+        complementary_colors = card_description.get("complementary_colors", {})
+        for color in sorted(colors, key=lambda _color: _color.name):
+            additional_colors = _get_additional_colors(
+                color, additional_movements_color, complementary_colors
+            )
+            for _ in range(number_cards_per_color):
+                specs.append(
+                    CardSpec.create(
+                        name=card_description["name"],
+                        description=card_description["description"],
+                        color=color,
+                        complementary_colors=additional_colors,
+                        movements_types=card_description["movements_type"],
+                        number_movements=card_description["number_of_movements"],
+                        cost=card_description["cost"],
+                        special_actions=_get_special_actions(
+                            card_description.get("special_actions", []), color
+                        ),
+                        config_name=config_name,
+                        index=len(specs),
+                    )
+                )
+
+    return tuple(specs)
+
+
+def _get_config_name(config):
+    for name, game_config in GAME_CONFIGS.items():
+        if game_config is config:
+            return name
+
+    return None
+
+
+def _get_special_actions(description, color):
+    return trumps.SpecialActionsList(
+        [
+            trumps.create_action_from_description(action_description, color)
+            for action_description in description
+        ]
+    )
+
+
+def _get_additional_colors(color, additional_movements_color, complementary_colors):
+    additional_colors = set()
+    additional_colors.update([Color[col] for col in additional_movements_color])
+    additional_colors.update([Color[col] for col in complementary_colors.get(color.name, [])])
+    return additional_colors
@@ -27,4 +27,7 @@ def load_board(name):
     with open(board_file_name, "r") as board_file:
         board_data = json.load(board_file)
 
+    # The name identifies the board definition, see aot.game.board.layout.
+    board_data["name"] = name
+
     return board_data
@@ -36,6 +36,7 @@ class Game:
     _next_rank_available = 1
     _players = []
     _players_id_to_index = None
+    _version = 0
     _winners = []
 
     def __init__(self, board, players, game_id=None):
@@ -51,10 +52,14 @@ class Game:
         }
         self._nb_turns = 0
         self._next_rank_available = 1
+        self._version = 0
         self._winners = []
 
         self._active_player.init_turn()
 
+    def increment_version(self):
+        self._version += 1
+
     def add_action(self, action):
         self._actions.append(action)
 
@@ -294,6 +299,11 @@ class Game:
             if player is not None:
                 yield player
 
+    @property
+    def version(self):
+        """Version of the state of the game, incremented each time an event changes the game."""
+        return self._version
+
     @property
     def winners(self):
         return [player.name for player in self._winners]
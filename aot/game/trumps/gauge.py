@@ -17,7 +17,7 @@
 # along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
 ################################################################################
 
-from aot.game.ai.pathfinding import a_star
+from aot.game.board.distances import UNREACHABLE
 
 
 class Gauge:
@@ -37,11 +37,10 @@ class Gauge:
             if is_knight:
                 self._value += 1
             else:
-                # The list returned by a_star always contain the 1st and last square. Which means
-                # it over-evaluate the distance by 1.
-                path = a_star(from_, to, self._board, movements_types=card.movements_types)
-                distance = len(path) - 1
-                if distance > 0:
+                distance = self._board.distances.get_distance(
+                    from_, to, movements_types=card.movements_types
+                )
+                if 0 < distance < UNREACHABLE:
                     self._value += distance
 
         if self.value > self.MAX_VALUE:
@@ -26,6 +26,7 @@ import sentry_sdk
 from autobahn.asyncio.websocket import WebSocketServerFactory
 from sentry_sdk.integrations.logging import LoggingIntegration
 
+from .api.cache import Cache
 from .api.ws import AotWs
 from .config import config
 
@@ -71,6 +72,9 @@ def startup(debug=False, debug_aio=False):
     server = _create_tcp_server(loop)
     wsserver = loop.run_until_complete(server)
 
+    if config["cache"]["stats_reconcile_interval"]:
+        Cache.start_stats_reconciler(loop, config["cache"]["stats_reconcile_interval"])
+
     return wsserver, loop
 
 
@@ -88,6 +92,9 @@ def cleanup(wsserver, loop):
     if wsserver is not None:
         wsserver.close()
     if loop is not None:
+        # Save the games kept in memory.
+        loop.run_until_complete(AotWs.stop_game_actors())
+        Cache.stop_stats_reconciler()
         # Leave tasks a chance to complete.
         pending = asyncio.Task.all_tasks()
         if len(pending) > 0:
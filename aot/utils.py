@@ -18,14 +18,39 @@
 #
 
 
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
 from time import time
 from types import MappingProxyType
 
+_frozen_time = ContextVar("frozen_time", default=None)
+
 
 def get_time():
+    frozen_time = _frozen_time.get()
+    if frozen_time is not None:
+        return frozen_time
     return int(time() * 1000)
 
 
+@contextmanager
+def replayable(time, seed):
+    """Run code with a fixed time and random seed so it can be replayed identically.
+
+    :func:`get_time` returns ``time`` and the functions of the :mod:`random` module draw from a
+    generator seeded with ``seed``. The state of the generator is restored when leaving the block.
+    """
+    random_state = random.getstate()
+    token = _frozen_time.set(time)
+    random.seed(seed)
+    try:
+        yield
+    finally:
+        _frozen_time.reset(token)
+        random.setstate(random_state)
+
+
 def make_immutable(data):
     """Make the supplied data immutable.
 
@@ -0,0 +1,111 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+"""Count the round trips to redis made by the lobby requests.
+
+Run it with ``python -m benchmarks.lobby``.
+"""
+
+import asyncio
+import os
+
+from aot.api.cache import Cache
+from aot.api.storage import MemoryPipeline, MemoryStorage
+from aot.api.utils import SlotState
+from aot.api.views import create_lobby, free_slot, join_game, update_slot
+from aot.config import config
+
+
+class CountingStorage(MemoryStorage):
+    """In memory storage which counts the round trips a redis server would need."""
+
+    round_trips = 0
+
+    def __getattr__(self, name):
+        command = super().__getattr__(name)
+
+        async def run_command(*args, **kwargs):
+            self.round_trips += 1
+            return await command(*args, **kwargs)
+
+        return run_command
+
+    async def pipeline(self, transaction=True):
+        return _CountingPipeline(self)
+
+    async def run_script(self, script, keys, args):
+        self.round_trips += 1
+        return await super().run_script(script, keys, args)
+
+
+class _CountingPipeline(MemoryPipeline):
+    def __init__(self, storage):
+        super().__init__(storage.database)
+        self._storage = storage
+
+    async def execute(self):
+        self._storage.round_trips += 1
+        return await super().execute()
+
+
+async def count_round_trips(storage, view, request, cache):
+    storage.round_trips = 0
+    await view(request, cache)
+    return storage.round_trips
+
+
+async def bench_lobby():
+    storage = CountingStorage()
+    Cache._cache = storage
+    game_master_cache = Cache()
+    player_cache = Cache()
+
+    request = {"player_id": "game_master", "player_name": "Game master", "hero": "Arline"}
+    round_trips = await count_round_trips(storage, create_lobby, request, game_master_cache)
+    print(f"Create lobby: {round_trips} round trips")  # noqa: T201
+
+    request = {
+        "game_id": game_master_cache.game_id,
+        "player_id": "player",
+        "player_name": "Player",
+        "hero": "Garez",
+    }
+    round_trips = await count_round_trips(storage, join_game, request, player_cache)
+    print(f"Join game: {round_trips} round trips")  # noqa: T201
+
+    request = {
+        "slot": {"index": 2, "state": SlotState.AI, "player_name": "AI", "hero": "Kharliass"}
+    }
+    round_trips = await count_round_trips(storage, update_slot, request, game_master_cache)
+    print(f"Update slot: {round_trips} round trips")  # noqa: T201
+
+    request = {"player_id": "player", "game_id": player_cache.game_id, "free": True}
+    round_trips = await count_round_trips(storage, free_slot, request, player_cache)
+    print(f"Free slot: {round_trips} round trips")  # noqa: T201
+
+
+def main():
+    # Nothing is signed with a real key here: the development config doesn't require one.
+    os.environ.setdefault("ENV", "development")
+    config.setup_config()
+    asyncio.run(bench_lobby())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+"""Compare the bitboard based Card.move with the previous implementation using sets of squares.
+
+Run it with ``python -m benchmarks.moves``.
+"""
+
+import timeit
+
+from aot.api.game_factory import build_cards_list
+from aot.game.board import Board, SquareSet
+from aot.game.config import GAME_CONFIGS
+
+REPEAT = 5
+
+
+def legacy_move(card, origin):
+    """Card.move as it was implemented before bitboards."""
+    board = card._board
+    possible_squares = SquareSet(initial_squares={origin})
+    for _ in range(card.number_movements):
+        possible_squares_level = set()
+        for possible_origin in possible_squares:
+            if "line" in card.movements_types:
+                possible_squares_level.update(board.get_line_squares(possible_origin, card.colors))
+            if "diagonal" in card.movements_types:
+                possible_squares_level.update(
+                    board.get_diagonal_squares(possible_origin, card.colors)
+                )
+            if "knight" in card.movements_types:
+                possible_squares_level.update(
+                    square
+                    for square in _legacy_knight_move(board, possible_origin)
+                    if square.color in card.colors and not square.occupied
+                )
+        possible_squares.update(possible_squares_level)
+
+    return {square for square in possible_squares if not square.occupied and square is not origin}
+
+
+def _legacy_knight_move(board, origin):
+    x, y = origin.x, origin.y
+    squares = set()
+    for dy in (2, -2):
+        for dx in (1, -1):
+            if board[x, y + dy] is not None or board[x + dx, y] is not None:
+                squares.add(board[x + dx, y + dy])
+    for dy in (1, -1):
+        for dx in (1, -1):
+            if board[x, y + dy] is not None and board[x + dx, y + dy] is not None:
+                squares.add(board[x + 2 * dx, y + dy])
+    squares.discard(None)
+    return squares
+
+
+def bitboard_move(card, origin):
+    return card.move(origin)
+
+
+def run_moves(move, cards, origins):
+    return [move(card, origin) for card in cards for origin in origins]
+
+
+def bench_card(name, cards, origins):
+    if run_moves(bitboard_move, cards, origins) != run_moves(legacy_move, cards, origins):
+        raise AssertionError(f"bitboard_move and legacy_move found different squares for {name}")
+
+    results = {}
+    for move in (legacy_move, bitboard_move):
+        timer = timeit.Timer(lambda: run_moves(move, cards, origins))
+        results[move.__name__] = min(timer.repeat(repeat=REPEAT, number=1))
+
+    print(  # noqa: T201
+        f"{name}: {len(cards) * len(origins)} moves, "
+        f"legacy_move {results['legacy_move'] * 1000:.1f}ms, "
+        f"bitboard_move {results['bitboard_move'] * 1000:.1f}ms "
+        f"(x{results['legacy_move'] / results['bitboard_move']:.1f})"
+    )
+
+
+def main():
+    config = GAME_CONFIGS["standard"]
+    board = Board(config["board"])
+    origins = [
+        square
+        for square in board.get_squares_of_mask(board.bitboard.squares_mask)
+        if square.color is not None and not square.occupied
+    ]
+    cards_by_name = {}
+    for card in build_cards_list(config, board):
+        cards_by_name.setdefault(card.name, []).append(card)
+
+    for name, cards in sorted(cards_by_name.items()):
+        bench_card(name, cards, origins)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+"""Compare the heap based A* with the previous implementation which scanned all fscores.
+
+Run it with ``python -m benchmarks.pathfinding``.
+"""
+
+import random
+import timeit
+
+from aot.game.ai.pathfinding import a_star, heuristic_cost_estimate, reconstruct_path
+from aot.game.board import Board
+from aot.game.config import GAME_CONFIGS
+
+NUMBER_PAIRS = 50
+REPEAT = 5
+
+
+def legacy_a_star(start, goal, board, movements_types=None):
+    """A* as it was implemented before the open set became a heap."""
+    closed_set = set()
+    open_set = {start}
+    came_from = {}
+    gscore = {start: 0}
+    fscore = {start: heuristic_cost_estimate(start, goal, board)}
+
+    while len(open_set) > 0:
+        current = _get_node_lowest_fscore(fscore, open_set)
+        if current == goal:
+            return reconstruct_path(came_from, current)
+
+        open_set.remove(current)
+        closed_set.add(current)
+        for neighbor in board.get_neighbors(current, movements_types=movements_types):
+            if neighbor in closed_set:
+                continue
+            tentative_gscore = gscore[current] + 1
+            if neighbor not in open_set:
+                open_set.add(neighbor)
+            elif tentative_gscore >= gscore[neighbor]:
+                continue
+
+            came_from[neighbor] = current
+            gscore[neighbor] = tentative_gscore
+            fscore[neighbor] = gscore[neighbor] + heuristic_cost_estimate(neighbor, goal, board)
+
+    return []
+
+
+def _get_node_lowest_fscore(fscore, open_set):
+    score_min = float("inf")
+    square_min = None
+    for square, score in fscore.items():
+        if score < score_min and square in open_set:
+            score_min = score
+            square_min = square
+
+    return square_min
+
+
+def get_pairs(board):
+    # Use a fixed seed so each run compares the same searches.
+    rng = random.Random(42)
+    squares = [
+        board[x, y]
+        for x in range(board.width)
+        for y in range(board.height)
+        if board[x, y] is not None and board[x, y].color is not None
+    ]
+    return [tuple(rng.sample(squares, 2)) for _ in range(NUMBER_PAIRS)]
+
+
+def run_searches(search, board, pairs):
+    return [search(start, goal, board) for start, goal in pairs]
+
+
+def bench_board(name):
+    board = Board(GAME_CONFIGS[name]["board"])
+    pairs = get_pairs(board)
+    if run_searches(a_star, board, pairs) != run_searches(legacy_a_star, board, pairs):
+        raise AssertionError(f"a_star and legacy_a_star found different paths on {name}")
+
+    results = {}
+    for search in (legacy_a_star, a_star):
+        timer = timeit.Timer(lambda: run_searches(search, board, pairs))
+        results[search.__name__] = min(timer.repeat(repeat=REPEAT, number=1))
+
+    print(  # noqa: T201
+        f"{name}: {NUMBER_PAIRS} searches, "
+        f"legacy_a_star {results['legacy_a_star'] * 1000:.1f}ms, "
+        f"a_star {results['a_star'] * 1000:.1f}ms "
+        f"(x{results['legacy_a_star'] / results['a_star']:.1f})"
+    )
+
+
+def main():
+    for name in ("standard", "test"):
+        bench_board(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from aot.api import snapshot
+from aot.api.actors import GameActors
+from aot.api.events import EventLog
+from aot.api.utils import AotError, MustNotSaveGameError, RequestTypes
+from aot.config import config
+
+
+def setup_module():
+    config.setup_config()
+
+
+@pytest.fixture
+def actors_cache(game):  # noqa: F811
+    cache = MagicMock()
+    cache.load_game = AsyncMock(side_effect=lambda: EventLog(game, version=1))
+    cache.append_game_events = AsyncMock(return_value=2)
+    cache.save_game_if_unchanged = AsyncMock(return_value=2)
+    return cache
+
+
+def _get_game_actors(cache, idle_timeout=10):
+    return GameActors(
+        loop=asyncio.get_running_loop(),
+        flush_delay=0.05,
+        idle_timeout=idle_timeout,
+        cache_factory=lambda loop: cache,
+    )
+
+
+async def _discard(actor):
+    async with actor.load_game() as (game, log):
+        card = game.active_player.hand[0]
+        log.play_request(
+            RequestTypes.PLAY_CARD,
+            {"discard": True, "card_name": card.name, "card_color": card.color},
+        )
+        return log
+
+
+async def _pass_turn(actor):
+    async with actor.load_game() as (game, log):
+        log.play_request(RequestTypes.PLAY_CARD, {"pass": True})
+        return log
+
+
+@pytest.mark.asyncio
+async def test_write_behind(actors_cache):
+    game_actors = _get_game_actors(actors_cache)
+    actor = game_actors.get("game_id")
+
+    log = await actor.call(_discard, actor)
+
+    assert game_actors.get("game_id") is actor
+    assert len(log.new_events) == 1
+    actors_cache.append_game_events.assert_not_called()
+
+    await asyncio.sleep(0.1)
+
+    actors_cache.append_game_events.assert_called_once()
+    assert log.new_events == []
+    assert log.version == 2
+    actors_cache.load_game.assert_called_once_with()
+    await game_actors.stop()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_at_end_of_turn(actors_cache, game):  # noqa: F811
+    game_actors = _get_game_actors(actors_cache)
+    actor = game_actors.get("game_id")
+
+    await actor.call(_discard, actor)
+    for _ in game.players:
+        await actor.call(_pass_turn, actor)
+
+    actors_cache.save_game_if_unchanged.assert_called_once_with(game, 1)
+    actors_cache.append_game_events.assert_not_called()
+    await game_actors.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop(actors_cache):
+    game_actors = _get_game_actors(actors_cache)
+    actor = game_actors.get("game_id")
+    await actor.call(_discard, actor)
+
+    await game_actors.stop()
+
+    actors_cache.append_game_events.assert_called_once()
+    assert len(game_actors) == 0
+    assert game_actors.get("game_id") is not actor
+    await game_actors.stop()
+
+
+@pytest.mark.asyncio
+async def test_idle_timeout(actors_cache):
+    game_actors = _get_game_actors(actors_cache, idle_timeout=0.01)
+    actor = game_actors.get("game_id")
+
+    await asyncio.sleep(0.05)
+
+    assert len(game_actors) == 0
+    assert game_actors.get("game_id") is not actor
+    await game_actors.stop()
+
+
+@pytest.mark.asyncio
+async def test_request_during_idle_flush(actors_cache, mocker):
+    game_actors = _get_game_actors(actors_cache, idle_timeout=0.01)
+    actor = game_actors.get("game_id")
+    flush = actor._flush
+    flush_started = asyncio.Event()
+
+    async def slow_flush(*args, **kwargs):
+        flush_started.set()
+        await asyncio.sleep(0.05)
+        await flush(*args, **kwargs)
+
+    mocker.patch.object(actor, "_flush", side_effect=slow_flush)
+    await flush_started.wait()
+
+    assert await actor.call(_pass_turn, actor) is not None
+    assert game_actors.get("game_id") is actor
+    await game_actors.stop()
+
+
+@pytest.mark.asyncio
+async def test_error(actors_cache):
+    game_actors = _get_game_actors(actors_cache)
+    actor = game_actors.get("game_id")
+    await actor.call(_discard, actor)
+
+    async def fail():
+        async with actor.load_game():
+            raise ValueError
+
+    with pytest.raises(ValueError):
+        await actor.call(fail)
+
+    # The events played before the error are saved and the game is reloaded.
+    actors_cache.append_game_events.assert_called_once()
+    await actor.call(_discard, actor)
+    assert actors_cache.load_game.call_count == 2
+    await game_actors.stop()
+
+
+@pytest.mark.asyncio
+async def test_error_when_events_cannot_be_saved(actors_cache, game):  # noqa: F811
+    saved_game = snapshot.dumps(game)
+    actors_cache.load_game = AsyncMock(
+        side_effect=lambda: EventLog(snapshot.loads(saved_game), version=1)
+    )
+    actors_cache.append_game_events = AsyncMock(side_effect=[OSError, 2])
+    game_actors = _get_game_actors(actors_cache)
+    actor = game_actors.get("game_id")
+    await actor.call(_discard, actor)
+
+    async def fail():
+        async with actor.load_game():
+            raise ValueError
+
+    with pytest.raises(ValueError):
+        await actor.call(fail)
+
+    # The events that could not be saved are replayed on the reloaded game and saved with it.
+    log = await actor.call(_pass_turn, actor)
+    assert actors_cache.load_game.call_count == 2
+    assert len(log.new_events) == 2
+    await asyncio.sleep(0.1)
+    assert actors_cache.append_game_events.call_count == 2
+    assert len(actors_cache.append_game_events.call_args[0][0]) == 2
+    assert log.new_events == []
+    await game_actors.stop()
+
+
+@pytest.mark.asyncio
+async def test_must_not_save(actors_cache):
+    game_actors = _get_game_actors(actors_cache)
+    actor = game_actors.get("game_id")
+
+    async def must_not_save():
+        async with actor.load_game():
+            raise MustNotSaveGameError
+
+    assert await actor.call(must_not_save) is None
+    await actor.call(_discard, actor)
+    actors_cache.load_game.assert_called_once_with()
+    await game_actors.stop()
+
+
+@pytest.mark.asyncio
+async def test_game_does_not_exist(actors_cache):
+    game_actors = _get_game_actors(actors_cache)
+    actors_cache.load_game = AsyncMock(return_value=None)
+    actor = game_actors.get("game_id")
+
+    with pytest.raises(AotError):
+        await actor.call(_discard, actor)
+    await game_actors.stop()
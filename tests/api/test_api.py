@@ -0,0 +1,117 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import pytest
+
+from aot.api.api import Api
+from aot.api.game_updates import GameUpdates
+from aot.api.serializers import get_global_game_message, get_private_player_message
+from aot.api.utils import GameVersionConflictError
+from aot.config import config
+
+
+def setup_module():
+    config.setup_config()
+
+
+@pytest.fixture
+def api(memory_cache, mocker):
+    mocker.patch.object(Api, "_clients_pending_disconnection", {})
+    mocker.patch.object(Api, "_clients_pending_reconnection", {})
+    api = Api(
+        default_id=0,
+        loop=None,
+        ai_delay=0,
+        cache=memory_cache,
+        game_updates=GameUpdates(history_size=2, max_games=2),
+    )
+    api._game_id = "game_id"
+    return api
+
+
+@pytest.mark.asyncio
+async def test_pending_connection_changes_played_again_on_conflict(
+    api, memory_cache, game, mocker
+):  # noqa: F811
+    await memory_cache.save_game(game)
+    disconnected_player = game.get_player_by_index(1)
+    api._clients_pending_disconnection["game_id"] = {disconnected_player.id}
+    save_game = api._save_game
+    conflicts = [GameVersionConflictError()]
+
+    async def save_game_after_conflict(log):
+        if conflicts:
+            raise conflicts.pop()
+        await save_game(log)
+
+    mocker.patch.object(api, "_save_game", side_effect=save_game_after_conflict)
+
+    async def load_and_save_game():
+        async with api._load_game():
+            pass
+
+    await api._retry_on_conflict(load_and_save_game)
+
+    assert not conflicts
+    assert api._clients_pending_disconnection["game_id"] == set()
+    loaded_game = (await memory_cache.load_game()).game
+    assert not loaded_game.get_player_by_id(disconnected_player.id).is_connected
+
+
+def _reconnect_message(game, player):
+    return {"request": {"game_id": game.game_id, "player_id": player.id, "game_version": 0}}
+
+
+@pytest.mark.asyncio
+async def test_resume_game_without_loading_it(api, memory_cache, game, mocker):  # noqa: F811
+    await memory_cache.save_game(game)
+    player = game.get_player_by_index(1)
+    api._id = player.id
+    api._game_updates.record([get_global_game_message(game)])
+    api._game_updates.record([get_private_player_message(game, player)], game_id="game_id")
+    mocker.spy(memory_cache, "load_game")
+
+    response = await api._reconnect_to_game(_reconnect_message(game, player))
+
+    memory_cache.load_game.assert_not_called()
+    assert len(response.send_to_current_player) == 2
+    assert api.patches_base_version == 0
+    # The player is reconnected to the game the next time it is loaded.
+    assert api._clients_pending_reconnection["game_id"] == {player.id}
+
+
+@pytest.mark.asyncio
+async def test_resume_game_with_outdated_player_state(
+    api, memory_cache, game, mocker
+):  # noqa: F811
+    await memory_cache.save_game(game)
+    player = game.get_player_by_index(1)
+    api._id = player.id
+    api._game_updates.record([get_global_game_message(game)])
+    api._game_updates.record([get_private_player_message(game, player)], game_id="game_id")
+    game.increment_version()
+    api._game_updates.record([get_global_game_message(game)])
+    mocker.spy(memory_cache, "load_game")
+
+    response = await api._reconnect_to_game(_reconnect_message(game, player))
+
+    memory_cache.load_game.assert_called_once_with()
+    # The player was reconnected to the loaded game before its state was created.
+    assert response.send_to_current_player[1]["request"]["game_version"] == 1
+    assert api.patches_base_version == 0
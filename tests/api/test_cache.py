@@ -24,9 +24,11 @@ from unittest.mock import AsyncMock, MagicMock
 import pytest
 
 from aot.api.cache import Cache
+from aot.api.events import Event, EventTypes
 from aot.api.security import decode
-from aot.api.utils import SlotState
+from aot.api.utils import GameVersionConflictError, SlotState
 from aot.config import config
+from aot.game.board import Color
 
 
 def dumps_list(cache, a_list):
@@ -37,23 +39,29 @@ def setup_module():
     config.setup_config()
 
 
-def test_connect_tcp_socket(mocker):  # noqa: F811
-    cfg = {
-        "cache": {"host": "127.0.0.1", "port": "6379", "timeout": 5},
-    }
-    redis = MagicMock()
-    mocker.patch("aot.api.cache.config", new=cfg)
-    mocker.patch("aot.api.cache.Redis", new=redis)
-
-    Cache._get_redis_instance(new=True)
-
-    redis.assert_called_once_with(
-        host=cfg["cache"]["host"],
-        port=cfg["cache"]["port"],
-        connect_timeout=cfg["cache"]["timeout"],
-        stream_timeout=cfg["cache"]["timeout"],
-        loop=None,
-    )
+def _mock_pipeline(cache, results):
+    pipeline = MagicMock()
+    for command in (
+        "delete",
+        "expire",
+        "hget",
+        "hincrby",
+        "hmget",
+        "hmset",
+        "hset",
+        "lrange",
+        "lset",
+        "rpush",
+        "sadd",
+        "scard",
+        "srem",
+        "zadd",
+        "zcard",
+    ):
+        setattr(pipeline, command, AsyncMock())
+    pipeline.execute = AsyncMock(return_value=results)
+    cache._cache.pipeline = AsyncMock(return_value=pipeline)
+    return pipeline
 
 
 def test_dumps(cache):
@@ -94,20 +102,58 @@ async def test_test(cache, mocker):  # noqa: F811
 
 @pytest.mark.asyncio
 async def test_info(cache, mocker):  # noqa: F811
-    cache._cache.keys = AsyncMock(return_value=[b"game:game_id", b"toto"])
-    cache.get_players_ids = AsyncMock(return_value=["id1", "id2"])
-    cache._cache.hget = AsyncMock(return_value=b"True")
+    mocker.patch.object(Cache, "_number_game_saves", 0)
+    mocker.patch.object(Cache, "_number_game_save_conflicts", 0)
+    pipeline = _mock_pipeline(cache, [2, 1, b"5"])
 
     infos = await cache.info()
 
-    cache._cache.keys.assert_called_once_with()
+    pipeline.scard.assert_any_call("stats:games")
+    pipeline.scard.assert_any_call("stats:started_games")
+    pipeline.hget.assert_called_once_with("stats", "number_players")
+    pipeline.execute.assert_called_once_with()
     assert infos == {
-        "average_number_players": 2.0,
-        "number_games": 1,
+        "average_number_players": 2.5,
+        "number_games": 2,
         "number_started_games": 1,
+        "live_games": 0,
+        "live_games_hits": 0,
+        "live_games_misses": 0,
+        "live_games_evictions": 0,
+        "game_saves": 0,
+        "game_save_conflicts": 0,
     }
 
 
+@pytest.mark.asyncio
+async def test_info_without_games(memory_cache):  # noqa: F811
+    infos = await memory_cache.info()
+
+    assert infos["number_games"] == 0
+    assert infos["average_number_players"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_stats(memory_cache):  # noqa: F811
+    for game_id in ("game1", "game2", "game3"):
+        memory_cache.init(game_id, "game_master_id")
+        await memory_cache.create_new_game(nb_slots=2)
+        await memory_cache.take_next_slot("Game master", "daemon")
+    await memory_cache.game_has_started()
+    memory_cache.init("game2", "player_id")
+    await memory_cache.take_next_slot("Player", "daemon")
+    await memory_cache.game_has_started()
+    await memory_cache._cache.hset("game:game2", "over", "true")
+    await memory_cache._cache.delete("game:game1", "players:game1")
+
+    await Cache.reconcile_stats()
+
+    infos = await memory_cache.info()
+    assert infos["number_games"] == 2
+    assert infos["number_started_games"] == 1
+    assert infos["average_number_players"] == 1.5
+
+
 @pytest.mark.asyncio
 async def test_get_players_ids(cache):  # noqa: F811
     cache._cache.zrange = AsyncMock(return_value=[b"id0", b"id1"])
@@ -129,39 +175,18 @@ async def test_get_players_ids_without_game_id(cache):  # noqa: F811
     cache._cache.zrange.assert_called_once_with("players:game_id", 0, -1)
 
 
-@pytest.mark.asyncio
-async def test_game_exists(cache, game):  # noqa: F811
-    cache._cache.hget = AsyncMock(return_value=None)
-    assert not await cache.game_exists("game_id")
-    cache._cache.hget.assert_called_once_with("game:game_id", "game_master")
-
-    cache._cache.hget = AsyncMock(return_value=game)
-    assert await cache.game_exists("game_id")
-    cache._cache.hget.assert_called_once_with("game:game_id", "game_master")
-
-
-@pytest.mark.asyncio
-async def test_has_opened_slots(mocker, cache):  # noqa: F811
-    cache._cache.lrange = AsyncMock(
-        return_value=dumps_list(cache, [{"state": SlotState.OPEN}, {"state": SlotState.CLOSED}]),
-    )
-
-    assert await cache.has_opened_slots("game_id")
-    cache._cache.lrange.assert_called_once_with("slots:game_id", 0, -1)
-
-
 @pytest.mark.asyncio
 async def test_get_slots_with_game_id(mocker, cache):  # noqa: F811
     slots = [
         {"state": SlotState.OPEN, "player_id": "id0"},
         {"state": SlotState.CLOSED, "player_id": "id1"},
     ]
-    cache._cache.lrange = AsyncMock(return_value=dumps_list(cache, slots))
+    cache._cache.hmget = AsyncMock(return_value=[b"id0", cache.dumps_slots(slots)])
 
-    results = await cache.get_slots("game_id")
+    results = await cache.get_slots("other_game_id")
 
     assert results == slots
-    cache._cache.lrange.assert_called_once_with("slots:game_id", 0, -1)
+    cache._cache.hmget.assert_called_once_with("game:other_game_id", "game_master", "slots")
 
 
 @pytest.mark.asyncio
@@ -170,12 +195,12 @@ async def test_get_slots_without_game_id(mocker, cache):  # noqa: F811
         {"state": SlotState.OPEN, "player_id": "id0"},
         {"state": SlotState.CLOSED, "player_id": "id1"},
     ]
-    cache._cache.lrange = AsyncMock(return_value=dumps_list(cache, slots))
+    cache._cache.hmget = AsyncMock(return_value=[b"id0", cache.dumps_slots(slots)])
 
     results = await cache.get_slots()
 
     assert results == slots
-    cache._cache.lrange.assert_called_once_with("slots:game_id", 0, -1)
+    cache._cache.hmget.assert_called_once_with("game:game_id", "game_master", "slots")
 
 
 @pytest.mark.asyncio
@@ -184,14 +209,13 @@ async def test_get_slots_exclude_player_ids(cache):  # noqa: F811
         {"state": SlotState.OPEN, "player_id": "id0"},
         {"state": SlotState.CLOSED, "player_id": "id1"},
     ]
-    cache._cache.lrange = AsyncMock(return_value=dumps_list(cache, slots))
+    cache._cache.hmget = AsyncMock(return_value=[b"id0", cache.dumps_slots(slots)])
     for slot in slots:
         del slot["player_id"]
 
     results = await cache.get_slots("game_id", include_player_id=False)
 
     assert results == slots
-    cache._cache.lrange.assert_called_once_with("slots:game_id", 0, -1)
 
 
 @pytest.mark.asyncio
@@ -204,30 +228,33 @@ async def test_is_member_game(cache):  # noqa: F811
 
 @pytest.mark.asyncio
 async def test_create_new_game(cache):  # noqa: F811
-    slots = []
+    pipeline = _mock_pipeline(cache, [True, True])
 
-    def add_slot_cache_side_effect(key, dumped_slot):
-        slot = cache.loads(dumped_slot)
-        assert key == "slots:game_id"
-        assert slot["index"] == len(slots)
-        if len(slots) == 0:
-            assert slot["player_id"] == "player_id"
-        else:
-            assert not slot["player_id"]
+    await cache.create_new_game()
 
-        slots.append(slot)
+    game_key, values = pipeline.hmset.call_args[0]
+    assert game_key == "game:game_id"
+    assert values["game_master"] == "player_id"
+    assert values["started"] == b"false"
+    assert not values["test"]
+    slots = cache.loads_slots(values["slots"])
+    assert [slot["index"] for slot in slots] == [0, 1, 2, 3]
+    assert [slot["player_id"] for slot in slots] == ["player_id", "", "", ""]
+    assert all(slot["state"] == SlotState.OPEN for slot in slots)
+    pipeline.expire.assert_called_once_with("game:game_id", cache.TTL)
+    pipeline.sadd.assert_called_once_with("stats:games", "game_id")
+    pipeline.execute.assert_called_once_with()
 
-    cache._cache.rpush = AsyncMock(side_effect=add_slot_cache_side_effect)
-    cache._cache.hset = AsyncMock()
-    cache._cache.expire = AsyncMock()
-    cache.get_slots = AsyncMock(return_value=slots)
 
-    await cache.create_new_game()
+def test_dumps_slots(cache):  # noqa: F811
+    slots = [{"state": SlotState.TAKEN, "index": 0, "player_id": "id0", "hero": "daemon"}]
+
+    data = cache.dumps_slots(slots)
 
-    assert cache._cache.hset.call_count == 3
-    assert cache._cache.rpush.call_count == 4
-    assert cache._cache.expire.call_count == 2
-    assert cache.get_slots.call_count == 4
+    assert isinstance(data, str)
+    assert cache.loads_slots(data) == slots
+    with pytest.raises(TypeError):
+        cache.dumps_slots([{"state": object()}])
 
 
 @pytest.mark.asyncio
@@ -241,9 +268,16 @@ async def test_is_test(cache):  # noqa: F811
     cache._cache.hget.assert_called_once_with("game:game_id", "test")
 
 
+def test_loads_game_pickled(cache, game):  # noqa: F811
+    # Games saved before snapshots were introduced must still be loadable.
+    data = cache.dumps(game)
+
+    assert cache.loads_game(data) == game
+
+
 @pytest.mark.asyncio
 async def test_get_game(cache, game):  # noqa: F811
-    cache._cache.hget = AsyncMock(return_value=cache.dumps(game))
+    cache._cache.hget = AsyncMock(return_value=cache.dumps_game(game))
     assert await cache.get_game() == game
     cache._cache.hget.assert_called_once_with("game:game_id", "game")
 
@@ -252,17 +286,6 @@ async def test_get_game(cache, game):  # noqa: F811
     cache._cache.hget.assert_called_once_with("game:game_id", "game")
 
 
-@pytest.mark.asyncio
-async def test_save_session(cache):  # noqa: F811
-    cache._cache.zadd = AsyncMock()
-    cache._cache.expire = AsyncMock()
-
-    await cache.save_session(1)
-
-    cache._cache.zadd.assert_called_once_with("players:game_id", 1, "player_id")
-    assert cache._cache.expire.call_count == 1
-
-
 @pytest.mark.asyncio
 async def test_get_player_index(cache):  # noqa: F811
     slots = [
@@ -296,231 +319,250 @@ async def test_number_taken_slots(cache):  # noqa: F811
 
 
 @pytest.mark.asyncio
-async def test_affect_next_slot(cache):  # noqa: F811
-    slots = [
-        {"state": SlotState.TAKEN},
-        {"state": SlotState.OPEN, "index": 1},
-        {"state": SlotState.AI},
-    ]
-    cache.get_slots = AsyncMock(return_value=deepcopy(slots))
-    cache.update_slot = AsyncMock()
-    slot = slots[1]
-    slot["player_id"] = "player_id"
-    slot["state"] = SlotState.TAKEN
-    slot["player_name"] = "Player"
-    slot["hero"] = "daemon"
+async def test_take_next_slot(memory_cache):  # noqa: F811
+    memory_cache.init("game_id", "game_master_id")
+    await memory_cache.create_new_game(nb_slots=2)
+    assert await memory_cache.take_next_slot("Game master", "daemon") == (
+        "game_master_id",
+        0,
+        [
+            {
+                "state": SlotState.TAKEN,
+                "index": 0,
+                "player_id": "game_master_id",
+                "player_name": "Game master",
+                "hero": "daemon",
+            },
+            {"state": SlotState.OPEN, "index": 1, "player_id": "", "player_name": ""},
+        ],
+    )
+
+    memory_cache.init("game_id", "player_id")
+    game_master_id, index, slots = await memory_cache.take_next_slot("Player", "kharliass")
+
+    assert game_master_id == "game_master_id"
+    assert index == 1
+    assert slots[1] == {
+        "state": SlotState.TAKEN,
+        "index": 1,
+        "player_id": "player_id",
+        "player_name": "Player",
+        "hero": "kharliass",
+    }
+    assert await memory_cache.get_slots() == slots
+    assert await memory_cache.get_players_ids() == ["game_master_id", "player_id"]
+    assert await memory_cache._cache.hget("stats", "number_players") == b"2"
+    assert await memory_cache._cache.ttl("players:game_id") == memory_cache.TTL
+
+
+@pytest.mark.asyncio
+async def test_take_next_slot_cannot_join(memory_cache):  # noqa: F811
+    assert await memory_cache.take_next_slot("Player", "daemon") is None
+
+    await _save_lobby(memory_cache, "game_master_id", [{"state": SlotState.CLOSED, "index": 0}])
+    assert await memory_cache.take_next_slot("Player", "daemon") is None
+
+
+@pytest.mark.asyncio
+async def test_free_slot(memory_cache):  # noqa: F811
+    await _save_lobby(
+        memory_cache,
+        "game_master_id",
+        [
+            {"state": SlotState.TAKEN, "index": 0, "player_id": "game_master_id"},
+            {"state": SlotState.TAKEN, "index": 1, "player_id": "player_id", "hero": "daemon"},
+        ],
+    )
+
+    slots = await memory_cache.free_slot()
+
+    assert slots[1] == {"state": SlotState.OPEN, "index": 1, "player_name": "", "hero": "daemon"}
+    assert await memory_cache.get_slots() == slots
+    assert await memory_cache.free_slot() is None
 
-    assert await cache.affect_next_slot("Player", "daemon") == 1
-    cache.update_slot.assert_called_once_with(slot)
+
+async def _save_lobby(cache, game_master_id, slots):
+    await cache._cache.hmset(
+        "game:game_id", {"game_master": game_master_id, "slots": cache.dumps_slots(slots)}
+    )
+
+
+async def _update_slot(cache, game_master_id, cache_slot, slot):
+    await _save_lobby(cache, game_master_id, [cache_slot])
+    slots = await cache.update_slot(slot)
+    assert await cache.get_slots() == slots
+    return slots[0]
 
 
 @pytest.mark.asyncio
-async def test_update_slot_free(cache):  # noqa: F811
+async def test_update_slot_free(memory_cache):  # noqa: F811
     cache_slot = {
         "state": SlotState.TAKEN,
         "player_id": "player_id",
         "player_name": "Test",
         "index": 0,
     }
-    cache.get_slot = AsyncMock(return_value=deepcopy(cache_slot))
-    cache._save_slot = AsyncMock()
     slot = {
         "player_id": "player_id",
         "index": 0,
         "state": SlotState.OPEN,
     }
-    del cache_slot["player_id"]
-    cache_slot["state"] = SlotState.OPEN
-    cache_slot["player_name"] = ""
-
-    await cache.update_slot(slot)
 
-    cache._save_slot.assert_called_once_with(cache_slot)
+    assert await _update_slot(memory_cache, "game_master_id", cache_slot, slot) == {
+        "index": 0,
+        "state": SlotState.OPEN,
+        "player_name": "",
+    }
 
 
 @pytest.mark.asyncio
-async def test_update_slot_close(cache):  # noqa: F811
+async def test_update_slot_close(memory_cache):  # noqa: F811
     cache_slot = {
         "state": SlotState.AI,
         "player_name": "AI 2",
         "index": 0,
     }
-    cache.get_slot = AsyncMock(return_value=deepcopy(cache_slot))
-    cache._save_slot = AsyncMock()
-    cache.is_game_master = AsyncMock(return_value=True)
     slot = {
         "index": 0,
         "state": SlotState.CLOSED,
         "player_name": "AI 2",
     }
-    del cache_slot["player_name"]
-    cache_slot["state"] = SlotState.CLOSED
 
-    await cache.update_slot(slot)
-
-    cache._save_slot.assert_called_once_with(cache_slot)
+    assert await _update_slot(memory_cache, "player_id", cache_slot, slot) == {
+        "index": 0,
+        "state": SlotState.CLOSED,
+    }
 
 
 @pytest.mark.asyncio
-async def test_update_slot_open(cache):  # noqa: F811
+async def test_update_slot_open(memory_cache):  # noqa: F811
     cache_slot = {
         "state": SlotState.AI,
         "player_name": "AI 2",
         "index": 0,
     }
-    cache.get_slot = AsyncMock(return_value=deepcopy(cache_slot))
-    cache._save_slot = AsyncMock()
-    cache.is_game_master = AsyncMock(return_value=True)
     slot = {
         "index": 0,
         "state": SlotState.OPEN,
         "player_name": "AI 2",
     }
-    del cache_slot["player_name"]
-    cache_slot["state"] = SlotState.OPEN
 
-    await cache.update_slot(slot)
-
-    cache._save_slot.assert_called_once_with(cache_slot)
+    assert await _update_slot(memory_cache, "player_id", cache_slot, slot) == {
+        "index": 0,
+        "state": SlotState.OPEN,
+    }
 
 
 @pytest.mark.asyncio
-async def test_update_slot_update_not_game_master(cache):  # noqa: F811
+async def test_update_slot_update_not_game_master(memory_cache):  # noqa: F811
     cache_slot = {
         "state": SlotState.TAKEN,
         "player_id": "player_id",
         "index": 0,
     }
-    cache.get_slot = AsyncMock(return_value=deepcopy(cache_slot))
-    cache._save_slot = AsyncMock()
     slot = {
-        "player_id": "player_id",
         "hero": "daemon",
         "index": 0,
         "state": SlotState.TAKEN,
     }
-    cache_slot["hero"] = "daemon"
 
-    await cache.update_slot(slot)
-
-    cache._save_slot.assert_called_once_with(cache_slot)
+    assert await _update_slot(memory_cache, "game_master_id", cache_slot, slot) == {
+        "player_id": "player_id",
+        "hero": "daemon",
+        "index": 0,
+        "state": SlotState.TAKEN,
+    }
 
 
 @pytest.mark.asyncio
-async def test_update_slot_update_game_master(cache):  # noqa: F811
+async def test_update_slot_update_game_master(memory_cache):  # noqa: F811
     cache_slot = {
         "state": SlotState.OPEN,
         "index": 0,
     }
-    cache.get_slot = AsyncMock(return_value=deepcopy(cache_slot))
-    cache._save_slot = AsyncMock()
-    cache.is_game_master = AsyncMock(return_value=True)
     slot = {
         "state": SlotState.AI,
         "index": 0,
     }
-    cache_slot["state"] = SlotState.AI
-
-    await cache.update_slot(slot)
 
-    cache._save_slot.assert_called_once_with(cache_slot)
+    assert await _update_slot(memory_cache, "player_id", cache_slot, slot) == slot
 
 
 @pytest.mark.asyncio
-async def test_update_slot_update_game_master_taken(cache):  # noqa: F811
+async def test_update_slot_update_game_master_taken(memory_cache):  # noqa: F811
     cache_slot = {
         "state": SlotState.TAKEN,
         "index": 0,
     }
-    cache.get_slot = AsyncMock(return_value=deepcopy(cache_slot))
-    cache._save_slot = AsyncMock()
-    cache.is_game_master = AsyncMock(return_value=True)
     slot = {
         "state": SlotState.AI,
         "index": 0,
     }
-    cache_slot["state"] = SlotState.AI
 
-    await cache.update_slot(slot)
-
-    assert cache._save_slot.call_count == 0
+    assert await _update_slot(memory_cache, "player_id", cache_slot, slot) == cache_slot
 
 
 @pytest.mark.asyncio
-async def test_update_slot_take(cache):  # noqa: F811
+async def test_update_slot_update_other_player(memory_cache):  # noqa: F811
     cache_slot = {
-        "state": SlotState.OPEN,
+        "state": SlotState.AI,
         "index": 0,
     }
-    cache.get_slot = AsyncMock(return_value=deepcopy(cache_slot))
-    cache._save_slot = AsyncMock()
     slot = {
-        "state": SlotState.TAKEN,
-        "player_id": "player_id",
+        "state": SlotState.CLOSED,
         "index": 0,
     }
-    cache_slot["player_id"] = "player_id"
-    cache_slot["state"] = SlotState.TAKEN
-
-    await cache.update_slot(slot)
 
-    cache._save_slot.assert_called_once_with(cache_slot)
+    assert await _update_slot(memory_cache, "game_master_id", cache_slot, slot) == cache_slot
 
 
 @pytest.mark.asyncio
-async def test_save_slot(cache):  # noqa: F811
+async def test_update_slot_take(memory_cache):  # noqa: F811
+    cache_slot = {
+        "state": SlotState.OPEN,
+        "index": 0,
+    }
     slot = {
         "state": SlotState.TAKEN,
         "index": 0,
     }
-    cache._cache.lset = AsyncMock()
-
-    await cache._save_slot(slot)
 
-    cache._cache.lset.assert_called_once_with(
-        "slots:game_id",
-        0,
-        cache.dumps(slot),
-    )
+    assert await _update_slot(memory_cache, "game_master_id", cache_slot, slot) == {
+        "state": SlotState.TAKEN,
+        "player_id": "player_id",
+        "index": 0,
+    }
 
 
 @pytest.mark.asyncio
-async def test_slot_exists(cache):  # noqa: F811
-    slot = {
-        "index": 0,
-    }
-    cache.lindex = AsyncMock(return_value=None)
-    cache._get_redis_instance = MagicMock(return_value=cache)
-    assert not await cache.slot_exists(slot)
-    cache.lindex.assert_called_once_with("slots:game_id", 0)
+async def test_update_slot_non_existent(memory_cache):  # noqa: F811
+    assert await memory_cache.update_slot({"state": SlotState.CLOSED, "index": 0}) is None
 
-    cache.lindex = AsyncMock(return_value=slot)
-    cache._get_redis_instance = MagicMock(return_value=cache)
-    assert await cache.slot_exists(slot)
-    cache.lindex.assert_called_once_with("slots:game_id", 0)
+    await _save_lobby(memory_cache, "player_id", [{"state": SlotState.OPEN, "index": 0}])
+    assert await memory_cache.update_slot({"state": SlotState.CLOSED, "index": 1}) is None
+    assert await memory_cache.update_slot({"state": SlotState.CLOSED, "index": -1}) is None
 
 
 @pytest.mark.asyncio
-async def test_get_slot_from_game_id(cache, cache_cls, mocker):  # noqa: F811
-    slot = {
-        "index": 0,
-    }
-    cache.lindex = AsyncMock(return_value=cache_cls.dumps(slot))
-    mocker.patch.object(cache_cls, "_get_redis_instance", MagicMock(return_value=cache))
+async def test_get_lobby(cache):  # noqa: F811
+    slots = [{"state": SlotState.OPEN, "player_id": "id0"}]
+    cache._cache.hmget = AsyncMock(return_value=[b"id0", cache.dumps_slots(slots)])
 
-    assert await cache_cls.get_slot_from_game_id(0, "game_id") == slot
-    cache.lindex.assert_called_once_with("slots:game_id", 0)
+    assert await cache.get_lobby("other_game_id") == ("id0", slots)
+    cache._cache.hmget.assert_called_once_with("game:other_game_id", "game_master", "slots")
+
+    cache._cache.hmget = AsyncMock(return_value=[None, None])
+    assert await cache.get_lobby() == (None, [])
 
 
 @pytest.mark.asyncio
-async def test_get_slot(cache):  # noqa: F811
-    slot = {
-        "index": 0,
-    }
-    cache.lindex = AsyncMock(return_value=cache.dumps(slot))
-    cache._get_redis_instance = MagicMock(return_value=cache)
+async def test_get_lobby_legacy_slots(cache):  # noqa: F811
+    slots = [{"state": SlotState.OPEN, "player_id": "id0"}]
+    cache._cache.hmget = AsyncMock(return_value=[b"id0", None])
+    cache._cache.lrange = AsyncMock(return_value=dumps_list(cache, slots))
 
-    assert await cache.get_slot(0) == slot
+    assert await cache.get_lobby() == ("id0", slots)
+    cache._cache.lrange.assert_called_once_with("slots:game_id", 0, -1)
 
 
 @pytest.mark.asyncio
@@ -536,17 +578,110 @@ async def test_has_game_started(cache):  # noqa: F811
 
 @pytest.mark.asyncio
 async def test_game_has_started(cache):  # noqa: F811
-    cache._cache.hset = AsyncMock()
+    pipeline = _mock_pipeline(cache, [1, 1])
 
     await cache.game_has_started()
 
-    cache._cache.hset.assert_called_once_with("game:game_id", "started", b"true")
+    pipeline.hset.assert_called_once_with("game:game_id", "started", b"true")
+    pipeline.sadd.assert_called_once_with("stats:started_games", "game_id")
+    pipeline.execute.assert_called_once_with()
 
 
 @pytest.mark.asyncio
 async def test_save_game(cache, game):  # noqa: F811
-    cache._cache.hset = AsyncMock()
+    pipeline = _mock_pipeline(cache, [True, 1, 3])
+
+    assert await cache.save_game(game) == 3
+
+    cache._cache.pipeline.assert_called_once_with(transaction=True)
+    pipeline.hset.assert_called_once_with("game:game_id", "game", cache.dumps_game(game))
+    pipeline.delete.assert_called_once_with("events:game_id")
+    pipeline.hincrby.assert_called_once_with("game:game_id", "version", 1)
+    pipeline.execute.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_append_and_get_game_events(memory_cache):  # noqa: F811
+    new_events = [
+        Event(EventTypes.PLAY_REQUEST, ("PLAY_CARD", {"card_color": Color.RED}), 10, 1),
+        Event(EventTypes.AI_MOVE, (), 20, 2),
+    ]
+    await memory_cache._cache.hset("game:game_id", "version", 3)
+
+    assert await memory_cache.append_game_events(new_events, expected_version=3) == 4
+
+    assert await memory_cache.get_game_events() == new_events
+    assert await memory_cache.get_game_version() == 4
+    assert await memory_cache._cache.ttl("events:game_id") == memory_cache.TTL
 
-    await cache.save_game(game)
 
-    cache._cache.hset.assert_called_once_with("game:game_id", "game", cache.dumps(game))
+@pytest.mark.asyncio
+async def test_save_game_if_unchanged(memory_cache, game):  # noqa: F811
+    await memory_cache._cache.rpush("events:game_id", b"event")
+    await memory_cache._cache.sadd("stats:started_games", "game_id")
+
+    assert await memory_cache.save_game_if_unchanged(game, expected_version=None) == 1
+
+    assert await memory_cache.get_game_events() == []
+    assert await memory_cache._cache.scard("stats:started_games") == 1
+    assert await memory_cache._cache.hget("game:game_id", "over") is None
+
+    game._is_over = True
+    assert await memory_cache.save_game_if_unchanged(game, expected_version=1) == 2
+
+    assert await memory_cache._cache.scard("stats:started_games") == 0
+    assert await memory_cache._cache.hget("game:game_id", "over") == b"true"
+
+
+@pytest.mark.asyncio
+async def test_save_game_conflict(memory_cache, game, mocker):  # noqa: F811
+    mocker.patch.object(Cache, "_number_game_save_conflicts", 0)
+    await memory_cache._cache.hset("game:game_id", "version", 3)
+
+    with pytest.raises(GameVersionConflictError):
+        await memory_cache.save_game_if_unchanged(game, expected_version=2)
+    with pytest.raises(GameVersionConflictError):
+        await memory_cache.append_game_events([], expected_version=None)
+
+    assert Cache._number_game_save_conflicts == 2
+    assert await memory_cache.get_game_version() == 3
+
+
+@pytest.mark.asyncio
+async def test_load_game(cache, game):  # noqa: F811
+    cache._cache.hget = AsyncMock(side_effect=[b"3", cache.dumps_game(game)])
+    cache._cache.lrange = AsyncMock(return_value=[])
+
+    log = await cache.load_game()
+
+    assert log.game == game
+    assert log.game is not game
+    assert log.version == 3
+    assert log.number_events == 0
+    cache._cache.hget.assert_any_call("game:game_id", "version")
+
+    # The game didn't change since it was loaded: it is reused.
+    cache.keep_live_game(log)
+    cache._cache.hget = AsyncMock(return_value=b"3")
+
+    assert (await cache.load_game()).game is log.game
+    cache._cache.hget.assert_called_once_with("game:game_id", "version")
+
+
+@pytest.mark.asyncio
+async def test_load_game_changed_version(cache, game):  # noqa: F811
+    cache._cache.hget = AsyncMock(side_effect=[b"3", cache.dumps_game(game)])
+    cache._cache.lrange = AsyncMock(return_value=[])
+    log = await cache.load_game()
+    cache.keep_live_game(log)
+
+    cache._cache.hget = AsyncMock(side_effect=[b"4", cache.dumps_game(game)])
+
+    assert (await cache.load_game()).game is not log.game
+
+
+@pytest.mark.asyncio
+async def test_load_game_not_found(cache):  # noqa: F811
+    cache._cache.hget = AsyncMock(return_value=None)
+
+    assert await cache.load_game() is None
@@ -0,0 +1,134 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import json
+import random
+
+from aot.api import events, snapshot
+from aot.api.events import SNAPSHOT_INTERVAL, Event, EventLog, EventTypes
+from aot.api.serializers import get_global_game_message, get_private_player_messages_by_ids, to_json
+from aot.api.utils import RequestTypes
+from aot.config import config
+from aot.utils import get_time, replayable
+
+
+def setup_module():
+    config.setup_config()
+
+
+def _get_messages(game):
+    return json.loads(
+        json.dumps(
+            {
+                "global": get_global_game_message(game),
+                "private": get_private_player_messages_by_ids(game),
+            },
+            default=to_json,
+        )
+    )
+
+
+def _discard_request(game):
+    card = game.active_player.hand[0]
+    return {"discard": True, "card_name": card.name, "card_color": card.color}
+
+
+def test_replayable():
+    random.seed(0)
+    expected_state = random.getstate()
+
+    with replayable(10, 42):
+        assert get_time() == 10
+        first_draw = random.random()
+    with replayable(20, 42):
+        assert get_time() == 20
+        assert random.random() == first_draw
+
+    assert get_time() != 10
+    assert random.getstate() == expected_state
+
+
+def test_dumps_loads():
+    event = Event(EventTypes.PLAY_REQUEST, ("PLAY_CARD", {"pass": True}), 10, 42)
+
+    assert events.loads(events.dumps(event)) == event
+
+
+def test_replay(game, mocker):  # noqa: F811
+    # Let the decks draw their cards at random, the replay must draw the same.
+    mocker.stopall()
+    saved_game = snapshot.dumps(game)
+    log = EventLog(game)
+
+    log.play_request(RequestTypes.PLAY_CARD, _discard_request(game))
+    log.play_request(RequestTypes.PLAY_CARD, {"pass": True})
+    log.play(EventTypes.DISCONNECTION, game.active_player.id)
+    log.play(EventTypes.CONNECTIONS_CHANGE, [game.get_player_by_index(2).id], True)
+    for _ in range(30):
+        log.play(EventTypes.AI_MOVE)
+
+    saved_events = [events.loads(events.dumps(event)) for event in log.new_events]
+    mocker.patch("aot.api.serializers.get_time", return_value=game.active_player.turn_start_time)
+    loaded_game = snapshot.loads(saved_game)
+    loaded_log = EventLog.from_events(loaded_game, saved_events)
+
+    assert loaded_log.new_events == []
+    assert _get_messages(loaded_game) == _get_messages(game)
+    assert loaded_game.version == game.version == 34
+
+
+def test_must_snapshot(game):  # noqa: F811
+    log = EventLog(game)
+    assert not log.must_snapshot
+
+    log.play_request(RequestTypes.PLAY_CARD, _discard_request(game))
+    assert not log.must_snapshot
+
+    # All the players pass, the turn is over.
+    for _ in game.players:
+        log.play_request(RequestTypes.PLAY_CARD, {"pass": True})
+    assert log.must_snapshot
+
+
+def test_must_snapshot_interval(game):  # noqa: F811
+    saved_events = [Event(EventTypes.CONNECTIONS_CHANGE, ([], True), 0, 0)] * (
+        SNAPSHOT_INTERVAL - 1
+    )
+    log = EventLog.from_events(game, saved_events)
+    assert not log.must_snapshot
+
+    log.play_request(RequestTypes.PLAY_CARD, _discard_request(game))
+    assert log.must_snapshot
+
+
+def test_mark_saved(game):  # noqa: F811
+    log = EventLog(game, number_saved_events=2, version=3)
+    log.play_request(RequestTypes.PLAY_CARD, _discard_request(game))
+
+    log.mark_saved(4, in_snapshot=False)
+
+    assert log.new_events == []
+    assert log.number_events == 3
+    assert log.version == 4
+
+    log.play_request(RequestTypes.PLAY_CARD, {"pass": True})
+    log.mark_saved(5, in_snapshot=True)
+
+    assert log.number_events == 0
+    assert log.version == 5
@@ -28,6 +28,6 @@ def test_get_cards_list():
         if card.name == "Bishop":
             assert len(card.colors) == 2
         elif card.name == "Assassin":
-            assert len(card._special_actions) == 1
-            action = card._special_actions[0]
+            assert len(card.special_actions) == 1
+            action = card.special_actions[0]
             assert isinstance(action, SpecialAction)
@@ -0,0 +1,199 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import json
+
+import pytest
+
+from aot.api.game_updates import GameUpdates, make_patch
+from aot.api.utils import RequestTypes
+
+
+def _player_message(game_version, elapsed_time=0):
+    return {
+        "rt": RequestTypes.PLAYER_UPDATED,
+        "request": {"id": "player_id", "game_version": game_version, "elapsed_time": elapsed_time},
+    }
+
+
+def _game_message(version, actions, game_id="game_id"):
+    return {
+        "rt": RequestTypes.GAME_UPDATED,
+        "request": {
+            "id": game_id,
+            "actions": actions,
+            "players": {0: {"square": {"x": version, "y": 0}}},
+            "version": version,
+        },
+    }
+
+
+@pytest.mark.parametrize(
+    "source,target,patch",
+    [
+        pytest.param({"a": 1}, {"a": 1}, [], id="same"),
+        pytest.param({"a": 1}, {"a": 2}, [{"op": "replace", "path": "/a", "value": 2}], id="value"),
+        pytest.param(
+            {"a": 1},
+            {"b/c~": 2},
+            [{"op": "remove", "path": "/a"}, {"op": "add", "path": "/b~1c~0", "value": 2}],
+            id="keys",
+        ),
+        pytest.param(
+            {"a": {"b": [1, 2, 3]}},
+            {"a": {"b": [2, 3, 4]}},
+            [
+                {"op": "remove", "path": "/a/b/0"},
+                {"op": "add", "path": "/a/b/-", "value": 4},
+            ],
+            id="sliding_list",
+        ),
+        pytest.param(
+            [1, 2],
+            [3],
+            [{"op": "replace", "path": "", "value": [3]}],
+            id="other_list",
+        ),
+    ],
+)
+def test_make_patch(source, target, patch):
+    assert make_patch(source, target) == patch
+
+
+def test_get_messages_without_version():
+    game_updates = GameUpdates(history_size=2, max_games=2)
+    messages = game_updates.record([_game_message(1, ["a"]), {"rt": "PLAYER_UPDATED"}])
+
+    assert game_updates.get_messages(messages) == [
+        json.dumps({**_game_message(1, ["a"]), "rt": "GAME_UPDATED"}),
+        {"rt": "PLAYER_UPDATED"},
+    ]
+
+
+def test_get_messages_patch():
+    actions = [{"description": f"Action number {index}", "index": index} for index in range(10)]
+    game_updates = GameUpdates(history_size=2, max_games=2)
+    game_updates.record([_game_message(1, actions[:-1])])
+    messages = game_updates.record([_game_message(2, actions[1:])])
+
+    (message,) = game_updates.get_messages(messages, version=1)
+
+    assert json.loads(message) == {
+        "rt": "GAME_UPDATED",
+        "request": {
+            "id": "game_id",
+            "base_version": 1,
+            "version": 2,
+            "patch": [
+                {"op": "remove", "path": "/actions/0"},
+                {"op": "add", "path": "/actions/-", "value": actions[-1]},
+                {"op": "replace", "path": "/players/0/square/x", "value": 2},
+                {"op": "replace", "path": "/version", "value": 2},
+            ],
+        },
+    }
+
+
+def test_get_messages_unknown_version():
+    game_updates = GameUpdates(history_size=2, max_games=2)
+    game_updates.record([_game_message(1, [])])
+    game_updates.record([_game_message(2, [])])
+    messages = game_updates.record([_game_message(3, [])])
+
+    assert game_updates.get_messages(messages, version=1) == game_updates.get_messages(messages)
+
+
+def test_get_messages_evicted_game():
+    game_updates = GameUpdates(history_size=2, max_games=1)
+    game_updates.record([_game_message(1, [])])
+    game_updates.record([_game_message(1, [], game_id="other_game")])
+    messages = game_updates.record([_game_message(2, [])])
+
+    assert game_updates.get_messages(messages, version=1) == game_updates.get_messages(messages)
+
+
+def test_get_messages_patches_disabled():
+    game_updates = GameUpdates(history_size=0, max_games=2)
+    game_updates.record([_game_message(1, [])])
+    messages = game_updates.record([_game_message(2, [])])
+
+    assert game_updates.get_messages(messages, version=1) == game_updates.get_messages(messages)
+
+
+def test_get_messages_patch_bigger_than_state():
+    game_updates = GameUpdates(history_size=2, max_games=2)
+    game_updates.record([_game_message(1, [1, 2])])
+    messages = game_updates.record([_game_message(2, [3])])
+
+    assert game_updates.get_messages(messages, version=1) == game_updates.get_messages(messages)
+
+
+def test_has_version():
+    game_updates = GameUpdates(history_size=2, max_games=2)
+    game_updates.record([_game_message(1, [])])
+
+    assert game_updates.has_version("game_id", 1)
+    assert not game_updates.has_version("game_id", 0)
+    assert not game_updates.has_version("other_game", 1)
+    assert not game_updates.has_version("game_id", None)
+
+
+def test_get_version():
+    game_updates = GameUpdates(history_size=2, max_games=2)
+    messages = game_updates.record([_game_message(1, []), _game_message(2, [])])
+
+    assert GameUpdates.get_version(messages) == 2
+    assert GameUpdates.get_version([{"rt": "PLAYER_UPDATED"}], version=1) == 1
+
+
+def test_get_resume_messages(mocker):
+    mocker.patch("aot.api.game_updates.get_time", return_value=1000)
+    game_updates = GameUpdates(history_size=2, max_games=2)
+    game_updates.record([_game_message(1, [])])
+    game_updates.record([_player_message(1)], game_id="game_id")
+    messages = game_updates.record([_game_message(2, [])])
+    game_updates.record([_player_message(2, elapsed_time=10)], game_id="game_id")
+    mocker.patch("aot.api.game_updates.get_time", return_value=1500)
+
+    resume_messages = game_updates.get_resume_messages("game_id", "player_id", 1)
+
+    assert resume_messages == [messages[0], _player_message(2, elapsed_time=510)]
+    # The state of the game is sent as a patch from the version of the player.
+    assert game_updates.get_messages(resume_messages, version=1) == game_updates.get_messages(
+        [messages[0], _player_message(2, elapsed_time=510)], version=1
+    )
+
+
+def test_get_resume_messages_without_states():
+    game_updates = GameUpdates(history_size=2, max_games=1)
+    game_updates.record([_game_message(1, [])])
+    game_updates.record([_player_message(1)], game_id="game_id")
+    game_updates.record([_game_message(2, [])])
+
+    # The private state of the player was not sent for the last version of the game.
+    assert game_updates.get_resume_messages("game_id", "player_id", 1) is None
+    assert game_updates.get_resume_messages("game_id", "other_player_id", 1) is None
+    assert game_updates.get_resume_messages("game_id", "player_id", 0) is None
+
+    game_updates.record([_player_message(2)], game_id="game_id")
+    game_updates.record([_game_message(1, [], game_id="other_game")])
+    game_updates.record([_game_message(2, [])])
+
+    # The private states of the evicted games are not kept.
+    assert game_updates.get_resume_messages("game_id", "player_id", 2) is None
@@ -0,0 +1,70 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+from aot.api.events import EventLog
+from aot.api.live_games import LiveGames
+
+
+def test_take(game):  # noqa: F811
+    live_games = LiveGames(max_size=2)
+    live_games.put("game_id", EventLog(game, number_saved_events=2, version=3))
+
+    log = live_games.take("game_id", 3)
+
+    assert log.game is game
+    assert log.version == 3
+    assert log.number_events == 2
+    # The game is taken out of the cache while it is played.
+    assert live_games.take("game_id", 3) is None
+    assert live_games.stats == {
+        "live_games": 0,
+        "live_games_hits": 1,
+        "live_games_misses": 1,
+        "live_games_evictions": 0,
+    }
+
+
+def test_take_other_version(game):  # noqa: F811
+    live_games = LiveGames(max_size=2)
+    live_games.put("game_id", EventLog(game, version=3))
+
+    assert live_games.take("game_id", 4) is None
+    assert live_games.take("game_id", None) is None
+    assert len(live_games) == 0
+
+
+def test_put_without_version(game):  # noqa: F811
+    live_games = LiveGames(max_size=2)
+
+    live_games.put("game_id", EventLog(game))
+
+    assert len(live_games) == 0
+
+
+def test_eviction(game):  # noqa: F811
+    live_games = LiveGames(max_size=2)
+    live_games.put("game1", EventLog(game, version=1))
+    live_games.put("game2", EventLog(game, version=1))
+    live_games.put("game1", EventLog(game, version=2))
+    live_games.put("game3", EventLog(game, version=1))
+
+    assert live_games.take("game2", 1) is None
+    assert live_games.take("game1", 2) is not None
+    assert live_games.take("game3", 1) is not None
+    assert live_games.stats["live_games_evictions"] == 1
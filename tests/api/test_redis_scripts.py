@@ -0,0 +1,269 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+"""Run the Lua scripts of the cache on redis and their Python versions on the memory storage.
+
+Both are run with the same keys, arguments and initial state and must give the same result and
+leave the same state. Slots are compared once decoded since cjson doesn't order the keys of
+objects.
+"""
+
+import json
+from uuid import uuid4
+
+import pytest
+from aredis.exceptions import RedisError
+
+from aot.api import cache
+from aot.api.storage import MemoryStorage, RedisStorage
+from aot.config import config
+
+pytestmark = [pytest.mark.redis, pytest.mark.asyncio]
+
+GAME_MASTER_SLOT = {
+    "index": 0,
+    "state": "TAKEN",
+    "player_id": "game-master-id",
+    "player_name": "Game Master",
+    "hero": "daemon",
+}
+PLAYER_SLOT = {
+    "index": 1,
+    "state": "TAKEN",
+    "player_id": "player-id",
+    "player_name": "Player",
+    "hero": "kharliass",
+}
+OPEN_SLOT = {"index": 1, "state": "OPEN", "player_name": ""}
+CLOSED_SLOT = {"index": 2, "state": "CLOSED", "player_name": "Previous player"}
+AI_SLOT = {"index": 2, "state": "AI", "player_name": "AI 2", "hero": "arline"}
+
+
+async def _get_redis():
+    config.setup_config()
+    redis = RedisStorage(
+        host=config["cache"]["host"],
+        port=config["cache"]["port"],
+        connect_timeout=1,
+        stream_timeout=config["cache"]["timeout"],
+    )
+    try:
+        await redis.ping()
+    except RedisError:
+        pytest.skip("No redis server available.")
+    return redis
+
+
+async def _run_script(script, keys, args, setup, read):
+    """Run the script on redis and in memory.
+
+    Args:
+        keys: names of the keys, they are prefixed so the test doesn't use existing keys.
+        setup: coroutine function creating the initial state, called with the storage and the keys.
+        read: coroutine function returning the state to compare, called like setup.
+
+    Returns:
+        list: the result of the script and the state after it for redis and the memory storage.
+    """
+    redis = await _get_redis()
+    prefix = f"test-scripts:{uuid4().hex}:"
+    keys = [prefix + key for key in keys]
+    results = []
+    try:
+        for storage in (redis, MemoryStorage()):
+            await setup(storage, *keys)
+            result = await storage.run_script(script, keys=keys, args=args)
+            results.append((result, await read(storage, *keys)))
+    finally:
+        await redis.delete(*keys)
+
+    return results
+
+
+async def _setup_game(storage, game_key, events_key, started_games_key, version=None):
+    if version is not None:
+        await storage.hset(game_key, "version", version)
+    await storage.hset(game_key, "game", b"previous-snapshot")
+    await storage.rpush(events_key, b"previous-event")
+    await storage.sadd(started_games_key, "game-id", "other-game-id")
+
+
+async def _read_game(storage, game_key, events_key, started_games_key):
+    return (
+        await storage.hmget(game_key, "version", "game", "over"),
+        await storage.lrange(events_key, 0, -1),
+        await storage.ttl(events_key) > 0,
+        await storage.scard(started_games_key),
+    )
+
+
+@pytest.mark.parametrize(
+    "version, expected_version",
+    [(None, ""), (3, "3"), (3, "2"), (None, "1"), (3, "")],
+)
+async def test_append_game_events(version, expected_version):
+    async def setup(storage, *keys):
+        await _setup_game(storage, *keys, version=version)
+
+    (redis_result, redis_state), (memory_result, memory_state) = await _run_script(
+        cache._APPEND_GAME_EVENTS_SCRIPT,
+        ["game", "events", "started_games"],
+        [expected_version, 60, b"event-1", b"event-2"],
+        setup,
+        _read_game,
+    )
+
+    assert redis_result == memory_result
+    assert redis_state == memory_state
+
+
+@pytest.mark.parametrize(
+    "version, expected_version, over_game_id",
+    [(None, "", ""), (3, "3", ""), (3, "3", "game-id"), (3, "2", "game-id"), (None, "0", "")],
+)
+async def test_save_game(version, expected_version, over_game_id):
+    async def setup(storage, *keys):
+        await _setup_game(storage, *keys, version=version)
+
+    (redis_result, redis_state), (memory_result, memory_state) = await _run_script(
+        cache._SAVE_GAME_SCRIPT,
+        ["game", "events", "started_games"],
+        [expected_version, b"snapshot", over_game_id],
+        setup,
+        _read_game,
+    )
+
+    assert redis_result == memory_result
+    assert redis_state == memory_state
+
+
+def _setup_lobby(slots, game_master_id="game-master-id", players=()):
+    async def setup(storage, game_key, *other_keys):
+        if game_master_id is not None:
+            await storage.hset(game_key, "game_master", game_master_id)
+        if slots is not None:
+            await storage.hset(game_key, "slots", json.dumps(slots))
+        if other_keys:
+            players_key, stats_key = other_keys
+            await storage.hset(stats_key, "number_players", 5)
+            for index, player_id in players:
+                await storage.zadd(players_key, index, player_id)
+
+    return setup
+
+
+def _decode_slots(encoded_slots):
+    return None if encoded_slots is None else json.loads(encoded_slots)
+
+
+async def _read_lobby(storage, game_key, *other_keys):
+    state = [_decode_slots(await storage.hget(game_key, "slots"))]
+    if other_keys:
+        players_key, stats_key = other_keys
+        state.append(await storage.zrange(players_key, 0, -1))
+        state.append(await storage.hget(stats_key, "number_players"))
+        state.append(await storage.ttl(players_key) > 0)
+    return state
+
+
+@pytest.mark.parametrize(
+    "slots, game_master_id, players",
+    [
+        ([GAME_MASTER_SLOT, OPEN_SLOT, CLOSED_SLOT], "game-master-id", [(0, "game-master-id")]),
+        ([GAME_MASTER_SLOT, OPEN_SLOT], "game-master-id", [(0, "game-master-id"), (1, "player")]),
+        ([GAME_MASTER_SLOT, PLAYER_SLOT, AI_SLOT], "game-master-id", []),
+        ([GAME_MASTER_SLOT, OPEN_SLOT], None, []),
+        (None, "game-master-id", []),
+    ],
+)
+async def test_take_next_slot(slots, game_master_id, players):
+    results = await _run_script(
+        cache._TAKE_NEXT_SLOT_SCRIPT,
+        ["game", "players", "stats"],
+        ["player", "Player", "kharliass", 60],
+        _setup_lobby(slots, game_master_id, players),
+        _read_lobby,
+    )
+
+    (redis_result, redis_state), (memory_result, memory_state) = results
+    if redis_result is not None:
+        redis_result[2] = _decode_slots(redis_result[2])
+        memory_result[2] = _decode_slots(memory_result[2])
+    assert redis_result == memory_result
+    assert redis_state == memory_state
+
+
+@pytest.mark.parametrize(
+    "slots, player_id",
+    [
+        ([GAME_MASTER_SLOT, PLAYER_SLOT, CLOSED_SLOT], "player-id"),
+        ([GAME_MASTER_SLOT, PLAYER_SLOT], "unknown-player-id"),
+        (None, "player-id"),
+    ],
+)
+async def test_free_slot(slots, player_id):
+    (redis_result, redis_state), (memory_result, memory_state) = await _run_script(
+        cache._FREE_SLOT_SCRIPT,
+        ["game"],
+        [player_id],
+        _setup_lobby(slots),
+        _read_lobby,
+    )
+
+    assert _decode_slots(redis_result) == _decode_slots(memory_result)
+    assert redis_state == memory_state
+
+
+@pytest.mark.parametrize(
+    "slots, player_id, slot",
+    [
+        # A player takes an opened slot.
+        ([GAME_MASTER_SLOT, OPEN_SLOT], "player-id", {**OPEN_SLOT, "state": "TAKEN"}),
+        # A player updates and frees its own slot.
+        ([GAME_MASTER_SLOT, PLAYER_SLOT], "player-id", {**PLAYER_SLOT, "hero": "arline"}),
+        ([GAME_MASTER_SLOT, PLAYER_SLOT], "player-id", {**PLAYER_SLOT, "state": "OPEN"}),
+        (
+            [GAME_MASTER_SLOT, PLAYER_SLOT],
+            "player-id",
+            {"index": 1, "state": "OPEN", "player_name": "Player"},
+        ),
+        # The game master closes, opens or gives to the AI slots not taken by a player.
+        ([GAME_MASTER_SLOT, OPEN_SLOT, AI_SLOT], "game-master-id", {**AI_SLOT, "state": "CLOSED"}),
+        ([GAME_MASTER_SLOT, CLOSED_SLOT], "game-master-id", {**CLOSED_SLOT, "state": "OPEN"}),
+        ([GAME_MASTER_SLOT, OPEN_SLOT], "game-master-id", {**OPEN_SLOT, "state": "AI"}),
+        # Updates that are not allowed don't change the slots.
+        ([GAME_MASTER_SLOT, PLAYER_SLOT], "game-master-id", {**PLAYER_SLOT, "state": "CLOSED"}),
+        ([GAME_MASTER_SLOT, CLOSED_SLOT], "player-id", {**CLOSED_SLOT, "state": "OPEN"}),
+        # The slot or the lobby doesn't exist.
+        ([GAME_MASTER_SLOT, OPEN_SLOT], "player-id", {**OPEN_SLOT, "index": 2}),
+        ([GAME_MASTER_SLOT, OPEN_SLOT], "player-id", {**OPEN_SLOT, "index": -1}),
+        (None, "player-id", OPEN_SLOT),
+    ],
+)
+async def test_update_slot(slots, player_id, slot):
+    (redis_result, redis_state), (memory_result, memory_state) = await _run_script(
+        cache._UPDATE_SLOT_SCRIPT,
+        ["game"],
+        [player_id, json.dumps(slot)],
+        _setup_lobby(slots),
+        _read_lobby,
+    )
+
+    assert _decode_slots(redis_result) == _decode_slots(memory_result)
+    assert redis_state == memory_state
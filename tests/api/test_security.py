@@ -21,13 +21,15 @@ from base64 import b64encode
 
 import pytest
 
-from aot.api.security import InvalidSignatureError, decode, encode
+from aot.api.security import MAC_SIZE, InvalidSignatureError, decode, encode, sign
 from aot.config import config
 
 
 @pytest.fixture
 def mocked_config(monkeypatch):
     monkeypatch.setenv("CACHE_SIGN_KEY", "secret-key")
+    monkeypatch.setenv("CACHE_SIGN_KEY_ID", "2")
+    monkeypatch.setenv("CACHE_PREVIOUS_SIGN_KEYS", "1=previous-key")
     config.setup_config()
     return config
 
@@ -38,27 +40,82 @@ def mock_config(mocker, mocked_config):
 
 
 @pytest.fixture
-def signed_data():
+def legacy_signed_data():
     return b"c29tZS1kYXRh:J0b3ch+I7MkSXGtihguEjv3AAxDwgxQUBBoIoWr7SGTocK+rABXerCV4Z4Gtb1rCkvgqmMFnpfnGzwo2G6VLeg=="  # noqa
 
 
-def test_sign(signed_data):
+def test_encode():
     data = b"some-data"
-    encoded_data = encode(data)
+    signed_data = encode(data)
 
-    assert b":" in encoded_data
-    assert signed_data == encoded_data
+    assert signed_data[:2] == bytes((1, 2))
+    assert signed_data[2 + MAC_SIZE :] == data  # noqa: E203 (black slices)
+    assert len(signed_data) == 2 + MAC_SIZE + len(data)
 
 
-def test_decode(signed_data):
-    data = decode(signed_data)
+def test_decode():
+    assert decode(encode(b"some-data")) == b"some-data"
+    assert decode(encode(b"")) == b""
+
+
+def test_decode_previous_key(mocker, mocked_config):
+    previous_config = {
+        "cache": {
+            "sign_key": b"previous-key",
+            "sign_key_id": 1,
+            "previous_sign_keys": {},
+        }
+    }
+    mocker.patch("aot.api.security.config", previous_config)
+    signed_data = encode(b"some-data")
+    mocker.patch("aot.api.security.config", mocked_config)
+
+    assert decode(signed_data) == b"some-data"
+
+
+def test_decode_unknown_key():
+    signed_data = bytearray(encode(b"some-data"))
+    signed_data[1] = 3
+
+    with pytest.raises(InvalidSignatureError):
+        decode(bytes(signed_data))
+
+
+def test_decode_invalid_signature():
+    signed_data = bytearray(encode(b"some-data"))
+    signed_data[2] ^= 1
+
+    with pytest.raises(InvalidSignatureError):
+        decode(bytes(signed_data))
+
+
+def test_decode_change_data():
+    signed_data = encode(b"some-data") + b"more-data"
+
+    with pytest.raises(InvalidSignatureError):
+        decode(signed_data)
+
+
+def test_decode_truncated():
+    with pytest.raises(InvalidSignatureError):
+        decode(bytes((1,)))
+
+
+def test_decode_legacy(legacy_signed_data):
+    data = decode(legacy_signed_data)
 
     assert data == b"some-data"
 
 
-def test_decode_invalid_signature(signed_data):
+def test_decode_legacy_previous_key():
+    signed_data = b64encode(b"some-data") + b":" + b64encode(sign(b"some-data", b"previous-key"))
+
+    assert decode(signed_data) == b"some-data"
+
+
+def test_decode_legacy_invalid_signature(legacy_signed_data):
     # We rely on the encode function
-    _, signature = signed_data.rsplit(b":", 1)
+    _, signature = legacy_signed_data.rsplit(b":", 1)
     # We rely on b64encode to encode the new data to prevent base 64 decode errors.
     data = b64encode(b"some_bytes_to_change_signature")
     signed_data = data + b":" + signature
@@ -67,8 +124,8 @@ def test_decode_invalid_signature(signed_data):
         decode(signed_data)
 
 
-def test_decode_change_data(signed_data):
-    signed_data = b"some_bytes_to_change_data" + signed_data
+def test_decode_legacy_change_data(legacy_signed_data):
+    signed_data = b"some_bytes_to_change_data" + legacy_signed_data
 
     with pytest.raises(InvalidSignatureError):
         decode(signed_data)
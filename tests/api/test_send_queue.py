@@ -0,0 +1,86 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import pytest
+
+from aot.api.game_updates import GameState, PlayerState
+from aot.api.send_queue import OverflowPolicies, SendQueue, SendQueueOverflowError
+from aot.api.utils import RequestTypes
+
+
+def _player_message(player_id, rank):
+    return {"rt": RequestTypes.PLAYER_UPDATED, "request": {"id": player_id, "rank": rank}}
+
+
+def test_put_coalesce_states():
+    queue = SendQueue(max_size=3, overflow_policy=OverflowPolicies.CLOSE)
+    first_state = GameState("game_id", 1, "state 1")
+    second_state = GameState("game_id", 2, "state 2")
+
+    queue.put(first_state)
+    queue.put(_player_message("player_id", 0))
+    queue.put({"rt": RequestTypes.SLOT_UPDATED})
+    queue.put(second_state)
+    queue.put(_player_message("player_id", 1))
+
+    assert len(queue) == 3
+    assert queue.number_dropped == 2
+    assert queue.pop_all() == [
+        {"rt": RequestTypes.SLOT_UPDATED},
+        second_state,
+        _player_message("player_id", 1),
+    ]
+    assert len(queue) == 0
+
+
+def test_put_coalesce_recorded_player_states():
+    queue = SendQueue(max_size=3, overflow_policy=OverflowPolicies.CLOSE)
+    second_state = PlayerState("game_id", "player_id", 2, "state 2")
+
+    queue.put(PlayerState("game_id", "player_id", 1, "state 1"))
+    queue.put(PlayerState("game_id", "other_player_id", 1, "other state"))
+    queue.put(second_state)
+
+    assert queue.number_dropped == 1
+    assert queue.pop_all()[-1] is second_state
+
+
+def test_put_overflow_close():
+    queue = SendQueue(max_size=1, overflow_policy=OverflowPolicies.CLOSE)
+    queue.put({"debug": 1})
+
+    with pytest.raises(SendQueueOverflowError):
+        queue.put({"debug": 2})
+
+
+@pytest.mark.parametrize(
+    "overflow_policy,messages",
+    [
+        pytest.param(OverflowPolicies.DROP_OLDEST, [{"debug": 2}, {"debug": 3}], id="drop_oldest"),
+        pytest.param(OverflowPolicies.DROP_NEWEST, [{"debug": 1}, {"debug": 2}], id="drop_newest"),
+    ],
+)
+def test_put_overflow_drop(overflow_policy, messages):
+    queue = SendQueue(max_size=2, overflow_policy=overflow_policy)
+
+    for index in range(1, 4):
+        queue.put({"debug": index})
+
+    assert queue.pop_all() == messages
+    assert queue.number_dropped == 1
@@ -0,0 +1,136 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import json
+import pickle  # noqa: S403 (bandit: pickle security issues)
+
+import pytest
+
+from aot.api import snapshot
+from aot.api.serializers import get_global_game_message, get_private_player_messages_by_ids, to_json
+from aot.config import config
+from aot.game.board import Color, Square
+
+
+def setup_module():
+    config.setup_config()
+
+
+def _play_some_turns(game, mocker):
+    for _ in range(6):
+        game.play_auto()
+    game.board.change_color_of_square(0, 0, Color.RED)
+    player = game.active_player
+    mocker.patch.object(player.gauge, "can_play_trump", return_value=True)
+    game.play_trump(player.available_trumps[1], game.get_player_by_index(1), {"board": game.board})
+    game.pass_turn()
+    player = game.active_player
+    mocker.patch.object(player.gauge, "can_play_trump", return_value=True)
+    game.play_trump(player.available_trumps[0], player, {"board": game.board})
+
+
+def _get_messages(game):
+    return json.loads(
+        json.dumps(
+            {
+                "global": get_global_game_message(game),
+                "private": get_private_player_messages_by_ids(game),
+            },
+            default=to_json,
+        )
+    )
+
+
+def test_round_trip(game, mocker):  # noqa: F811
+    _play_some_turns(game, mocker)
+    # The messages contain the time elapsed since the start of the turn.
+    mocker.patch("aot.api.serializers.get_time", return_value=game.active_player.turn_start_time)
+
+    loaded_game = snapshot.loads(snapshot.dumps(game))
+
+    assert loaded_game is not game
+    assert _get_messages(loaded_game) == _get_messages(game)
+    assert loaded_game.board.version == game.board.version
+    assert loaded_game.board.updated_squares == game.board.updated_squares
+    assert loaded_game.board.occupied_mask == game.board.occupied_mask
+    # References between the objects of the game are kept.
+    assert loaded_game.active_player is loaded_game.get_player_by_index(game.active_player.index)
+    initiator = game.get_player_by_index(1).trump_effects[0]._initiator
+    loaded_effect = loaded_game.get_player_by_index(1).trump_effects[0]
+    assert loaded_effect._initiator is loaded_game.get_player_by_index(initiator.index)
+    card_action = next(action for action in reversed(loaded_game.actions) if action.card)
+    assert any(card_action.card is card for card in card_action.initiator.deck.graveyard)
+    assert all(card._board is loaded_game.board for card in loaded_game.active_player.deck)
+
+
+def test_round_trip_detached_square(game):  # noqa: F811
+    square = Square(8, 2, Color.BLUE, is_occupied=True)
+    square.color = Color.RED
+    game.active_player._last_square_previous_turn = square
+
+    loaded_square = snapshot.loads(snapshot.dumps(game)).active_player.last_square_previous_turn
+
+    assert loaded_square == square
+    assert loaded_square.color == Color.RED
+    assert loaded_square.occupied
+
+
+def test_round_trip_detached_square_without_color(game):  # noqa: F811
+    game.active_player._last_square_previous_turn = Square(8, 2, None)
+
+    loaded_square = snapshot.loads(snapshot.dumps(game)).active_player.last_square_previous_turn
+
+    assert loaded_square == Square(8, 2, None)
+    assert loaded_square.color is None
+
+
+def test_snapshot_smaller_than_pickle(game, mocker):  # noqa: F811
+    _play_some_turns(game, mocker)
+    # Mocks cannot be pickled.
+    mocker.stopall()
+
+    assert 3 * len(snapshot.dumps(game)) <= len(pickle.dumps(game))
+
+
+def test_migrations(game, mocker):  # noqa: F811
+    migration = mocker.MagicMock(side_effect=lambda tree: tree)
+    mocker.patch.dict(snapshot.MIGRATIONS, {snapshot.FORMAT_VERSION - 1: migration})
+    data = snapshot.dumps(game)
+    old_data = bytes((snapshot.FORMAT_VERSION - 1,)) + data[1:]
+
+    loaded_game = snapshot.loads(old_data)
+
+    assert loaded_game.game_id == game.game_id
+    migration.assert_called_once()
+
+
+def test_missing_migration(game):  # noqa: F811
+    data = snapshot.dumps(game)
+    old_data = bytes((snapshot.FORMAT_VERSION - 1,)) + data[1:]
+
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.loads(old_data)
+
+
+def test_more_recent_version(game):  # noqa: F811
+    data = snapshot.dumps(game)
+    new_data = bytes((snapshot.FORMAT_VERSION + 1,)) + data[1:]
+
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.loads(new_data)
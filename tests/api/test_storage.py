@@ -0,0 +1,207 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from aot.api import storage as storage_module
+from aot.api.storage import MemoryStorage, Script, create_storage
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def storage(clock):
+    return MemoryStorage(clock=clock)
+
+
+def test_create_redis_storage(mocker):  # noqa: F811
+    cfg = {
+        "cache": {"backend": "redis", "host": "127.0.0.1", "port": "6379", "timeout": 5},
+    }
+    redis = MagicMock()
+    mocker.patch("aot.api.storage.config", new=cfg)
+    mocker.patch("aot.api.storage.RedisStorage", new=redis)
+
+    create_storage()
+
+    redis.assert_called_once_with(
+        host=cfg["cache"]["host"],
+        port=cfg["cache"]["port"],
+        connect_timeout=cfg["cache"]["timeout"],
+        stream_timeout=cfg["cache"]["timeout"],
+        loop=None,
+    )
+
+
+def test_create_memory_storage(mocker):  # noqa: F811
+    mocker.patch("aot.api.storage.config", new={"cache": {"backend": "memory"}})
+
+    assert isinstance(create_storage(), MemoryStorage)
+
+
+def test_create_unknown_storage(mocker):  # noqa: F811
+    mocker.patch("aot.api.storage.config", new={"cache": {"backend": "unknown"}})
+
+    with pytest.raises(ValueError):
+        create_storage()
+
+
+@pytest.mark.asyncio
+async def test_hashes(storage):  # noqa: F811
+    assert await storage.hset("key", "field", "value") == 1
+    assert await storage.hset("key", "field", "value") == 0
+    await storage.hmset("key", {"test": False, "number": 2})
+
+    assert await storage.hget("key", "field") == b"value"
+    assert await storage.hget("key", "missing") is None
+    assert await storage.hget("missing", "field") is None
+    assert await storage.hmget("key", "test", "missing", "number") == [b"False", None, b"2"]
+    assert await storage.hincrby("key", "number", 3) == 5
+    assert await storage.hincrby("key", "other") == 1
+
+
+@pytest.mark.asyncio
+async def test_lists(storage):  # noqa: F811
+    assert await storage.rpush("key", "a", b"b") == 2
+    assert await storage.rpush("key", 3) == 3
+
+    assert await storage.lrange("key", 0, -1) == [b"a", b"b", b"3"]
+    assert await storage.lrange("key", 1, 1) == [b"b"]
+    assert await storage.lrange("missing", 0, -1) == []
+
+
+@pytest.mark.asyncio
+async def test_sets(storage):  # noqa: F811
+    assert await storage.sadd("key", "a", "b") == 2
+    assert await storage.sadd("key", "b", "c") == 1
+    assert await storage.scard("key") == 3
+    assert await storage.srem("key", "a", "missing") == 1
+    assert await storage.scard("key") == 2
+
+    await storage.srem("key", "b", "c")
+
+    assert list(storage.database.scan()) == []
+
+
+@pytest.mark.asyncio
+async def test_sorted_sets(storage):  # noqa: F811
+    assert await storage.zadd("key", 2, "b") == 1
+    assert await storage.zadd("key", 1, "a") == 1
+    assert await storage.zadd("key", 3, "a") == 0
+
+    assert await storage.zrange("key", 0, -1) == [b"b", b"a"]
+    assert await storage.zcard("key") == 2
+
+
+@pytest.mark.asyncio
+async def test_expire(storage, clock):  # noqa: F811
+    await storage.set("key", "value")
+    await storage.hset("other_key", "field", "value")
+
+    assert await storage.expire("key", 10)
+    assert not await storage.expire("missing", 10)
+    assert await storage.ttl("key") == 10
+    assert await storage.ttl("other_key") == -1
+
+    clock.time = 9
+    assert await storage.get("key") == b"value"
+
+    clock.time = 10
+    assert await storage.get("key") is None
+    assert await storage.ttl("key") == -2
+    assert await storage.hget("other_key", "field") == b"value"
+
+
+@pytest.mark.asyncio
+async def test_expired_keys_are_swept_on_writes(storage, clock):  # noqa: F811
+    await storage.set("key", "value")
+    await storage.expire("key", 10)
+
+    clock.time = 10
+    await storage.set("other_key", "value")
+    # The key is expired but it is kept until the next sweep.
+    assert b"key" in storage.database._values
+
+    clock.time = storage_module._EXPIRED_KEYS_SWEEP_INTERVAL
+    await storage.set("other_key", "value")
+    assert b"key" not in storage.database._values
+    assert b"key" not in storage.database._expiry_times
+
+
+@pytest.mark.asyncio
+async def test_set_resets_expire(storage):  # noqa: F811
+    await storage.set("key", "value")
+    await storage.expire("key", 10)
+
+    await storage.set("key", "other_value")
+
+    assert await storage.ttl("key") == -1
+
+
+@pytest.mark.asyncio
+async def test_delete(storage):  # noqa: F811
+    await storage.set("key", "value")
+    await storage.rpush("other_key", "value")
+
+    assert await storage.delete("key", "other_key", "missing") == 2
+    assert await storage.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_scan_iter(storage, clock):  # noqa: F811
+    await storage.set("game:1", "value")
+    await storage.set("game:2", "value")
+    await storage.set("players:1", "value")
+    await storage.expire("game:2", 10)
+    clock.time = 10
+
+    assert [key async for key in storage.scan_iter(match="game:*")] == [b"game:1"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline(storage):  # noqa: F811
+    pipeline = await storage.pipeline(transaction=True)
+    await pipeline.hset("key", "field", 1)
+    await pipeline.hincrby("key", "field", 2)
+
+    assert await storage.hget("key", "field") is None
+    assert await pipeline.execute() == [1, 3]
+    assert await pipeline.execute() == []
+
+
+@pytest.mark.asyncio
+async def test_run_script(storage):  # noqa: F811
+    function = MagicMock(return_value=b"result")
+    script = Script("return 1", function)
+
+    assert await storage.run_script(script, keys=["key"], args=["value", 1]) == b"result"
+    function.assert_called_once_with(storage.database, ["key"], [b"value", b"1"])
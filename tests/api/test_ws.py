@@ -0,0 +1,205 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from autobahn.asyncio.websocket import WebSocketServerFactory
+
+from aot.api.api import Api
+from aot.api.game_updates import GameUpdates
+from aot.api.send_queue import OverflowPolicies, SendQueue
+from aot.api.utils import RequestTypes
+from aot.api.ws import AotWs
+
+ACTIONS = [
+    {"description": f"Action number {index} of the game", "index": index} for index in range(10)
+]
+
+
+def create_ws(ws_id, state=AotWs.STATE_OPEN):
+    ws = AotWs()
+    ws._id = ws_id
+    ws.factory = WebSocketServerFactory()
+    ws.state = state
+    ws.sendMessage = MagicMock()
+    ws.sendPreparedMessage = MagicMock()
+    ws._api = Api(default_id=ws_id, loop=None, ai_delay=0, cache=MagicMock())
+    ws._send_queue = SendQueue(max_size=3, overflow_policy=OverflowPolicies.CLOSE)
+    ws.dropConnection = MagicMock()
+    return ws
+
+
+def join_game(ws, game_id):
+    ws._api._game_id = game_id
+    ws._handle_game_change()
+
+
+async def acknowledge_game_version(ws, version):
+    await ws._api.process_message(
+        {"rt": RequestTypes.ACKNOWLEDGE_GAME_VERSION, "request": {"version": version}}
+    )
+
+
+def game_message(version, actions):
+    return {
+        "rt": RequestTypes.GAME_UPDATED,
+        "request": {"id": "game_id", "actions": actions, "version": version},
+    }
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    clients = {
+        "current": create_ws("current"),
+        "other": create_ws("other"),
+        "closed": create_ws("closed", state=AotWs.STATE_CLOSED),
+    }
+    monkeypatch.setattr(AotWs, "_clients", clients)
+    monkeypatch.setattr(AotWs, "_clients_by_game", {})
+    monkeypatch.setattr(AotWs, "_game_updates", GameUpdates(history_size=4, max_games=2))
+
+    for ws in clients.values():
+        join_game(ws, "game_id")
+
+    return clients
+
+
+@pytest.mark.asyncio
+async def test_send_to_all_prepares_messages_once(clients, mocker):
+    ws = clients["current"]
+    prepare_message = mocker.spy(ws.factory, "prepareMessage")
+
+    await ws._send_to_all([{"rt": "SLOT_UPDATED"}])
+
+    prepare_message.assert_called_once_with(b'{"rt": "SLOT_UPDATED"}')
+    prepared_message = prepare_message.spy_return
+    ws.sendPreparedMessage.assert_called_once_with(prepared_message)
+    clients["other"].sendPreparedMessage.assert_called_once_with(prepared_message)
+    clients["closed"].sendPreparedMessage.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_send_to_all_others(clients):
+    ws = clients["current"]
+
+    await ws._send_to_all([{"rt": "SLOT_UPDATED"}], excluded_players={ws.id})
+
+    ws.sendPreparedMessage.assert_not_called()
+    clients["other"].sendPreparedMessage.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_send_to_all_other_game(clients):
+    ws = clients["current"]
+    join_game(clients["other"], "other_game")
+
+    await ws._send_to_all([{"rt": "SLOT_UPDATED"}])
+
+    ws.sendPreparedMessage.assert_called_once()
+    clients["other"].sendPreparedMessage.assert_not_called()
+
+
+def test_clients_by_game(clients):
+    ws = clients["current"]
+
+    join_game(ws, "other_game")
+
+    assert AotWs._clients_by_game == {
+        "game_id": {clients["other"], clients["closed"]},
+        "other_game": {ws},
+    }
+
+    ws._leave_game()
+
+    assert AotWs._clients_by_game == {"game_id": {clients["other"], clients["closed"]}}
+
+
+@pytest.mark.asyncio
+async def test_send_to_all_game_updates(clients):
+    ws = clients["current"]
+    other_ws = clients["other"]
+    await ws._send_to_all([game_message(1, ACTIONS[:-2])])
+    # The player acknowledges a version older than the last one it was sent.
+    await acknowledge_game_version(other_ws, 0)
+    await ws._send_to_all([game_message(2, ACTIONS[1:-1])])
+    await ws._send_to_all([game_message(3, ACTIONS[2:])])
+
+    assert b'"actions"' in ws.sendPreparedMessage.call_args.args[0].payload
+    payloads = [call.args[0].payload for call in other_ws.sendPreparedMessage.call_args_list]
+    assert b'"actions"' in payloads[0]
+    assert b'"base_version": 1' in payloads[1]
+    assert b'"base_version": 2' in payloads[2]
+    assert other_ws._api.game_version == 3
+
+
+@pytest.mark.asyncio
+async def test_send_messages_resumed_game(clients):
+    ws = clients["current"]
+    await ws._send_to_all([game_message(1, ACTIONS[:-1])])
+    await acknowledge_game_version(ws, 1)
+
+    await ws.send_messages([game_message(2, ACTIONS[1:]), {"rt": "PLAYER_UPDATED"}])
+
+    game_payload, player_payload = [call.args[0] for call in ws.sendMessage.call_args_list]
+    assert b'"base_version": 1' in game_payload
+    assert player_payload == b'{"rt": "PLAYER_UPDATED"}'
+    assert ws._api.game_version == 2
+
+
+@pytest.mark.asyncio
+async def test_send_to_all_slow_client(clients):
+    ws = clients["current"]
+    other_ws = clients["other"]
+    other_ws._loop = asyncio.get_running_loop()
+    await acknowledge_game_version(other_ws, 0)
+    await ws._send_to_all([game_message(1, ACTIONS[:-2])])
+    other_ws.pause_writing()
+
+    await ws._send_to_all([game_message(2, ACTIONS[1:-1])])
+    await ws._send_to_all([{"rt": "SLOT_UPDATED"}])
+    await ws._send_to_all([game_message(3, ACTIONS[2:])])
+
+    assert other_ws.sendPreparedMessage.call_count == 1
+    assert len(other_ws._send_queue) == 2
+    other_ws.resume_writing()
+    # Messages are queued until the queue is flushed.
+    await other_ws.send_messages([{"rt": "PLAYER_UPDATED", "request": {"id": "other"}}])
+    await other_ws._flush_send_queue()
+
+    assert len(other_ws._send_queue) == 0
+    payloads = [call.args[0] for call in other_ws.sendMessage.call_args_list]
+    assert payloads[0] == b'{"rt": "SLOT_UPDATED"}'
+    # The superseded state was never sent: the patch is created from the last state sent.
+    assert b'"base_version": 1, "version": 3' in payloads[1]
+    assert payloads[2] == b'{"rt": "PLAYER_UPDATED", "request": {"id": "other"}}'
+    assert other_ws._api.game_version == 3
+
+
+@pytest.mark.asyncio
+async def test_send_to_all_slow_client_overflow(clients):
+    ws = clients["current"]
+    other_ws = clients["other"]
+    other_ws.pause_writing()
+
+    for index in range(4):
+        await ws._send_to_all([{"debug": index}])
+
+    other_ws.dropConnection.assert_called_once_with(abort=True)
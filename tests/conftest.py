@@ -25,6 +25,8 @@ import txaio
 from aot.api import Api
 from aot.api.cache import Cache
 from aot.api.game_factory import build_cards_list, build_trumps_list, create_game_for_players
+from aot.api.live_games import LiveGames
+from aot.api.storage import MemoryStorage
 from aot.game import Player
 from aot.game.board import Board
 from aot.game.cards import Deck
@@ -130,15 +132,25 @@ def api(mocker):
 
 @pytest.fixture
 def cache(mocker):
-    mocker.patch("aot.api.cache.Redis", site_effect=aredis())
+    mocker.patch("aot.api.storage.RedisStorage", site_effect=aredis())
     cache = Cache()
     cache.init("game_id", "player_id")
     cache._cache = MagicMock()
+    cache._live_games = LiveGames(max_size=2)
     return cache
 
 
 @pytest.fixture
 def cache_cls(mocker):
-    mocker.patch("aot.api.cache.Redis", site_effect=MagicMock())
+    mocker.patch("aot.api.storage.RedisStorage", site_effect=MagicMock())
 
     return Cache
+
+
+@pytest.fixture
+def memory_cache(mocker):
+    mocker.patch.object(Cache, "_cache", MemoryStorage())
+    cache = Cache()
+    cache.init("game_id", "player_id")
+    cache._live_games = LiveGames(max_size=2)
+    return cache
@@ -0,0 +1,118 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import random
+
+import pytest
+
+from aot.game.board import Board, Color, SquareSet
+from aot.game.cards import Card
+from aot.game.config import GAME_CONFIGS
+
+
+def reference_move(board, colors, movements_types, number_movements, origin):
+    """Card.move as it was implemented with sets of squares, before bitboards."""
+    possible_squares = SquareSet(initial_squares={origin})
+    for _ in range(number_movements):
+        possible_squares_level = set()
+        for possible_origin in possible_squares:
+            if "line" in movements_types:
+                possible_squares_level.update(board.get_line_squares(possible_origin, colors))
+            if "diagonal" in movements_types:
+                possible_squares_level.update(board.get_diagonal_squares(possible_origin, colors))
+            if "knight" in movements_types:
+                possible_squares_level.update(
+                    square
+                    for square in reference_knight_move(board, possible_origin)
+                    if square.color in colors and not square.occupied
+                )
+        possible_squares.update(possible_squares_level)
+
+    return {square for square in possible_squares if not square.occupied and square is not origin}
+
+
+def reference_knight_move(board, origin):
+    x, y = origin.x, origin.y
+    squares = set()
+    for dy in (2, -2):
+        for dx in (1, -1):
+            if board[x, y + dy] is not None or board[x + dx, y] is not None:
+                squares.add(board[x + dx, y + dy])
+    for dy in (1, -1):
+        for dx in (1, -1):
+            if board[x, y + dy] is not None and board[x + dx, y + dy] is not None:
+                squares.add(board[x + 2 * dx, y + dy])
+    squares.discard(None)
+    return squares
+
+
+@pytest.fixture(params=["standard", "test"])
+def random_board(request):
+    board = Board(GAME_CONFIGS[request.param]["board"])
+    rng = random.Random(42)
+    for square_id in range(len(board.layout)):
+        square = board.get_square_by_id(square_id)
+        square.occupied = rng.random() < 0.3
+        if rng.random() < 0.05:
+            board.change_color_of_square(square.x, square.y, rng.choice(list(Color)))
+    return board
+
+
+@pytest.mark.parametrize(
+    "movements_types",
+    [["line"], ["diagonal"], ["knight"], ["line", "diagonal"], ["line", "knight"]],
+)
+@pytest.mark.parametrize("number_movements", [1, 2, 3])
+@pytest.mark.parametrize(
+    "color,complementary_colors",
+    [(Color.RED, set()), (Color.BLUE, {Color.YELLOW}), (Color.ALL, set())],
+)
+def test_move_same_as_reference(
+    random_board, movements_types, number_movements, color, complementary_colors
+):
+    card = Card(
+        random_board,
+        color=color,
+        complementary_colors=complementary_colors,
+        movements_types=movements_types,
+        number_movements=number_movements,
+    )
+
+    for square_id in range(0, len(random_board.layout), 11):
+        origin = random_board.get_square_by_id(square_id)
+        assert card.move(origin) == reference_move(
+            random_board, card.colors, movements_types, number_movements, origin
+        ), origin
+
+
+def test_colors_masks_follow_square_updates(board):
+    square = board[0, 8]
+    bit = board.bitboard.bits[board.get_square_id(square)]
+    original_color = square.color
+
+    board.change_color_of_square(0, 8, Color.BLACK if original_color != Color.BLACK else Color.RED)
+    assert not board.get_colors_mask([original_color]) & bit
+    assert board.get_colors_mask([square.color]) & bit
+
+    square.occupied = False
+    assert not board.occupied_mask & bit
+    square.occupied = True
+    assert board.occupied_mask & bit
+    board.free_all_squares()
+    assert board.occupied_mask == 0
@@ -17,8 +17,11 @@
 # along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
 ################################################################################
 
-from aot.game.board import Color, ColorSet, Square
+import pickle  # noqa: S403 (bandit: pickle security issues)
+
+from aot.game.board import Board, Color, ColorSet, Square
 from aot.game.board.square import SquareSet
+from aot.game.config import TEST_CONFIG
 
 
 def test_get_wrong_squares(board):  # noqa: F811
@@ -164,3 +167,68 @@ def test_get_neighbors_with_movements_types_all(board):  # noqa: F811
         board[0, 7],
         board[1, 7],
     }
+
+
+def test_squares_are_views_on_the_board(board):  # noqa: F811
+    square = board[0, 8]
+
+    assert board[0, 8] is square
+    square.occupied = True
+    board.change_color_of_square(0, 8, Color.BLUE)
+
+    assert board[0, 8].occupied
+    assert board[0, 8].color == Color.BLUE
+    assert board.updated_squares == (square,)
+
+
+def test_squares_are_not_shared_between_boards(board):  # noqa: F811
+    other_board = Board(TEST_CONFIG["board"])
+    original_color = board[0, 8].color
+    board.change_color_of_square(0, 8, Color.BLUE)
+
+    assert other_board[0, 8] is not board[0, 8]
+    assert other_board[0, 8].color == original_color
+
+
+def test_pickle_board_keeps_squares_of_board(board):  # noqa: F811
+    board.change_color_of_square(0, 8, Color.BLUE)
+    board[1, 8].occupied = True
+
+    pickled_board, pickled_square = pickle.loads(  # noqa: S301 (pickle usage)
+        pickle.dumps((board, board[0, 8]))
+    )
+
+    assert pickled_square is pickled_board[0, 8]
+    assert pickled_square.color == Color.BLUE
+    assert pickled_board[1, 8].occupied
+    assert pickled_board.updated_squares == (pickled_square,)
+
+
+def test_pickle_detached_square():
+    square = Square(9, 4, Color.YELLOW, is_occupied=True, is_arrival=True)
+    square.color = Color.RED
+
+    pickled_square = pickle.loads(pickle.dumps(square))  # noqa: S301 (pickle usage)
+
+    assert pickled_square == square
+    assert hash(pickled_square) == hash(square)
+    assert pickled_square.color == Color.RED
+    assert pickled_square.occupied
+    assert pickled_square.is_arrival
+
+
+def test_adjacency_tables_are_shared(board):  # noqa: F811
+    other_board = Board(TEST_CONFIG["board"])
+
+    assert other_board.layout.line_neighbors is board.layout.line_neighbors
+    assert other_board.layout.diagonal_neighbors is board.layout.diagonal_neighbors
+    assert other_board.layout.knight_destinations is board.layout.knight_destinations
+
+
+def test_knight_destinations(board):  # noqa: F811
+    square_id = board.get_square_id(board[0, 8])
+
+    assert {
+        board.get_square_by_id(destination_id)
+        for destination_id in board.layout.knight_destinations[square_id]
+    } == {board[1, 6], board[1, 10], board[2, 7], board[2, 9]}
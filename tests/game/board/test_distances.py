@@ -0,0 +1,131 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import pickle  # noqa: S403 (bandit: pickle security issues)
+
+from aot.game.ai.pathfinding import a_star
+from aot.game.board import Board, Color
+from aot.game.board.distances import UNREACHABLE, get_distance_oracle
+from aot.game.config import TEST_CONFIG
+
+
+def test_distance_field(board):
+    distances = board.distances.get_distance_field([board[19, 8]])
+
+    assert distances[board[19, 8]] == 0
+    assert distances[board[18, 8]] == 1
+    assert distances[board[18, 7]] == 1
+    assert distances[board[0, 8]] == 19
+
+
+def test_distance_field_multiple_goals(board):
+    distances = board.distances.get_distance_field([board[19, 8], board[0, 8]])
+
+    assert distances[board[19, 8]] == 0
+    assert distances[board[0, 8]] == 0
+    assert distances[board[2, 8]] == 2
+    assert distances[board[17, 8]] == 2
+
+
+def test_distance_field_shared_between_boards(board):
+    other_board = Board(TEST_CONFIG["board"])
+
+    assert other_board.distances is board.distances
+    assert other_board.distances.get_distance_field(
+        [other_board[19, 8]]
+    ) is board.distances.get_distance_field([board[19, 8]])
+
+
+def test_distance_field_ignore_occupied_squares(board):
+    distances = board.distances.get_distance_field([board[19, 8]])
+    board[18, 8].occupied = True
+
+    assert board.distances.get_distance_field([board[19, 8]]) is distances
+    assert distances[board[18, 8]] == 1
+
+
+def test_distance_field_square_cannot_be_crossed(board):
+    board.change_color_of_square(18, 8, Color.ALL)
+    distances = board.distances.get_distance_field([board[18, 8]])
+
+    assert board.distances is not Board(TEST_CONFIG["board"]).distances
+    assert distances[board[18, 8]] == 0
+    assert distances[board[17, 8]] == UNREACHABLE
+
+
+def test_distance_field_color_change_keeps_oracle(board):
+    board.change_color_of_square(18, 8, Color.BLUE)
+
+    assert board.distances is Board(TEST_CONFIG["board"]).distances
+
+
+def test_pickle_keeps_layout(board):
+    pickled_board = pickle.loads(pickle.dumps(board))  # noqa: S301 (pickle usage)
+
+    assert pickled_board.layout is board.layout
+    assert pickled_board.distances is board.distances
+
+
+def test_get_distance(board):
+    assert board.distances.get_distance(board[0, 8], board[0, 8]) == 0
+    assert board.distances.get_distance(board[0, 8], board[1, 7]) == 1
+    assert board.distances.get_distance(board[0, 8], board[19, 8]) == 19
+
+
+def test_get_distance_movements_types(board):
+    start = board[0, 8]
+    goal = board[1, 7]
+
+    assert board.distances.get_distance(start, goal, movements_types=["line"]) == 2
+    assert board.distances.get_distance(start, goal, movements_types=["diagonal"]) == 1
+    assert board.distances.get_distance(start, goal, movements_types=["line", "diagonal"]) == 1
+    assert board.distances.get_distance(start, board[0, 6], movements_types=["diagonal"]) == 2
+    assert (
+        board.distances.get_distance(start, board[0, 7], movements_types=["diagonal"])
+        == UNREACHABLE
+    )
+    assert board.distances.get_distance(start, goal, movements_types=["knight"]) == UNREACHABLE
+
+
+def test_get_distance_same_as_a_star(board):
+    start = board[0, 8]
+    for goal in (board[19, 8], board[5, 3], board[8, 14]):
+        for movements_types in (["line"], ["diagonal"], ["line", "diagonal"]):
+            path = a_star(start, goal, board, movements_types=movements_types)
+            distance = board.distances.get_distance(start, goal, movements_types=movements_types)
+            if path:
+                assert distance == len(path) - 1
+            else:
+                assert distance == UNREACHABLE
+
+
+def test_distance_oracle_kept_by_board(board):
+    get_distance_oracle.cache_clear()
+    other_board = Board(TEST_CONFIG["board"])
+    board.change_color_of_square(18, 8, Color.ALL)
+    other_board.change_color_of_square(18, 8, Color.ALL)
+    distances = board.distances
+
+    assert board.distances is distances
+    assert other_board.distances is not distances
+    assert get_distance_oracle.cache_info().currsize == 1
+
+    board.change_color_of_square(18, 8, Color.BLUE)
+
+    assert board.distances is Board(TEST_CONFIG["board"]).distances
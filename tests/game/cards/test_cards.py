@@ -113,6 +113,85 @@ def test_line_card_over_occupied_square(board):  # noqa: F811
     assert occupied_square not in card.move(start_square)
 
 
+def test_iter_moves_closest_squares_first(board):  # noqa: F811
+    card_properties = deepcopy(CARD_DICT)
+    card_properties["movements_types"].append("line")
+    card_properties["number_movements"] = 3
+    card_properties["color"] = Color.ALL
+    board.free_all_squares()
+
+    card = Card(board, **card_properties)
+    origin = board[5, 5]
+    squares = list(card.iter_moves(origin))
+    distances = [abs(square.x - origin.x) + abs(square.y - origin.y) for square in squares]
+
+    assert len(squares) == len(set(squares))
+    assert set(squares) == card.move(origin)
+    assert origin not in squares
+    assert distances == sorted(distances)
+    assert max(distances) == 3
+
+
+def test_iter_moves_never_yields_origin(board):  # noqa: F811
+    card_properties = deepcopy(CARD_DICT)
+    card_properties["movements_types"].append("line")
+    card_properties["number_movements"] = 2
+    card_properties["color"] = Color.ALL
+    board.free_all_squares()
+
+    card = Card(board, **card_properties)
+    # The origin is compared by id: it is excluded even if it isn't equal to the board square.
+    origin = Square(5, 5, Color.BLACK if board[5, 5].color != Color.BLACK else Color.RED)
+    squares = list(card.iter_moves(origin))
+
+    assert board[5, 5] not in squares
+    assert len(squares) == len(set(squares))
+
+
+def test_move_is_memoized(board):  # noqa: F811
+    card_properties = deepcopy(CARD_DICT)
+    card_properties["movements_types"].append("line")
+    card = Card(board, **card_properties)
+
+    possible_squares = card.move(board[6, 8])
+
+    assert card.move(board[6, 8]) is possible_squares
+    assert card.move(board[5, 8]) is not possible_squares
+
+
+def test_move_cache_invalidated_by_board(board):  # noqa: F811
+    card_properties = deepcopy(CARD_DICT)
+    card_properties["movements_types"].append("line")
+    card = Card(board, **card_properties)
+    origin = board[6, 8]
+    assert card.move(origin) == {board[6, 9]}
+
+    board[6, 9].occupied = True
+    assert card.move(origin) == set()
+
+    board[6, 9].occupied = False
+    board.change_color_of_square(6, 7, Color.BLUE)
+    assert card.move(origin) == {board[6, 9], board[6, 7]}
+
+
+def test_move_cache_invalidated_by_card_modifications(board):  # noqa: F811
+    card_properties = deepcopy(CARD_DICT)
+    card_properties["movements_types"].append("line")
+    card = Card(board, **card_properties)
+    origin = board[6, 8]
+    assert card.move(origin) == {board[6, 9]}
+
+    card.modify_colors([Color.ALL])
+    assert {board[6, 9], board[6, 7], board[5, 8]} <= card.move(origin)
+
+    card.revert_to_default()
+    card.modify_number_moves(1)
+    assert card.move(origin) == {board[6, 9], board[5, 9]}
+
+    card.remove_color_from_possible_colors(Color.ALL)
+    assert card.move(origin) == set()
+
+
 def test_diagonal_card(board):  # noqa: F811
     card_properties = deepcopy(CARD_DICT)
     card_properties["movements_types"].append("diagonal")
@@ -168,7 +247,6 @@ def test_line_diagonal_card_two_moves(board):  # noqa: F811
         Square(x=7, y=2, color=Color.BLUE),
         Square(x=8, y=1, color=Color.BLUE),
         Square(x=10, y=3, color=Color.RED),
-        Square(x=8, y=2, color=Color.RED),
         Square(x=6, y=3, color=Color.BLUE),
     }
 
@@ -290,44 +368,44 @@ def test_remove_color_from_possible_colors(board):  # noqa: F811
 def test_revert_number_moves(board):  # noqa: F811
     card_properties = deepcopy(CARD_DICT)
     card = Card(board, **card_properties)
-    assert card._number_movements == 1
-    card._number_movements = 5
+    assert card.number_movements == 1
+    card.modify_number_moves(4)
 
     card.revert_to_default()
 
-    assert card._number_movements == 1
+    assert card.number_movements == 1
 
 
 def test_modify_colors(board):  # noqa: F811
     card_properties = deepcopy(CARD_DICT)
     card = Card(board, **card_properties)
-    assert card._colors == ColorSet([Color.BLUE])
+    assert card.colors == ColorSet([Color.BLUE])
 
     card.modify_colors({Color.RED})
 
-    assert card._colors == {Color.RED}
+    assert card.colors == {Color.RED}
 
 
 def test_modify_colors(board):  # noqa: F811
     card_properties = deepcopy(CARD_DICT)
     card = Card(board, **card_properties)
-    assert card._colors == ColorSet([Color.BLUE])
+    assert card.colors == ColorSet([Color.BLUE])
 
     card.modify_colors({Color.ALL})
 
-    assert isinstance(card._colors, ColorSet)
-    assert len(card._colors) == 4
+    assert isinstance(card.colors, ColorSet)
+    assert len(card.colors) == 4
 
 
 def test_modify_number_moves(board):  # noqa: F811
     card_properties = deepcopy(CARD_DICT)
     card = Card(board, **card_properties)
-    assert card._number_movements == 1
+    assert card.number_movements == 1
 
     card.modify_number_moves(4)
 
-    assert card._number_movements == 5
+    assert card.number_movements == 5
 
     card.modify_number_moves(-2)
 
-    assert card._number_movements == 3
+    assert card.number_movements == 3
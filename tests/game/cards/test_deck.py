@@ -16,14 +16,18 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
 ################################################################################
-
+import pickle  # noqa: S403 (bandit: pickle security issues)
+import random
+from dataclasses import replace
 from unittest.mock import MagicMock
 
 import pytest
 
+from aot.api.game_factory import build_cards_list
 from aot.game.board import Color
-from aot.game.cards import Card
+from aot.game.cards import Card, Deck
 from aot.game.cards.exceptions import CardNotFoundError
+from aot.game.config import TEST_CONFIG
 
 NUMBER_COLORS = 4
 NUMBER_CARD_TYPES = 7
@@ -55,6 +59,34 @@ def test_init_deck(deck):  # noqa: F811
     assert NUMBER_TOTAL_CARDS - NUMBER_CARDS_HAND == deck.number_cards_in_stock
 
 
+def test_shuffle_order(board):  # noqa: F811
+    cards = build_cards_list(TEST_CONFIG, board)
+    random.seed(42)
+    expected_order = random.sample(cards, len(cards))
+
+    random.seed(42)
+    deck = Deck(cards)
+
+    assert deck.hand == expected_order[:NUMBER_CARDS_HAND]
+    assert deck.stock == expected_order[NUMBER_CARDS_HAND:]
+    assert list(deck) == expected_order
+
+
+def test_pickle_deck(deck):  # noqa: F811
+    deck.play(deck.first_card_in_hand)
+
+    pickled_deck = pickle.loads(pickle.dumps(deck))  # noqa: S301 (pickle usage)
+
+    def get_keys(cards):
+        return [(card.name, card.color) for card in cards]
+
+    assert get_keys(pickled_deck.hand) == get_keys(deck.hand)
+    assert get_keys(pickled_deck.stock) == get_keys(deck.stock)
+    assert get_keys(pickled_deck.graveyard) == get_keys(deck.graveyard)
+    card = pickled_deck.first_card_in_hand
+    assert pickled_deck.get_card(card.name, card.color) is card
+
+
 def test_play_existing_card(deck):  # noqa: F811
     nb_remaining_cards_before_play = deck.number_cards_in_stock
     played_card = deck.first_card_in_hand
@@ -154,7 +186,7 @@ def test_modify_colors(deck):  # noqa: F811
 def test_modify_colors_with_filter(deck):  # noqa: F811
     for card in deck.hand:
         card.modify_colors = MagicMock()
-    deck.first_card_in_hand._name = "Card to keep"
+    deck.first_card_in_hand._spec = replace(deck.first_card_in_hand.spec, name="Card to keep")
     filter_ = lambda card: card.name == "Card to keep"  # noqa: E731
 
     deck.modify_colors(5, filter_=filter_)
@@ -177,7 +209,7 @@ def test_modify_number_moves(deck):  # noqa: F811
 def test_modify_number_moves_with_filter(deck):  # noqa: F811
     for card in deck.hand:
         card.modify_number_moves = MagicMock()
-    deck.first_card_in_hand._name = "Card to keep"
+    deck.first_card_in_hand._spec = replace(deck.first_card_in_hand.spec, name="Card to keep")
     filter_ = lambda card: card.name == "Card to keep"  # noqa: E731
 
     deck.modify_number_moves(5, filter_=filter_)
@@ -19,6 +19,7 @@
 
 from unittest.mock import MagicMock
 
+from aot.game.board.distances import UNREACHABLE
 from aot.game.trumps import Gauge
 
 
@@ -36,10 +37,15 @@ def test_can_play(gauge):  # noqa: F811
     assert gauge.can_play_trump(trump)
 
 
-def test_move_all_movements_types(gauge, mocker):
-    a_star = MagicMock(return_value=[None, None, None])
-    mocker.patch("aot.game.trumps.gauge.a_star", new=a_star)
-    gauge._value = 10
+def mocked_board(distance):
+    board = MagicMock()
+    board.distances.get_distance.return_value = distance
+    return board
+
+
+def test_move_all_movements_types():
+    board = mocked_board(2)
+    gauge = Gauge(board, value=10)
     from_ = MagicMock()
     to = MagicMock()
     card = MagicMock()
@@ -48,12 +54,14 @@ def test_move_all_movements_types(gauge, mocker):
 
     gauge.move(from_, to, card)
 
-    a_star.assert_called_once_with(from_, to, None, movements_types=card.movements_types)
+    board.distances.get_distance.assert_called_once_with(
+        from_, to, movements_types=card.movements_types
+    )
     assert gauge.value == 12
 
 
 def test_move_line(board):  # noqa: F811
-    # We use the real implementation of a_start with the goal of finding the correct distance
+    # We use the real distances with the goal of finding the correct distance
     # traveled by the card.
     gauge = Gauge(board)  # noqa: F811
     from_ = board[0, 8]
@@ -67,10 +75,9 @@ def test_move_line(board):  # noqa: F811
     assert gauge.value == 2
 
 
-def test_move_empty(gauge, mocker):  # noqa: F811
-    a_star = MagicMock(return_value=[])
-    mocker.patch("aot.game.trumps.gauge.a_star", new=a_star)
-    gauge._value = 10
+def test_move_unreachable():
+    board = mocked_board(UNREACHABLE)
+    gauge = Gauge(board, value=10)
     from_ = MagicMock()
     to = MagicMock()
     card = MagicMock()
@@ -79,14 +86,15 @@ def test_move_empty(gauge, mocker):  # noqa: F811
 
     gauge.move(from_, to, card)
 
-    a_star.assert_called_once_with(from_, to, None, movements_types=["line", "diagonal"])
+    board.distances.get_distance.assert_called_once_with(
+        from_, to, movements_types=["line", "diagonal"]
+    )
     assert gauge.value == 10
 
 
-def test_move_max(gauge, mocker):  # noqa: F811
-    a_star = MagicMock(return_value=[None, None, None])
-    mocker.patch("aot.game.trumps.gauge.a_star", new=a_star)
-    gauge._value = gauge.MAX_VALUE
+def test_move_max():
+    board = mocked_board(2)
+    gauge = Gauge(board, value=Gauge.MAX_VALUE)
     from_ = MagicMock()
     to = MagicMock()
     card = MagicMock()
@@ -95,14 +103,15 @@ def test_move_max(gauge, mocker):  # noqa: F811
 
     gauge.move(from_, to, card)
 
-    a_star.assert_called_once_with(from_, to, None, movements_types=["line", "diagonal"])
+    board.distances.get_distance.assert_called_once_with(
+        from_, to, movements_types=["line", "diagonal"]
+    )
     assert gauge.value == gauge.MAX_VALUE
 
 
-def test_move_knight(gauge, mocker):  # noqa: F811
-    a_star = MagicMock(return_value=[None, None, None])
-    mocker.patch("aot.game.trumps.gauge.a_star", new=a_star)
-    gauge._value = 10
+def test_move_knight():
+    board = mocked_board(2)
+    gauge = Gauge(board, value=10)
     from_ = MagicMock()
     to = MagicMock()
     card = MagicMock()
@@ -110,7 +119,7 @@ def test_move_knight(gauge, mocker):  # noqa: F811
 
     gauge.move(from_, to, card)
 
-    assert not a_star.called
+    assert not board.distances.get_distance.called
     assert gauge.value == 11
 
 
@@ -0,0 +1,71 @@
+################################################################################
+# Copyright (C) 2015-2020 by Last Run Contributors.
+#
+# This file is part of Arena of Titans.
+#
+# Arena of Titans is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Arena of Titans is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Arena of Titans. If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import pickle  # noqa: S403 (bandit: pickle security issues)
+
+from aot.api.game_factory import build_cards_list
+from aot.game.board import Board, Color
+from aot.game.cards import CardSpec, get_cards_specs
+from aot.game.config import GAME_CONFIGS, TEST_CONFIG
+
+
+def test_specs_are_shared_between_games():
+    config = GAME_CONFIGS["standard"]
+    board = Board(config["board"])
+    cards = build_cards_list(config, board)
+    other_cards = build_cards_list(config, Board(config["board"]))
+
+    assert get_cards_specs(config) is get_cards_specs(config)
+    assert all(card.spec is other_card.spec for card, other_card in zip(cards, other_cards))
+
+
+def test_specs_from_config():
+    specs = get_cards_specs(TEST_CONFIG)
+    bishop = next(spec for spec in specs if spec.name == "Bishop" and spec.color == Color.RED)
+
+    assert len(specs) == 28
+    assert bishop.colors == {Color.RED, Color.BLACK}
+    assert bishop.movements_types == ("diagonal",)
+    assert bishop.number_movements == 2
+
+
+def test_pickle_spec_of_config():
+    spec = get_cards_specs(GAME_CONFIGS["standard"])[3]
+
+    assert pickle.loads(pickle.dumps(spec)) is spec  # noqa: S301 (pickle usage)
+
+
+def test_pickle_spec_without_config():
+    spec = CardSpec.create(name="Warrior", color=Color.RED, movements_types=["line"])
+
+    pickled_spec = pickle.loads(pickle.dumps(spec))  # noqa: S301 (pickle usage)
+
+    assert pickled_spec == spec
+    assert pickled_spec is not spec
+
+
+def test_card_state_is_not_shared():
+    config = GAME_CONFIGS["standard"]
+    card, other_card = build_cards_list(config, None)[0], build_cards_list(config, None)[0]
+
+    card.modify_colors([Color.ALL])
+    card.modify_number_moves(1)
+
+    assert other_card.colors == other_card.spec.colors
+    assert other_card.number_movements == other_card.spec.number_movements
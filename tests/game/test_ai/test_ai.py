@@ -202,3 +202,20 @@ def test_find_cheapest_card(board):
     hand = [card1, card2]
 
     assert find_cheapest_card(hand) == card2
+
+
+@pytest.mark.timeout(TIMEOUT)
+def test_find_move_to_play_stops_at_goal(board, mocker):  # noqa: F811
+    card1 = Card(board, name="card1", movements_types=["line"])
+    card2 = Card(board, name="card2", movements_types=["line"])
+    squares = iter([board[16, 7], board[16, 8], board[17, 7]])
+    card1.iter_moves = mocker.MagicMock(return_value=squares)
+    card2.iter_moves = mocker.MagicMock()
+
+    result = find_move_to_play([card1, card2], board[16, 7], [board[16, 8]], board)
+
+    assert result.card is card1
+    assert result.square is board[16, 8]
+    # The remaining squares and cards are not generated.
+    assert next(squares) is board[17, 7]
+    assert card2.iter_moves.call_count == 0
@@ -425,6 +425,7 @@ snapshots['TestCreateGame.test_game_master_create_game game_master-0'] = {
         ],
         'can_power_be_played': False,
         'elapsed_time': 10,
+        'game_version': 0,
         'gauge_value': 0,
         'hand': [
             {
@@ -544,6 +545,7 @@ snapshots['TestCreateGame.test_game_master_create_game game_master-1'] = {
                 }
             }
         },
+        'version': 0,
         'winners': [
         ]
     },
@@ -625,6 +627,7 @@ snapshots['TestCreateGame.test_game_master_create_game player-0'] = {
         ],
         'can_power_be_played': False,
         'elapsed_time': 10,
+        'game_version': 0,
         'gauge_value': 0,
         'hand': [
             {
@@ -748,6 +751,7 @@ snapshots['TestCreateGame.test_game_master_create_game player-1'] = {
                 }
             }
         },
+        'version': 0,
         'winners': [
         ]
     },
@@ -808,6 +812,7 @@ snapshots['TestPlayGame.test_reconnect_game_master game_master-0'] = {
                     }
                 }
             },
+            'version': 1,
             'winners': [
             ]
         },
@@ -879,6 +884,7 @@ snapshots['TestPlayGame.test_reconnect_game_master game_master-0'] = {
             ],
             'can_power_be_played': False,
             'elapsed_time': 10,
+            'game_version': 1,
             'gauge_value': 0,
             'hand': [
                 {
@@ -1010,6 +1016,7 @@ snapshots['TestPlayGame.test_reconnect_player player-0'] = {
                     }
                 }
             },
+            'version': 1,
             'winners': [
             ]
         },
@@ -1087,6 +1094,7 @@ snapshots['TestPlayGame.test_reconnect_player player-0'] = {
             ],
             'can_power_be_played': False,
             'elapsed_time': 10,
+            'game_version': 1,
             'gauge_value': 0,
             'hand': [
                 {
@@ -1265,6 +1273,7 @@ snapshots['TestPlayGame.test_play_card game_master-0'] = {
         ],
         'can_power_be_played': False,
         'elapsed_time': 10,
+        'game_version': 0,
         'gauge_value': 1,
         'hand': [
             {
@@ -1382,6 +1391,7 @@ snapshots['TestPlayGame.test_play_card game_master-1'] = {
                 }
             }
         },
+        'version': 0,
         'winners': [
         ]
     },
@@ -1463,6 +1473,7 @@ snapshots['TestPlayGame.test_play_card player-0'] = {
         ],
         'can_power_be_played': False,
         'elapsed_time': 10,
+        'game_version': 0,
         'gauge_value': 0,
         'hand': [
             {
@@ -1589,6 +1600,7 @@ snapshots['TestPlayGame.test_play_card player-1'] = {
                 }
             }
         },
+        'version': 0,
         'winners': [
         ]
     },
@@ -1664,6 +1676,7 @@ snapshots['TestPlayGame.test_discard_card game_master-0'] = {
         ],
         'can_power_be_played': False,
         'elapsed_time': 10,
+        'game_version': 1,
         'gauge_value': 1,
         'hand': [
             {
@@ -1800,6 +1813,7 @@ snapshots['TestPlayGame.test_discard_card game_master-1'] = {
                 }
             }
         },
+        'version': 1,
         'winners': [
         ]
     },
@@ -1881,6 +1895,7 @@ snapshots['TestPlayGame.test_discard_card player-0'] = {
         ],
         'can_power_be_played': True,
         'elapsed_time': 10,
+        'game_version': 1,
         'gauge_value': 0,
         'hand': [
             {
@@ -2021,6 +2036,7 @@ snapshots['TestPlayGame.test_discard_card player-1'] = {
                 }
             }
         },
+        'version': 1,
         'winners': [
         ]
     },
@@ -2102,6 +2118,7 @@ snapshots['TestPlayGame.test_pass_turn player-0'] = {
         ],
         'can_power_be_played': False,
         'elapsed_time': 10,
+        'game_version': 2,
         'gauge_value': 0,
         'hand': [
             {
@@ -2253,6 +2270,7 @@ snapshots['TestPlayGame.test_pass_turn player-1'] = {
                 }
             }
         },
+        'version': 2,
         'winners': [
         ]
     },
@@ -2328,6 +2346,7 @@ snapshots['TestPlayGame.test_pass_turn game_master-0'] = {
         ],
         'can_power_be_played': False,
         'elapsed_time': 10,
+        'game_version': 2,
         'gauge_value': 1,
         'hand': [
             {
@@ -2475,6 +2494,7 @@ snapshots['TestPlayGame.test_pass_turn game_master-1'] = {
                 }
             }
         },
+        'version': 2,
         'winners': [
         ]
     },
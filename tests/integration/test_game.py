@@ -27,6 +27,7 @@ from unittest.mock import AsyncMock
 
 import daiquiri
 import pytest
+from autobahn.asyncio.websocket import WebSocketServerFactory
 
 from aot.api.cache import Cache
 from aot.api.ws import AotWs
@@ -69,13 +70,19 @@ class IntegrationTestsBase:
     def setup_class(cls):
         daiquiri.setup(level=logging.DEBUG)
 
-        cls.game_master_ws = AotWs()
-        cls.game_master_ws._wskey = cls.game_master_id
-        cls.game_master_ws.sendMessage = AsyncMock()
-
-        cls.player_ws = AotWs()
-        cls.player_ws._wskey = cls.player_id
-        cls.player_ws.sendMessage = AsyncMock()
+        cls.game_master_ws = cls._create_ws(cls.game_master_id)
+        cls.player_ws = cls._create_ws(cls.player_id)
+
+    @staticmethod
+    def _create_ws(ws_id):
+        ws = AotWs()
+        ws._wskey = ws_id
+        ws.factory = WebSocketServerFactory()
+        ws.state = AotWs.STATE_OPEN
+        ws.sendMessage = AsyncMock()
+        # Broadcast messages are sent pre-framed: record their payload like other messages.
+        ws.sendPreparedMessage = lambda prepared_message: ws.sendMessage(prepared_message.payload)
+        return ws
 
     @pytest.fixture(scope="function", autouse=True)
     def reset_send_message_calls(self, event_loop, create_new_cache_instance):